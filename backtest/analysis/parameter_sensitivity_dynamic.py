@@ -8,6 +8,9 @@
 import pandas as pd
 import numpy as np
 import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
 from pathlib import Path
 import sys
 
@@ -75,8 +78,30 @@ def run_parameter_sensitivity_test(symbol, strategy_name):
         traceback.print_exc()
         return None
 
-def test_unified_strategy_parameters(symbol, strategy_name, strategy_info, manager):
-    """测试统一策略的参数敏感性"""
+# 工作进程内复用的回测管理器 (策略发现每个进程只做一次)
+_worker_manager = None
+
+
+def _run_combination(symbol, strategy_name, params, manager=None):
+    """运行一组参数的静默回测，失败时返回None (可在工作进程中执行)"""
+    global _worker_manager
+    try:
+        if manager is None:
+            if _worker_manager is None:
+                from core.backtest_manager import BacktestManager
+                _worker_manager = BacktestManager()
+            manager = _worker_manager
+        return run_silent_backtest(manager, symbol, strategy_name, params)
+    except Exception:
+        return None
+
+
+def test_unified_strategy_parameters(symbol, strategy_name, strategy_info, manager, max_workers=None):
+    """
+    测试统一策略的参数敏感性
+
+    各参数组合互不依赖，用进程池并行回测；max_workers<=1时在当前进程内串行执行
+    """
     print(f"\n开始测试统一策略参数敏感性...")
     
     # 定义参数网格 - 基于RSI背离策略（简化版，减少测试时间）
@@ -101,30 +126,40 @@ def test_unified_strategy_parameters(symbol, strategy_name, strategy_info, manag
     results = []
     successful_tests = 0
     
-    for i, combination in enumerate(param_combinations, 1):
-        params = dict(zip(param_grids.keys(), combination))
-        
-        if i % 5 == 0 or i == 1:
-            print(f"进度: {i}/{total_combinations} ({i/total_combinations*100:.1f}%)")
+    all_params = [dict(zip(param_grids.keys(), combination)) for combination in param_combinations]
+    max_workers = min(max_workers or os.cpu_count() or 1, total_combinations)
+    
+    # 运行静默回测（不显示图表），结果按参数组合顺序返回；失败的组合为None
+    # 用spawn启动工作进程：fork会继承numba并行内核已启动的线程池，子进程调用内核时死锁
+    executor = (ProcessPoolExecutor(max_workers=max_workers, mp_context=get_context('spawn'))
+                if max_workers > 1 else None)
+    try:
+        if executor is not None:
+            n = total_combinations
+            backtests = executor.map(_run_combination, [symbol] * n, [strategy_name] * n, all_params)
+        else:
+            backtests = (_run_combination(symbol, strategy_name, params, manager) for params in all_params)
         
-        try:
-            # 运行静默回测（不显示图表）
-            result = run_silent_backtest(
-                manager, symbol, strategy_name, params
-            )
+        for i, (params, result) in enumerate(zip(all_params, backtests), 1):
+            if i % 5 == 0 or i == 1:
+                print(f"进度: {i}/{total_combinations} ({i/total_combinations*100:.1f}%)")
             
-            if result and result['total_trades'] >= 5:
-                test_result = {
-                    'params': params.copy(),
-                    'return_pct': result['total_return_pct'],
-                    'total_trades': result['total_trades'],
-                    'win_rate': result['win_rate'],
-                    'sharpe_ratio': calculate_simple_sharpe(result['total_return_pct'])
-                }
-                results.append(test_result)
-                successful_tests += 1
-        except:
-            continue  # 跳过失败的测试
+            try:
+                if result and result['total_trades'] >= 5:
+                    test_result = {
+                        'params': params.copy(),
+                        'return_pct': result['total_return_pct'],
+                        'total_trades': result['total_trades'],
+                        'win_rate': result['win_rate'],
+                        'sharpe_ratio': calculate_simple_sharpe(result['total_return_pct'])
+                    }
+                    results.append(test_result)
+                    successful_tests += 1
+            except (KeyError, TypeError):
+                continue  # 跳过结果不完整的测试
+    finally:
+        if executor is not None:
+            executor.shutdown()
     
     print(f"\n测试完成! 成功测试: {successful_tests}/{total_combinations}")
     return results
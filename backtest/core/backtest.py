@@ -34,16 +34,68 @@ DATA_DIR = Path(__file__).resolve().parents[2] / "crypto_data"
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS']
 plt.rcParams['axes.unicode_minus'] = False
 
+def get_dataset_dir(symbol, data_dir=None):
+    """数据更新器写入的分区数据集目录: data_dir/{symbol}/year=YYYY/month=MM/"""
+    return Path(data_dir or DATA_DIR) / symbol
+
+
+def get_legacy_file_path(symbol, data_dir=None):
+    """旧版单文件路径 (数据更新器首次更新后不再改写)"""
+    return Path(data_dir or DATA_DIR) / f"{symbol}_5m.parquet"
+
+
+def has_dataset(symbol, data_dir=None):
+    """交易对是否已有分区数据集"""
+    return any(get_dataset_dir(symbol, data_dir).glob("year=*/month=*/*.parquet"))
+
+
+def get_data_files(symbol, data_dir=None):
+    """交易对的5分钟数据文件：优先分区数据集 (与数据更新器一致)，否则旧版单文件"""
+    if has_dataset(symbol, data_dir):
+        return sorted(get_dataset_dir(symbol, data_dir).glob("year=*/month=*/*.parquet"))
+    file_path = get_legacy_file_path(symbol, data_dir)
+    return [file_path] if file_path.exists() else []
+
+
+def list_data_symbols(data_dir=None):
+    """目录中有5分钟数据的交易对 (旧版单文件和分区数据集)"""
+    data_dir = Path(data_dir or DATA_DIR)
+    if not data_dir.exists():
+        return []
+    symbols = {file.stem[:-len("_5m")] for file in data_dir.glob("*_5m.parquet")}
+    symbols.update(path.name for path in data_dir.iterdir()
+                   if path.is_dir() and has_dataset(path.name, data_dir))
+    return sorted(symbols)
+
+
+def read_5m_data(symbol, data_dir=None):
+    """
+    读取交易对的5分钟K线，索引为无时区的UTC时间；没有数据时返回None
+
+    分区数据集的时间列带UTC时区，转换为与旧版单文件一致的无时区时间，
+    year/month分区列不返回
+    """
+    if has_dataset(symbol, data_dir):
+        df = pd.read_parquet(get_dataset_dir(symbol, data_dir))
+        df = df.drop(columns=["year", "month"], errors="ignore").set_index("timestamp")
+    else:
+        file_path = get_legacy_file_path(symbol, data_dir)
+        if not file_path.exists():
+            return None
+        df = pd.read_parquet(file_path)
+    df.index = pd.to_datetime(df.index)
+    if df.index.tz is not None:
+        df.index = df.index.tz_convert(None)
+    df.sort_index(inplace=True)
+    return df
+
+
 def load_and_prepare_data(symbol, timeframe, start_date=None, end_date=None):
     """加载并准备数据"""
-    file_path = DATA_DIR / f"{symbol}_5m.parquet"
-    if not file_path.exists():
-        print(f"文件不存在: {file_path}")
+    df = read_5m_data(symbol)
+    if df is None:
+        print(f"数据不存在: {get_dataset_dir(symbol)} / {get_legacy_file_path(symbol)}")
         return None
-        
-    df = pd.read_parquet(file_path)
-    df.index = pd.to_datetime(df.index)
-    df.sort_index(inplace=True)
     
     if start_date:
         df = df[df.index >= pd.to_datetime(start_date)]
@@ -19,7 +19,8 @@ current_dir = Path(__file__).parent
 project_root = current_dir.parent.parent
 sys.path.insert(0, str(project_root))
 
-from backtest.core.backtest import load_and_prepare_data, ideal_dynamic_backtest, plot_ideal_results, analyze_strategy_reasonableness
+from backtest.core.backtest import (load_and_prepare_data, ideal_dynamic_backtest, plot_ideal_results, analyze_strategy_reasonableness,
+                                   get_data_files, list_data_symbols, read_5m_data)
 
 class BacktestManager:
     """回测管理器 - 支持多币对和多策略"""
@@ -31,16 +32,12 @@ class BacktestManager:
         
     def _discover_available_symbols(self) -> List[str]:
         """发现可用的交易对数据"""
-        symbols = []
         if not self.data_dir.exists():
             print(f"数据目录不存在: {self.data_dir}")
-            return symbols
+            return []
         
-        for file in self.data_dir.glob("*_5m.parquet"):
-            symbol_name = file.stem.replace("_5m", "").replace("-", "-")
-            symbols.append(symbol_name)
-        
-        return sorted(symbols)
+        # 旧版单文件和数据更新器写入的分区数据集
+        return list_data_symbols(self.data_dir)
     
     def _discover_available_strategies(self) -> Dict[str, Dict]:
         """发现可用的策略"""
@@ -107,18 +104,18 @@ class BacktestManager:
     
     def get_symbol_info(self, symbol: str) -> Optional[Dict]:
         """获取交易对信息"""
-        data_file = self.data_dir / f"{symbol}_5m.parquet"
-        if not data_file.exists():
+        data_files = get_data_files(symbol, self.data_dir)
+        if not data_files:
             return None
         
         try:
-            df = pd.read_parquet(data_file)
+            df = read_5m_data(symbol, self.data_dir)
             return {
                 'symbol': symbol,
                 'data_points': len(df),
                 'start_date': df.index[0],
                 'end_date': df.index[-1],
-                'file_size': data_file.stat().st_size / (1024*1024),  # MB
+                'file_size': sum(file.stat().st_size for file in data_files) / (1024*1024),  # MB
                 'timeframes': ['5m', '15m', '1h', '4h', '1d']  # 支持重采样
             }
         except Exception as e:
@@ -8,22 +8,17 @@ def find_peaks_and_troughs(series, window=5):
     """寻找局部高点和低点"""
     peaks = []
     troughs = []
+    offsets = [j for j in range(-window, window + 1) if j != 0]
+    # 逐元素比较时Python float比numpy标量快得多
+    if isinstance(series, np.ndarray):
+        series = series.tolist()
     
     for i in range(window, len(series) - window):
-        is_peak = True
-        is_trough = True
-        
-        for j in range(-window, window + 1):
-            if j == 0:
-                continue
-            if series[i] <= series[i + j]:
-                is_peak = False
-            if series[i] >= series[i + j]:
-                is_trough = False
-        
-        if is_peak:
+        value = series[i]
+        # any()遇到第一个不满足的邻居即停止，非极值点通常只需比较一两次
+        if not any(value <= series[i + j] for j in offsets):
             peaks.append(i)
-        if is_trough:
+        if not any(value >= series[i + j] for j in offsets):
             troughs.append(i)
     
     return peaks, troughs
@@ -0,0 +1,55 @@
+# test_data_loading.py - 回测数据读取测试 (分区数据集优先于旧版单文件)
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from core.backtest import get_data_files, list_data_symbols, read_5m_data
+
+# 与数据更新器相同的年/月hive分区
+PARTITIONING = ds.partitioning(
+    pa.schema([("year", pa.int32()), ("month", pa.int32())]), flavor="hive"
+)
+
+
+def _candles(start, periods):
+    index = pd.date_range(start, periods=periods, freq="5min", tz="UTC", name="timestamp")
+    values = np.arange(periods, dtype=np.float64)
+    return pd.DataFrame({col: values for col in ["open", "high", "low", "close", "volume"]},
+                        index=index)
+
+
+def _write_dataset(data_dir, symbol, df):
+    """按数据更新器的方式写入分区数据集"""
+    table = pa.Table.from_pandas(
+        df.reset_index().assign(year=df.index.year, month=df.index.month),
+        preserve_index=False,
+    )
+    ds.write_dataset(table, data_dir / symbol, format="parquet", partitioning=PARTITIONING,
+                     existing_data_behavior="delete_matching")
+
+
+def test_dataset_takes_priority_over_stale_single_file(tmp_path):
+    df = _candles("2024-01-31 20:00", 200)  # 跨越1月和2月两个分区
+    _write_dataset(tmp_path, "ETH-USDT", df)
+    stale = df.iloc[:10]
+    stale.set_axis(stale.index.tz_convert(None)).to_parquet(tmp_path / "ETH-USDT_5m.parquet")
+
+    loaded = read_5m_data("ETH-USDT", tmp_path)
+    assert len(loaded) == len(df)
+    assert loaded.columns.tolist() == ["open", "high", "low", "close", "volume"]
+    assert loaded.index.tz is None  # 与旧版单文件一致的无时区UTC时间
+    assert loaded.index.equals(pd.DatetimeIndex(df.index.tz_convert(None)).as_unit(loaded.index.unit))
+    assert len(get_data_files("ETH-USDT", tmp_path)) == 2
+
+
+def test_symbols_from_single_files_and_datasets(tmp_path):
+    df = _candles("2024-03-01", 20)
+    df.set_axis(df.index.tz_convert(None)).to_parquet(tmp_path / "BTC-USDT_5m.parquet")
+    _write_dataset(tmp_path, "SOL-USDT", df)  # 只由数据更新器创建的交易对
+    (tmp_path / "logs").mkdir()
+
+    assert list_data_symbols(tmp_path) == ["BTC-USDT", "SOL-USDT"]
+    assert len(read_5m_data("BTC-USDT", tmp_path)) == len(df)
+    assert read_5m_data("XRP-USDT", tmp_path) is None
+    assert list_data_symbols(tmp_path / "missing") == []
@@ -113,44 +113,41 @@ def generate_signals(df: pd.DataFrame,
         return signals
     
     try:
-        # 添加调试计数器
         analysis_count = 0
-        contraction_count = 0
-        breakout_count = 0
         signal_count = 0
         
-        # 逐步分析数据，模拟实时环境
+        # 一次向量化计算所有K线的突破信号，与逐根调用analyze的判定一致
+        batch = strategy.strategy.compute_signals_batch(df)
+        indicators = strategy.strategy.calculate_indicators(df)
+        
+        # 按原来的分析频率抽样，模拟实时环境
         step_size = max(1, len(df) // 1000)  # 减少分析频率以提高性能
+        sampled = np.arange(min_required, len(df), step_size)
+        analysis_count = len(sampled)
+        fired = sampled[batch['signal'].to_numpy()[sampled]]
         
-        for i in range(min_required, len(df), step_size):
-            analysis_count += 1
-            
-            # 获取到当前时间点的数据
-            current_data = df.iloc[:i+1].copy()
-            
-            # 调用策略分析
-            strategy_signals = strategy.analyze(
-                current_data, 
-                'BTC-USDT',  # 回测中使用通用符号
-                '5m'
+        close = df['close'].to_numpy()
+        side = batch['side'].to_numpy()
+        strength = batch['strength'].to_numpy()
+        for i in fired:
+            signal_count += 1
+            # 回测系统格式：(时间, 价格, 动作, 止损, 止盈, 强度)
+            action = 'buy' if side[i] > 0 else 'sell'
+            entry_price = float(close[i])
+            stop_loss, take_profit = strategy.strategy.calculate_stop_loss_take_profit(
+                indicators, i, entry_price, action
             )
             
-            # 转换为回测系统需要的格式
-            for signal in strategy_signals:
-                signal_count += 1
-                # 回测系统格式：(时间, 价格, 动作, 止损, 止盈, 强度)
-                action = 'buy' if signal.signal_type == 'buy' else 'sell'
-                
-                signals.append((
-                    signal.timestamp,
-                    signal.entry_price,
-                    action,
-                    signal.stop_loss,
-                    signal.take_profit,
-                    signal.strength
-                ))
-                
-                print(f"+ 生成{action}信号: 时间={signal.timestamp}, 价格={signal.entry_price:.2f}, 强度={signal.strength:.4f}")
+            signals.append((
+                df.index[i],
+                entry_price,
+                action,
+                stop_loss,
+                take_profit,
+                float(strength[i])
+            ))
+            
+            print(f"+ 生成{action}信号: 时间={df.index[i]}, 价格={entry_price:.2f}, 强度={strength[i]:.4f}")
         
         # 额外分析：检查最后一段数据的波动率情况
         if len(df) >= 100:
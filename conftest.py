@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+"""
+根目录测试的公共配置
+
+导入路径只在这里设置一次 (各测试文件不再各自修改sys.path)，
+测试数据由会话级fixture读取一次后在测试间共享。
+直接以脚本运行测试文件时，在 __main__ 中 import conftest 完成同样的路径设置。
+"""
+
+import pickle
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parent
+TEST_DATA_PATH = ROOT_DIR / "crypto_data" / "BTC-USDT_5m.parquet"
+# 预处理后的测试数据缓存: DataFrame的pickle + 每列一个.npy (供纯numpy代码内存映射读取)
+TEST_CACHE_DIR = ROOT_DIR / "crypto_data" / ".cache"
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# 优先级: backtest > 根目录；live_trading放在最后，避免其core/strategies遮蔽backtest的同名包
+for _path in (ROOT_DIR, ROOT_DIR / "backtest"):
+    if str(_path) in sys.path:
+        sys.path.remove(str(_path))
+    sys.path.insert(0, str(_path))
+if str(ROOT_DIR / "live_trading") not in sys.path:
+    sys.path.append(str(ROOT_DIR / "live_trading"))
+
+
+def _cache_paths(rows: int):
+    stem = f"{TEST_DATA_PATH.stem}_tail{rows}"
+    return TEST_CACHE_DIR / f"{stem}.pkl", TEST_CACHE_DIR / stem
+
+
+def _is_fresh(path: Path) -> bool:
+    return path.exists() and path.stat().st_mtime_ns >= TEST_DATA_PATH.stat().st_mtime_ns
+
+
+def _read_parquet_tail(rows: int) -> pd.DataFrame:
+    # 只在缓存失效时才会读取parquet，pyarrow.parquet推迟到这里导入
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    # 策略只用到OHLCV，只读取这几列；先在Arrow表上截取尾部，只把这部分转换为DataFrame
+    schema = pq.read_schema(TEST_DATA_PATH)
+    index_cols = [c for c in (schema.pandas_metadata or {}).get('index_columns', [])
+                  if isinstance(c, str)]
+    table = pq.read_table(TEST_DATA_PATH, columns=OHLCV_COLUMNS + index_cols)
+    df = table.slice(max(table.num_rows - rows, 0)).to_pandas()
+    
+    # schema中索引已是timestamp类型时to_pandas直接得到DatetimeIndex；其他旧格式才需要转换
+    if not index_cols or not all(pa.types.is_timestamp(schema.field(c).type) for c in index_cols):
+        df.index = pd.to_datetime(df.index)
+    
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
+    return df
+
+
+def _write_cache(df: pd.DataFrame, rows: int) -> None:
+    pkl_path, npy_dir = _cache_paths(rows)
+    try:
+        npy_dir.mkdir(parents=True, exist_ok=True)
+        for col in OHLCV_COLUMNS:
+            np.save(npy_dir / f"{col}.npy", np.ascontiguousarray(df[col].to_numpy()))
+        # pickle最后写入，作为整份缓存完成的标志
+        tmp_path = pkl_path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(df, f, protocol=5)
+        tmp_path.replace(pkl_path)
+    except OSError as e:
+        print(f"测试数据缓存写入失败: {e}")
+
+
+def load_test_data(rows: int = 1000):
+    """加载最近rows根5分钟K线作为测试数据，数据不存在时返回None"""
+    if not TEST_DATA_PATH.exists():
+        print(f"测试数据不存在: {TEST_DATA_PATH}")
+        return None
+    
+    # 缓存比parquet新时直接反序列化，省去parquet解码和索引转换
+    pkl_path, _ = _cache_paths(rows)
+    if _is_fresh(pkl_path):
+        with open(pkl_path, 'rb') as f:
+            df = pickle.load(f)
+    else:
+        df = _read_parquet_tail(rows)
+        _write_cache(df, rows)
+    
+    print(f"测试数据加载完成: {len(df)} 条记录")
+    print(f"数据时间范围: {df.index[0]} 至 {df.index[-1]}")
+    
+    return df
+
+
+def load_test_arrays(rows: int = 1000):
+    """
+    以只读内存映射方式加载测试数据各列 (列名 -> ndarray)，数据不存在时返回None
+
+    供只需要numpy数组的计算核心使用，不经过DataFrame
+    """
+    if load_test_data(rows) is None:
+        return None
+    _, npy_dir = _cache_paths(rows)
+    return {col: np.load(npy_dir / f"{col}.npy", mmap_mode='r') for col in OHLCV_COLUMNS}
+
+
+@pytest.fixture(scope="session")
+def test_data():
+    """整个测试会话共享的一段行情数据 (只读取一次)"""
+    data = load_test_data()
+    assert data is not None, "测试数据加载失败"
+    return data
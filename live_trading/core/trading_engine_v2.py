@@ -17,6 +17,7 @@ import logging
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
 from pathlib import Path
+from dataclasses import asdict, is_dataclass
 import json
 import pandas as pd
 import numpy as np
@@ -1008,7 +1009,10 @@ class MultiStrategyTradingEngine:
             
             if signal:
                 trade_record['signal_strength'] = signal.strength
-                trade_record['signal_metadata'] = signal.metadata
+                metadata = signal.metadata
+                if is_dataclass(metadata):
+                    metadata = asdict(metadata)
+                trade_record['signal_metadata'] = metadata
             
             # 保存到文件
             trades = []
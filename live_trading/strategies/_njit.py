@@ -0,0 +1,22 @@
+# _njit.py - numba可选依赖
+"""
+numba JIT装饰器的兼容封装
+
+安装了numba时直接使用 numba.njit / numba.prange；未安装时退化为原样返回函数的
+空装饰器和内置range，保证策略模块在没有numba的环境中也能正常导入和运行（纯Python执行）。
+"""
+
+__all__ = ['njit', 'prange', 'NUMBA_AVAILABLE']
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """numba不可用时的空装饰器，支持 @njit 和 @njit(cache=True) 两种写法"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
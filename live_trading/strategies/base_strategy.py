@@ -13,9 +13,9 @@ from datetime import datetime
 import pandas as pd
 import logging
 
-@dataclass
+@dataclass(slots=True)
 class Signal:
-    """交易信号数据类"""
+    """交易信号数据类 (slots减少大量信号时的内存占用)"""
     strategy_id: str          # 策略ID
     symbol: str               # 交易对
     signal_type: str          # 信号类型: 'buy', 'sell', 'close'
@@ -25,7 +25,16 @@ class Signal:
     stop_loss: Optional[float] = None    # 止损价格
     take_profit: Optional[float] = None  # 止盈价格
     position_size: Optional[float] = None # 建议仓位大小
-    metadata: Optional[Dict] = None       # 额外信息
+    metadata: Optional[Any] = None        # 额外信息 (dict或slots数据类)
+    
+    @classmethod
+    def from_other(cls, other: Any) -> 'Signal':
+        """从字段相同的信号对象(如UnifiedSignal)浅拷贝构造，已是Signal时直接返回"""
+        if type(other) is cls:
+            return other
+        return cls(other.strategy_id, other.symbol, other.signal_type, other.strength,
+                   other.timestamp, other.entry_price, other.stop_loss, other.take_profit,
+                   getattr(other, 'position_size', None), other.metadata or {})
 
 class BaseStrategy(ABC):
     """
@@ -104,6 +113,14 @@ class BaseStrategy(ABC):
         """
         pass
     
+    def _get_bar_time(self, market_data: pd.DataFrame, bar_time: Optional[datetime] = None) -> datetime:
+        """获取最新K线的时间戳 (索引 > timestamp列 > bar_time参数 > 当前时间)"""
+        if isinstance(market_data.index, pd.DatetimeIndex):
+            return market_data.index[-1].to_pydatetime()
+        if 'timestamp' in market_data.columns:
+            return pd.Timestamp(market_data['timestamp'].iloc[-1]).to_pydatetime()
+        return bar_time or datetime.now()
+    
     def get_supported_symbols(self) -> List[str]:
         """获取策略支持的交易对列表"""
         return self.config.get('supported_symbols', ['BTC-USDT-SWAP'])
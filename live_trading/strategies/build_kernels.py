@@ -0,0 +1,57 @@
+# build_kernels.py - 策略内核AOT编译脚本
+"""
+用 numba.pycc 将策略内核提前编译为扩展模块
+
+- ma_kernels: 均线交叉信号内核
+- vb_kernels: 波动率突破的布林带/ATR融合内核
+- rsi_v2_kernels: RSI背离v2的峰谷识别内核
+
+编译后策略模块优先导入扩展模块，实盘启动后第一根K线不再有JIT编译延迟；
+未编译时自动回退到 @njit 内核（或纯Python/pandas实现）。
+
+用法 (在 live_trading 目录下，需要安装numba和C编译器):
+    python -m strategies.build_kernels
+"""
+
+import os
+from pathlib import Path
+
+# 编译时不需要导入阶段的JIT预热
+os.environ.setdefault('WARMUP_NUMBA', '0')
+
+from numba.pycc import CC
+
+from strategies.ma_crossover import _ma_cross_kernel
+from strategies.volatility_breakout import _bb_atr_kernel
+from strategies.experimental.rsi_divergence_v2 import _peaks_troughs_kernel
+
+OUTPUT_DIR = str(Path(__file__).parent)
+
+# (方向, 强度, 止损, 止盈)(价格, 前快线, 前慢线, 快线, 慢线, 趋势线, RSI,
+#  当前成交量, 20根均量, 10根均量, (止损比例, 止盈倍数, 最小趋势强度))
+MA_CROSS_SIGNATURE = 'Tuple((i8, f8, f8, f8))(f8, f8, f8, f8, f8, f8, f8, f8, f8, f8, UniTuple(f8, 3))'
+
+# (bb_middle, bb_std, bb_upper, bb_lower, bb_width, atr)
+# (close, high, low, bb_period, bb_std, atr_period, atr_wilder)
+BB_ATR_SIGNATURE = 'UniTuple(f8[:], 6)(f8[:], f8[:], f8[:], i8, f8, i8, b1)'
+
+# (峰值下标, 谷值下标)(序列, 窗口)
+PEAKS_TROUGHS_SIGNATURE = 'UniTuple(i8[:], 2)(f8[:], i8)'
+
+ma_cc = CC('ma_kernels')
+ma_cc.output_dir = OUTPUT_DIR
+ma_cc.export('ma_cross_check', MA_CROSS_SIGNATURE)(_ma_cross_kernel.py_func)
+
+vb_cc = CC('vb_kernels')
+vb_cc.output_dir = OUTPUT_DIR
+vb_cc.export('bb_atr', BB_ATR_SIGNATURE)(_bb_atr_kernel.py_func)
+
+rsi_cc = CC('rsi_v2_kernels')
+rsi_cc.output_dir = OUTPUT_DIR
+rsi_cc.export('peaks_troughs', PEAKS_TROUGHS_SIGNATURE)(_peaks_troughs_kernel.py_func)
+
+
+if __name__ == '__main__':
+    for cc in (ma_cc, vb_cc, rsi_cc):
+        cc.compile()
+        print(f"已生成 {cc.name} 扩展模块: {cc.output_dir}")
@@ -10,6 +10,8 @@ RSI背离策略 v2.0
 4. 风险控制集成
 """
 
+from bisect import bisect_left, bisect_right
+
 import pandas as pd
 import numpy as np
 import talib
@@ -18,10 +20,78 @@ from datetime import datetime
 import logging
 
 from strategies.base_strategy import BaseStrategy, Signal
+from strategies._njit import njit, NUMBA_AVAILABLE
+
+
+@njit(cache=True)
+def _peaks_troughs_kernel(series: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    峰谷内核: 不低于(不高于)所有邻居且至少严格高于(低于)一个的点
+
+    与NaN比较均为False，NaN不会被识别为极值；两个条件都不可能满足时提前结束内层循环
+    """
+    n = len(series)
+    size = max(n - 2 * window, 0)
+    peaks = np.empty(size, np.int64)
+    troughs = np.empty(size, np.int64)
+    n_peaks = 0
+    n_troughs = 0
+    for i in range(window, n - window):
+        center = series[i]
+        not_below = True
+        above = False
+        not_above = True
+        below = False
+        for j in range(i - window, i + window + 1):
+            if j == i:
+                continue
+            value = series[j]
+            if not center >= value:
+                not_below = False
+            if center > value:
+                above = True
+            if not center <= value:
+                not_above = False
+            if center < value:
+                below = True
+            if not not_below and not not_above:
+                break
+        if not_below and above:
+            peaks[n_peaks] = i
+            n_peaks += 1
+        if not_above and below:
+            troughs[n_troughs] = i
+            n_troughs += 1
+    return peaks[:n_peaks], troughs[:n_troughs]
+
+
+def _peaks_troughs_numpy(series: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """未安装numba时的滑动窗口向量化实现，返回值同_peaks_troughs_kernel"""
+    # 每行为以i为中心的窗口，去掉中心列后与中心值逐一比较
+    windows = np.lib.stride_tricks.sliding_window_view(series, 2 * window + 1)
+    center = windows[:, window:window + 1]
+    neighbors = np.delete(windows, window, axis=1)
+    
+    # 峰值: 不低于所有邻居且至少严格高于一个
+    is_peak = (center >= neighbors).all(axis=1) & (center > neighbors).any(axis=1)
+    # 谷值: 不高于所有邻居且至少严格低于一个
+    is_trough = (center <= neighbors).all(axis=1) & (center < neighbors).any(axis=1)
+    
+    return np.flatnonzero(is_peak) + window, np.flatnonzero(is_trough) + window
+
+
+# 优先使用AOT编译的内核 (strategies/build_kernels.py生成)，没有numba时使用向量化实现
+try:
+    from strategies.rsi_v2_kernels import peaks_troughs as _peaks_troughs
+except ImportError:
+    _peaks_troughs = _peaks_troughs_kernel if NUMBA_AVAILABLE else _peaks_troughs_numpy
+
 
 class RSIDivergenceV2(BaseStrategy):
     """RSI背离策略 v2.0"""
     
+    REQUIRED_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+    
     def __init__(self, strategy_id: str, config: Dict[str, Any]):
         """
         初始化RSI背离策略
@@ -56,6 +126,9 @@ class RSIDivergenceV2(BaseStrategy):
         self.rsi_cache = {}
         self.signal_cache = {}
         
+        # 已验证的列索引 (按交易对缓存，列对象不变时跳过重复校验)
+        self._verified_columns: Dict[str, pd.Index] = {}
+        
         # 最少数据点要求
         self.min_data_points = max(50, self.lookback_period + 30)
         
@@ -81,8 +154,7 @@ class RSIDivergenceV2(BaseStrategy):
                 return []
             
             # 确保数据完整性
-            required_columns = ['open', 'high', 'low', 'close', 'volume']
-            if not all(col in market_data.columns for col in required_columns):
+            if not self._verify_columns(symbol, market_data.columns):
                 self.logger.error(f"数据缺少必要列: {market_data.columns.tolist()}")
                 return []
             
@@ -99,9 +171,12 @@ class RSIDivergenceV2(BaseStrategy):
             self.price_cache[symbol] = close_prices
             self.rsi_cache[symbol] = rsi
             
+            # 信号时间取自当前K线，保证回测与实盘可复现
+            bar_time = self._get_bar_time(market_data, kwargs.get('bar_time'))
+            
             # 识别背离信号
             signals = self._identify_divergence_signals(
-                symbol, close_prices, high_prices, low_prices, rsi, volumes
+                symbol, close_prices, high_prices, low_prices, rsi, volumes, bar_time
             )
             
             return signals
@@ -110,13 +185,23 @@ class RSIDivergenceV2(BaseStrategy):
             self.logger.error(f"市场分析失败 ({symbol}): {e}")
             return []
     
+    def _verify_columns(self, symbol: str, columns: pd.Index) -> bool:
+        """校验必要列，同一列对象只校验一次"""
+        if self._verified_columns.get(symbol) is columns:
+            return True
+        if not all(col in columns for col in self.REQUIRED_COLUMNS):
+            return False
+        self._verified_columns[symbol] = columns
+        return True
+    
     def _identify_divergence_signals(self, 
                                    symbol: str,
                                    close_prices: np.ndarray,
                                    high_prices: np.ndarray, 
                                    low_prices: np.ndarray,
                                    rsi: np.ndarray,
-                                   volumes: np.ndarray) -> List[Signal]:
+                                   volumes: np.ndarray,
+                                   bar_time: datetime) -> List[Signal]:
         """识别背离信号"""
         signals = []
         
@@ -127,15 +212,14 @@ class RSIDivergenceV2(BaseStrategy):
         price_peaks, price_troughs = self._find_peaks_and_troughs(close_prices, self.peak_window)
         rsi_peaks, rsi_troughs = self._find_peaks_and_troughs(rsi, self.peak_window)
         
-        current_time = datetime.now()
+        current_time = bar_time
         current_price = close_prices[-1]
         current_rsi = rsi[-1]
+        n = len(close_prices)
         
         # 检查底背离 (看涨信号)
         bull_signal = self._check_bullish_divergence(
-            close_prices, low_prices, rsi, 
-            price_troughs, rsi_troughs,
-            current_price, current_rsi
+            low_prices, rsi, price_troughs, rsi_troughs, n, current_rsi
         )
         
         if bull_signal:
@@ -166,9 +250,7 @@ class RSIDivergenceV2(BaseStrategy):
         
         # 检查顶背离 (看跌信号)
         bear_signal = self._check_bearish_divergence(
-            close_prices, high_prices, rsi,
-            price_peaks, rsi_peaks,
-            current_price, current_rsi
+            high_prices, rsi, price_peaks, rsi_peaks, n, current_rsi
         )
         
         if bear_signal:
@@ -200,37 +282,27 @@ class RSIDivergenceV2(BaseStrategy):
         return signals
     
     def _find_peaks_and_troughs(self, series: np.ndarray, window: int) -> Tuple[List[int], List[int]]:
-        """寻找序列中的峰值和谷值"""
-        peaks = []
-        troughs = []
-        
-        for i in range(window, len(series) - window):
-            # 检查是否为峰值
-            is_peak = all(series[i] >= series[i + j] for j in range(-window, window + 1) if j != 0)
-            if is_peak and any(series[i] > series[i + j] for j in range(-window, window + 1) if j != 0):
-                peaks.append(i)
-            
-            # 检查是否为谷值
-            is_trough = all(series[i] <= series[i + j] for j in range(-window, window + 1) if j != 0)
-            if is_trough and any(series[i] < series[i + j] for j in range(-window, window + 1) if j != 0):
-                troughs.append(i)
+        """寻找序列中的峰值和谷值 (NaN不会被识别为极值)"""
+        series = np.ascontiguousarray(series, dtype=np.float64)
+        if len(series) < 2 * window + 1:
+            return [], []
         
-        return peaks, troughs
+        peaks, troughs = _peaks_troughs(series, window)
+        return peaks.tolist(), troughs.tolist()
     
     def _check_bullish_divergence(self, 
-                                close_prices: np.ndarray,
                                 low_prices: np.ndarray,
                                 rsi: np.ndarray,
                                 price_troughs: List[int],
                                 rsi_troughs: List[int],
-                                current_price: float,
+                                n: int,
                                 current_rsi: float) -> bool:
         """检查底背离（看涨信号）"""
         if len(price_troughs) < 2 or current_rsi > self.rsi_oversold:
             return False
         
         # 寻找最近的两个价格谷值
-        recent_troughs = [idx for idx in price_troughs if len(close_prices) - idx <= self.lookback_period]
+        recent_troughs = price_troughs[bisect_left(price_troughs, n - self.lookback_period):]
         
         if len(recent_troughs) < 2:
             return False
@@ -261,19 +333,18 @@ class RSIDivergenceV2(BaseStrategy):
         return price_makes_lower_low and rsi_makes_higher_low
     
     def _check_bearish_divergence(self,
-                                close_prices: np.ndarray,
                                 high_prices: np.ndarray, 
                                 rsi: np.ndarray,
                                 price_peaks: List[int],
                                 rsi_peaks: List[int],
-                                current_price: float,
+                                n: int,
                                 current_rsi: float) -> bool:
         """检查顶背离（看跌信号）"""
         if len(price_peaks) < 2 or current_rsi < self.rsi_overbought:
             return False
         
         # 寻找最近的两个价格峰值
-        recent_peaks = [idx for idx in price_peaks if len(close_prices) - idx <= self.lookback_period]
+        recent_peaks = price_peaks[bisect_left(price_peaks, n - self.lookback_period):]
         
         if len(recent_peaks) < 2:
             return False
@@ -304,17 +375,17 @@ class RSIDivergenceV2(BaseStrategy):
         return price_makes_higher_high and rsi_makes_lower_high
     
     def _find_nearest_rsi_extreme(self, rsi_extremes: List[int], price_extreme_idx: int, rsi: np.ndarray) -> Optional[float]:
-        """寻找最接近价格极值的RSI极值"""
-        min_distance = float('inf')
-        nearest_rsi_value = None
-        
-        for rsi_idx in rsi_extremes:
-            distance = abs(rsi_idx - price_extreme_idx)
-            if distance < min_distance and distance <= 3:  # 最多3个周期的误差
-                min_distance = distance
-                nearest_rsi_value = rsi[rsi_idx]
-        
-        return nearest_rsi_value
+        """寻找最接近价格极值的RSI极值 (最多3个周期的误差)"""
+        # 极值下标升序: 只有前驱(不大于目标的最后一个)和后继可能最近，距离相同时取前驱
+        pos = bisect_right(rsi_extremes, price_extreme_idx)
+        nearest = None
+        if pos > 0 and price_extreme_idx - rsi_extremes[pos - 1] <= 3:
+            nearest = rsi_extremes[pos - 1]
+        if pos < len(rsi_extremes) and rsi_extremes[pos] - price_extreme_idx <= 3:
+            if nearest is None or rsi_extremes[pos] - price_extreme_idx < price_extreme_idx - nearest:
+                nearest = rsi_extremes[pos]
+        
+        return None if nearest is None else rsi[nearest]
     
     def _calculate_signal_strength(self, signal_type: str, current_rsi: float, volumes: np.ndarray) -> float:
         """计算信号强度 (0.0-1.0)"""
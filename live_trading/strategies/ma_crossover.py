@@ -12,10 +12,189 @@
 import pandas as pd
 import numpy as np
 import talib
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import logging
 
 from strategies.base_strategy import BaseStrategy, Signal
+from strategies._njit import njit
+
+# 信号方向编码 (JIT内核中不使用字符串)
+SIDE_NONE = 0
+SIDE_BUY = 1
+SIDE_SELL = -1
+
+
+@dataclass(slots=True)
+class MACrossMeta:
+    """均线交叉信号附加信息 (持久化时用dataclasses.asdict转换)"""
+    signal_reason: str        # 'golden_cross' 或 'death_cross'
+    fast_ma: float            # 快线值
+    slow_ma: float            # 慢线值
+    rsi: float                # RSI值
+    trend_direction: str      # 'up' 或 'down'
+
+
+@dataclass(slots=True, frozen=True)
+class MAParams:
+    """信号内核参数 (初始化时确定，运行中不变)"""
+    stop_loss_pct: float
+    take_profit_ratio: float
+    min_trend_strength: float
+    
+    def kernel_args(self) -> tuple:
+        """按_ma_cross_kernel的params顺序打包，统一为float保证内核签名稳定"""
+        return (float(self.stop_loss_pct), float(self.take_profit_ratio),
+                float(self.min_trend_strength))
+
+
+@njit(cache=True)
+def _validate_buy_signal(price: float, trend_ma: float, rsi: float, current_volume: float,
+                         avg_volume_20: float, min_trend_strength: float) -> bool:
+    """验证买入信号"""
+    # 趋势过滤：价格应该在长期趋势线之上或接近
+    trend_ok = price >= trend_ma * (1 - min_trend_strength)
+    
+    # RSI过滤：避免超买区域买入
+    rsi_ok = rsi <= 75  # 不在极度超买区
+    
+    # 成交量确认 (不足20根K线时均值为NaN，不做过滤)
+    volume_ok = np.isnan(avg_volume_20) or current_volume >= avg_volume_20 * 0.8  # 成交量不能太低
+    
+    return trend_ok and rsi_ok and volume_ok
+
+
+@njit(cache=True)
+def _validate_sell_signal(price: float, trend_ma: float, rsi: float, current_volume: float,
+                          avg_volume_20: float, min_trend_strength: float) -> bool:
+    """验证卖出信号"""
+    # 趋势过滤：价格应该在长期趋势线之下或接近
+    trend_ok = price <= trend_ma * (1 + min_trend_strength)
+    
+    # RSI过滤：避免超卖区域卖出
+    rsi_ok = rsi >= 25  # 不在极度超卖区
+    
+    # 成交量确认 (不足20根K线时均值为NaN，不做过滤)
+    volume_ok = np.isnan(avg_volume_20) or current_volume >= avg_volume_20 * 0.8  # 成交量不能太低
+    
+    return trend_ok and rsi_ok and volume_ok
+
+
+@njit(cache=True)
+def _calculate_signal_strength(side: int, price: float, fast_ma: float, slow_ma: float,
+                               rsi: float, current_volume: float, avg_volume_10: float) -> float:
+    """
+    计算信号强度
+    
+    每条规则写成 分值 * 布尔条件 的形式，区间互斥，结果与逐条if判断相同，
+    但没有分支。
+    """
+    # 均线距离评分: >0.5% 加0.1，>1% 再加0.1
+    ma_distance = abs(fast_ma - slow_ma) / price
+    ma_score = 0.1 * ((ma_distance > 0.005) + (ma_distance > 0.01))
+    
+    # RSI位置评分: 买入理想区间30-50，卖出理想区间50-70
+    buy_score = 0.2 * ((rsi >= 30) & (rsi <= 50)) + 0.1 * ((rsi > 50) & (rsi <= 60))
+    sell_score = 0.2 * ((rsi >= 50) & (rsi <= 70)) + 0.1 * ((rsi >= 40) & (rsi < 50))
+    is_buy = side == SIDE_BUY
+    rsi_score = is_buy * buy_score + (1 - is_buy) * sell_score
+    
+    # 成交量评分 (均值为NaN时比较结果均为False，不评分)；
+    # numba默认错误模型下浮点除零会抛ZeroDivisionError，均量为0时按numpy语义取inf/NaN
+    if avg_volume_10 == 0.0:
+        volume_ratio = np.inf if current_volume > 0 else np.nan
+    else:
+        volume_ratio = current_volume / avg_volume_10
+    volume_score = (0.15 * (volume_ratio > 1.5)
+                    + 0.1 * ((volume_ratio > 1.2) & (volume_ratio <= 1.5))
+                    - 0.1 * (volume_ratio < 0.7))
+    
+    strength = 0.5 + ma_score + rsi_score + volume_score
+    # 条件表达式限幅，未启用JIT时也不产生builtin调用
+    return 0.1 if strength < 0.1 else (1.0 if strength > 1.0 else strength)
+
+
+@njit(cache=True)
+def _ma_cross_kernel(price: float, prev_fast_ma: float, prev_slow_ma: float,
+                     fast_ma: float, slow_ma: float, trend_ma: float, rsi: float,
+                     current_volume: float, avg_volume_20: float, avg_volume_10: float,
+                     params: tuple):
+    """
+    均线交叉检测内核
+    
+    Args:
+        params: (stop_loss_pct, take_profit_ratio, min_trend_strength)
+        
+    Returns:
+        (方向, 强度, 止损, 止盈)，无信号时方向为SIDE_NONE
+    """
+    stop_loss_pct = params[0]
+    take_profit_ratio = params[1]
+    min_trend_strength = params[2]
+    
+    side = SIDE_NONE
+    if prev_fast_ma <= prev_slow_ma and fast_ma > slow_ma:
+        # 金叉（看涨信号）
+        if _validate_buy_signal(price, trend_ma, rsi, current_volume, avg_volume_20,
+                                min_trend_strength):
+            side = SIDE_BUY
+    elif prev_fast_ma >= prev_slow_ma and fast_ma < slow_ma:
+        # 死叉（看跌信号）
+        if _validate_sell_signal(price, trend_ma, rsi, current_volume, avg_volume_20,
+                                 min_trend_strength):
+            side = SIDE_SELL
+    
+    if side == SIDE_NONE:
+        return SIDE_NONE, 0.0, 0.0, 0.0
+    
+    if side == SIDE_BUY:
+        stop_loss = price * (1 - stop_loss_pct)
+    else:
+        stop_loss = price * (1 + stop_loss_pct)
+    take_profit = price + (price - stop_loss) * take_profit_ratio
+    
+    strength = _calculate_signal_strength(side, price, fast_ma, slow_ma, rsi,
+                                          current_volume, avg_volume_10)
+    return side, strength, stop_loss, take_profit
+
+
+@njit(cache=True)
+def _wilder_averages(close_prices: np.ndarray, period: int):
+    """
+    Wilder平滑的平均涨跌幅 (与talib.RSI内部递推一致)
+    
+    Returns:
+        (avg_gain, avg_loss)，对应序列最后一根K线
+    """
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(1, period + 1):
+        delta = close_prices[i] - close_prices[i - 1]
+        if delta > 0:
+            avg_gain += delta
+        else:
+            avg_loss -= delta
+    avg_gain /= period
+    avg_loss /= period
+    
+    for i in range(period + 1, len(close_prices)):
+        delta = close_prices[i] - close_prices[i - 1]
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        avg_gain = (avg_gain * (period - 1) + gain) / period
+        avg_loss = (avg_loss * (period - 1) + loss) / period
+    
+    return avg_gain, avg_loss
+
+
+# 优先使用AOT编译的内核 (strategies/build_kernels.py生成)，避免首次调用的JIT延迟
+try:
+    from strategies.ma_kernels import ma_cross_check as _ma_cross_check
+except ImportError:
+    _ma_cross_check = _ma_cross_kernel
+
 
 class MovingAverageCrossover(BaseStrategy):
     """移动平均线交叉策略"""
@@ -50,9 +229,34 @@ class MovingAverageCrossover(BaseStrategy):
         self.trend_filter_period = config.get('trend_filter_period', 50)  # 趋势过滤周期
         self.min_trend_strength = config.get('min_trend_strength', 0.005) # 最小趋势强度
         
+        # 内核参数只打包一次，避免每根K线重新组装
+        self.params = MAParams(self.stop_loss_pct, self.take_profit_ratio, self.min_trend_strength)
+        self._kernel_params = self.params.kernel_args()
+        
         # 最少数据要求
         self.min_data_points = max(100, self.trend_filter_period + 20)
         
+        # 指标函数在初始化时绑定，避免每次计算时按ma_type分派
+        self._ma_fn = {'SMA': talib.SMA, 'EMA': talib.EMA, 'WMA': talib.WMA}.get(self.ma_type, talib.EMA)
+        self._rsi_fn = talib.RSI
+        self._is_ema = self._ma_fn is talib.EMA
+        # (名称, 周期, EMA平滑系数)
+        self._ma_specs = tuple(
+            (name, period, 2.0 / (period + 1))
+            for name, period in (('fast', self.fast_period),
+                                 ('slow', self.slow_period),
+                                 ('trend', self.trend_filter_period))
+        )
+        
+        # 增量指标状态 (按(交易对, 时间周期)缓存倒数第二根K线的EMA与Wilder平均涨跌幅)
+        self._indicator_state: Dict[Tuple[str, Optional[str]], Dict[str, Any]] = {}
+        # 成交量滚动和 (按(交易对, 时间周期)缓存截至倒数第二根K线的19根/9根成交量之和)
+        self._volume_state: Dict[Tuple[str, Optional[str]], Dict[str, Any]] = {}
+        
+        # 多交易对批量分析的线程数 (1表示顺序执行，线程池首次使用时创建)
+        self.batch_workers = config.get('batch_workers', 1)
+        self._batch_executor: Optional[ThreadPoolExecutor] = None
+        
         self.logger.info(f"移动平均线策略 {strategy_id} 初始化完成 - 快线:{self.fast_period}, 慢线:{self.slow_period}")
     
     def analyze_market(self, market_data: pd.DataFrame, **kwargs) -> List[Signal]:
@@ -66,217 +270,354 @@ class MovingAverageCrossover(BaseStrategy):
         Returns:
             List[Signal]: 生成的信号列表
         """
-        symbol = kwargs.get('symbol', 'Unknown')
+        symbol = kwargs.get('symbol')
         
         try:
-            # 数据验证
-            if len(market_data) < self.min_data_points:
-                self.logger.debug(f"数据点不足: {len(market_data)} < {self.min_data_points}")
-                return []
-            
-            # 提取价格数据
-            close_prices = market_data['close'].values
-            volumes = market_data['volume'].values
-            
-            # 计算移动平均线
-            fast_ma = self._calculate_ma(close_prices, self.fast_period)
-            slow_ma = self._calculate_ma(close_prices, self.slow_period)
-            trend_ma = self._calculate_ma(close_prices, self.trend_filter_period)
-            
-            # 计算辅助指标
-            rsi = talib.RSI(close_prices, timeperiod=self.rsi_period)
-            
-            # 检查交叉信号
-            signals = self._check_crossover_signals(
-                symbol, close_prices, fast_ma, slow_ma, trend_ma, rsi, volumes
-            )
-            
-            return signals
+            # 提取价格数据 (float64连续数组，已是float64时不复制)
+            close_prices = self._column_array(market_data, 'close')
+            volumes = self._column_array(market_data, 'volume')
+            bar_times = self._get_bar_times(market_data)
+        except Exception as e:
+            self.logger.error(f"移动平均线策略分析失败 ({symbol or 'Unknown'}): {e}")
+            return []
+        
+        # 信号时间取自当前K线
+        bar_time = self._get_bar_time(market_data, kwargs.get('bar_time'))
+        
+        return self.analyze_market_arrays(close_prices, volumes, symbol, bar_times, bar_time,
+                                          kwargs.get('timeframe'))
+    
+    def analyze_market_arrays(self, close_prices: np.ndarray, volumes: np.ndarray,
+                              symbol: Optional[str] = None,
+                              bar_times: Optional[np.ndarray] = None,
+                              timestamp: Optional[datetime] = None,
+                              timeframe: Optional[str] = None) -> List[Signal]:
+        """
+        直接基于numpy数组生成交易信号 (行情已是数组时无需构造DataFrame)
+        
+        Args:
+            close_prices: 收盘价 (float64)
+            volumes: 成交量 (float64)
+            symbol: 交易对名称 (为None时不缓存增量状态，信号中记为'Unknown')
+            bar_times: K线时间序列，用于增量更新指标 (为None时每次完整计算)
+            timestamp: 信号时间，默认取bar_times最后一个值
+            timeframe: 时间周期，与symbol一起作为增量状态的键
             
+        Returns:
+            List[Signal]: 生成的信号列表
+        """
+        # 数据验证
+        data_len = len(close_prices)
+        if data_len < self.min_data_points:
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"数据点不足: {data_len} < {self.min_data_points}")
+            return []
+        
+        # 增量状态按(交易对, 时间周期)区分；未指定交易对时不同品种的K线时间相同，不能共用状态
+        state_key = (symbol, timeframe) if symbol is not None else None
+        if symbol is None:
+            symbol = 'Unknown'
+        
+        # 只有指标计算可能因数据问题失败
+        try:
+            # 增量更新均线和RSI (只需最新两根K线的值)
+            indicators = self._update_indicators(state_key, close_prices, bar_times)
+            volume_averages = self._update_volume_averages(state_key, volumes, bar_times)
         except Exception as e:
             self.logger.error(f"移动平均线策略分析失败 ({symbol}): {e}")
             return []
+        
+        if timestamp is None:
+            timestamp = (pd.Timestamp(bar_times[-1]).to_pydatetime()
+                         if bar_times is not None else datetime.now())
+        
+        # 检查交叉信号
+        return self._check_crossover_signals(
+            symbol, close_prices, indicators, volumes[-1], volume_averages, timestamp
+        )
+    
+    def analyze_market_batch(self, data_by_symbol: Dict[str, pd.DataFrame]) -> Dict[str, List[Signal]]:
+        """
+        批量分析多个交易对
+        
+        各交易对的指标状态相互独立，batch_workers > 1时用线程池并行分析，
+        否则顺序执行。
+        
+        Args:
+            data_by_symbol: {交易对: OHLCV数据}
+            
+        Returns:
+            Dict[str, List[Signal]]: {交易对: 信号列表}
+        """
+        if self.batch_workers <= 1 or len(data_by_symbol) <= 1:
+            return {symbol: self.analyze_market(data, symbol=symbol)
+                    for symbol, data in data_by_symbol.items()}
+        
+        if self._batch_executor is None:
+            self._batch_executor = ThreadPoolExecutor(max_workers=self.batch_workers)
+        
+        futures = {
+            symbol: self._batch_executor.submit(self.analyze_market, data, symbol=symbol)
+            for symbol, data in data_by_symbol.items()
+        }
+        return {symbol: future.result() for symbol, future in futures.items()}
+    
+    def analyze_market_vectorized(self, market_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        一次性计算整段K线上的交叉信号 (回测用)
+        
+        结果与逐根K线调用analyze_market一致，但指标、交叉检测、过滤和强度
+        评分都在整列数组上完成，没有逐K线的Python循环。
+        
+        Args:
+            market_data: OHLCV数据
+            
+        Returns:
+            pd.DataFrame: 每行一个信号，索引为信号所在K线
+        """
+        columns = ['signal_type', 'entry_price', 'stop_loss', 'take_profit', 'strength',
+                   'fast_ma', 'slow_ma', 'rsi', 'trend_direction']
+        n = len(market_data)
+        if n < self.min_data_points:
+            return pd.DataFrame(columns=columns)
+        
+        close = self._column_array(market_data, 'close')
+        volumes = self._column_array(market_data, 'volume')
+        
+        fast_ma = self._calculate_ma(close, self.fast_period)
+        slow_ma = self._calculate_ma(close, self.slow_period)
+        trend_ma = self._calculate_ma(close, self.trend_filter_period)
+        rsi = self._rsi_fn(close, timeperiod=self.rsi_period)
+        avg_volume_20 = talib.SMA(volumes, timeperiod=20)
+        avg_volume_10 = talib.SMA(volumes, timeperiod=10)
+        
+        # 前一根K线的均线值
+        prev_fast_ma = np.concatenate(([np.nan], fast_ma[:-1]))
+        prev_slow_ma = np.concatenate(([np.nan], slow_ma[:-1]))
+        
+        golden_cross = (prev_fast_ma <= prev_slow_ma) & (fast_ma > slow_ma)
+        death_cross = (prev_fast_ma >= prev_slow_ma) & (fast_ma < slow_ma) & ~golden_cross
+        
+        # 过滤条件 (成交量均值不足20根时视为通过)
+        volume_ok = np.isnan(avg_volume_20) | (volumes >= avg_volume_20 * 0.8)
+        is_buy = (golden_cross & (close >= trend_ma * (1 - self.min_trend_strength))
+                  & (rsi <= 75) & volume_ok)
+        is_sell = (death_cross & (close <= trend_ma * (1 + self.min_trend_strength))
+                   & (rsi >= 25) & volume_ok)
+        
+        # 数据量不足min_data_points时analyze_market不会出信号
+        valid = (is_buy | is_sell) & (np.arange(n) >= self.min_data_points - 1)
+        
+        # 信号强度: 与_calculate_signal_strength相同的加分顺序
+        ma_distance = np.abs(fast_ma - slow_ma) / close
+        strength = 0.5 + np.select([ma_distance > 0.01, ma_distance > 0.005], [0.2, 0.1], 0.0)
+        rsi_buy_score = np.select([(rsi >= 30) & (rsi <= 50), (rsi > 50) & (rsi <= 60)], [0.2, 0.1], 0.0)
+        rsi_sell_score = np.select([(rsi >= 50) & (rsi <= 70), (rsi >= 40) & (rsi < 50)], [0.2, 0.1], 0.0)
+        strength = strength + np.where(is_buy, rsi_buy_score, rsi_sell_score)
+        volume_ratio = volumes / avg_volume_10
+        strength = strength + np.select([volume_ratio > 1.5, volume_ratio > 1.2, volume_ratio < 0.7],
+                                        [0.15, 0.1, -0.1], 0.0)
+        strength = np.clip(strength, 0.1, 1.0)
+        
+        # 止损止盈
+        stop_loss = np.where(is_buy, close * (1 - self.stop_loss_pct), close * (1 + self.stop_loss_pct))
+        take_profit = close + (close - stop_loss) * self.take_profit_ratio
+        
+        idx = np.flatnonzero(valid)
+        return pd.DataFrame({
+            'signal_type': np.where(is_buy[idx], 'buy', 'sell'),
+            'entry_price': close[idx],
+            'stop_loss': stop_loss[idx],
+            'take_profit': take_profit[idx],
+            'strength': strength[idx],
+            'fast_ma': fast_ma[idx],
+            'slow_ma': slow_ma[idx],
+            'rsi': rsi[idx],
+            'trend_direction': np.where(close[idx] > trend_ma[idx], 'up', 'down')
+        }, index=market_data.index[idx], columns=columns)
+    
+    @staticmethod
+    def _column_array(market_data: pd.DataFrame, column: str) -> np.ndarray:
+        """取出列的float64连续数组，供TA-Lib和JIT内核直接使用"""
+        return np.ascontiguousarray(market_data[column].to_numpy(dtype=np.float64, copy=False))
     
     def _calculate_ma(self, prices: np.ndarray, period: int) -> np.ndarray:
         """计算移动平均线"""
-        if self.ma_type == 'SMA':
-            return talib.SMA(prices, timeperiod=period)
-        elif self.ma_type == 'EMA':
-            return talib.EMA(prices, timeperiod=period)
-        elif self.ma_type == 'WMA':
-            return talib.WMA(prices, timeperiod=period)
+        return self._ma_fn(prices, timeperiod=period)
+    
+    def _get_bar_times(self, market_data: pd.DataFrame) -> Optional[np.ndarray]:
+        """获取K线时间序列，用于判断是否有新K线 (无时间信息时返回None)"""
+        if isinstance(market_data.index, pd.DatetimeIndex):
+            return market_data.index.values
+        if 'timestamp' in market_data.columns:
+            return market_data['timestamp'].values
+        return None
+    
+    def _seed_indicator_state(self, close_prices: np.ndarray) -> Dict[str, Any]:
+        """用完整序列初始化倒数第二根K线的指标状态"""
+        state = {'prev_close': close_prices[-2]}
+        
+        if self._is_ema:
+            for name, period, _ in self._ma_specs:
+                state[name] = self._ma_fn(close_prices[:-1], timeperiod=period)[-1]
+        
+        # Wilder平滑: 前period个涨跌幅取均值，之后递推
+        state['avg_gain'], state['avg_loss'] = _wilder_averages(close_prices[:-1], self.rsi_period)
+        
+        return state
+    
+    def _step_indicator_state(self, state: Dict[str, Any], close: float) -> Dict[str, Any]:
+        """将指标状态向前推进一根K线"""
+        new_state = {'prev_close': close}
+        
+        if self._is_ema:
+            for name, _, alpha in self._ma_specs:
+                new_state[name] = state[name] + alpha * (close - state[name])
+        
+        n = self.rsi_period
+        delta = close - state['prev_close']
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        new_state['avg_gain'] = (state['avg_gain'] * (n - 1) + gain) / n
+        new_state['avg_loss'] = (state['avg_loss'] * (n - 1) + loss) / n
+        
+        return new_state
+    
+    def _update_indicators(self, key: Optional[Tuple[str, Optional[str]]], close_prices: np.ndarray,
+                           bar_times: Optional[np.ndarray]) -> Dict[str, float]:
+        """
+        增量计算最新两根K线的均线和最新RSI
+        
+        状态保存在倒数第二根(已收盘)K线上，最新K线每次由状态推算，
+        因此同一根K线内价格变化不会污染状态。新增一根K线时只推进一步，
+        无法对齐时间序列时用完整序列重新初始化。key或bar_times为None时不缓存状态。
+        """
+        cached = key is not None and bar_times is not None
+        state = self._indicator_state.get(key) if cached else None
+        
+        if state is None:
+            state = self._seed_indicator_state(close_prices)
+        elif state['bar_time'] == bar_times[-2]:
+            pass
+        elif state['bar_time'] == bar_times[-3]:
+            state = self._step_indicator_state(state, close_prices[-2])
         else:
-            return talib.EMA(prices, timeperiod=period)  # 默认EMA
+            state = self._seed_indicator_state(close_prices)
+        
+        if cached:
+            state['bar_time'] = bar_times[-2]
+            self._indicator_state[key] = state
+        
+        current = self._step_indicator_state(state, close_prices[-1])
+        
+        if self._is_ema:
+            ma_values = {name: (state[name], current[name]) for name in ('fast', 'slow', 'trend')}
+        else:
+            # SMA/WMA只依赖最近period根K线，直接对尾部计算
+            ma_values = {}
+            for name, period, _ in self._ma_specs:
+                tail = self._calculate_ma(close_prices[-(period + 1):], period)
+                ma_values[name] = (tail[-2], tail[-1])
+        
+        total = current['avg_gain'] + current['avg_loss']
+        rsi = 100.0 * current['avg_gain'] / total if total > 0 else 0.0
+        
+        return {
+            'prev_fast_ma': ma_values['fast'][0],
+            'prev_slow_ma': ma_values['slow'][0],
+            'fast_ma': ma_values['fast'][1],
+            'slow_ma': ma_values['slow'][1],
+            'trend_ma': ma_values['trend'][1],
+            'rsi': rsi
+        }
+    
+    def _update_volume_averages(self, key: Optional[Tuple[str, Optional[str]]], volumes: np.ndarray,
+                                bar_times: Optional[np.ndarray]) -> tuple:
+        """
+        增量计算包含最新K线的20根/10根成交量均值
+        
+        与指标状态一样只累加已收盘K线: 新增一根K线时加入倒数第二根、
+        移出窗口外的一根，最新K线的成交量在读取时再加上。
+        
+        Returns:
+            (avg_volume_20, avg_volume_10)，数据不足时为NaN
+        """
+        n = len(volumes)
+        if n < 21:
+            volume_tail = volumes[-20:]
+            avg_volume_20 = volume_tail.mean() if n >= 20 else np.nan
+            avg_volume_10 = volume_tail[-10:].mean() if n >= 10 else np.nan
+            return avg_volume_20, avg_volume_10
+        
+        cached = key is not None and bar_times is not None
+        state = self._volume_state.get(key) if cached else None
+        if state is not None and state['bar_time'] == bar_times[-3]:
+            # 新增一根K线: 加入倒数第二根，移出窗口最早的一根
+            closed = volumes[-2]
+            state = {'sum_19': state['sum_19'] + closed - volumes[-21],
+                     'sum_9': state['sum_9'] + closed - volumes[-11]}
+        elif state is None or state['bar_time'] != bar_times[-2]:
+            state = {'sum_19': volumes[-20:-1].sum(), 'sum_9': volumes[-10:-1].sum()}
+        
+        if cached:
+            state['bar_time'] = bar_times[-2]
+            self._volume_state[key] = state
+        
+        current_volume = volumes[-1]
+        return (state['sum_19'] + current_volume) / 20, (state['sum_9'] + current_volume) / 10
     
     def _check_crossover_signals(self, 
                                symbol: str,
                                close_prices: np.ndarray,
-                               fast_ma: np.ndarray,
-                               slow_ma: np.ndarray,
-                               trend_ma: np.ndarray,
-                               rsi: np.ndarray,
-                               volumes: np.ndarray) -> List[Signal]:
+                               indicators: Dict[str, float],
+                               current_volume: float,
+                               volume_averages: tuple,
+                               bar_time: datetime) -> List[Signal]:
         """检查均线交叉信号"""
         signals = []
         
-        if len(fast_ma) < 3 or len(slow_ma) < 3:
+        current_price = close_prices[-1]
+        current_fast_ma = indicators['fast_ma']
+        current_slow_ma = indicators['slow_ma']
+        current_trend_ma = indicators['trend_ma']
+        current_rsi = indicators['rsi']
+        
+        # 20根均值用于过滤，最近10根均值用于强度评分
+        avg_volume_20, avg_volume_10 = volume_averages
+        
+        # 交叉检测、信号验证和强度评分在JIT内核中完成
+        side, strength, stop_loss, take_profit = _ma_cross_check(
+            current_price,
+            indicators['prev_fast_ma'], indicators['prev_slow_ma'],
+            current_fast_ma, current_slow_ma, current_trend_ma, current_rsi,
+            current_volume, avg_volume_20, avg_volume_10,
+            self._kernel_params
+        )
+        
+        if side == SIDE_NONE:
             return signals
         
-        current_time = datetime.now()
-        current_price = close_prices[-1]
-        current_fast_ma = fast_ma[-1]
-        current_slow_ma = slow_ma[-1]
-        current_trend_ma = trend_ma[-1]
-        current_rsi = rsi[-1]
-        
-        # 前一周期的值
-        prev_fast_ma = fast_ma[-2]
-        prev_slow_ma = slow_ma[-2]
-        
-        # 检查金叉（看涨信号）
-        golden_cross = (prev_fast_ma <= prev_slow_ma and current_fast_ma > current_slow_ma)
-        
-        # 检查死叉（看跌信号）
-        death_cross = (prev_fast_ma >= prev_slow_ma and current_fast_ma < current_slow_ma)
-        
-        if golden_cross:
-            # 金叉买入信号验证
-            if self._validate_buy_signal(current_price, current_trend_ma, current_rsi, volumes):
-                stop_loss = current_price * (1 - self.stop_loss_pct)
-                take_profit = current_price + (current_price - stop_loss) * self.take_profit_ratio
-                
-                strength = self._calculate_signal_strength(
-                    'buy', current_price, current_fast_ma, current_slow_ma, current_rsi, volumes
-                )
-                
-                signal = Signal(
-                    strategy_id=self.strategy_id,
-                    symbol=symbol,
-                    signal_type='buy',
-                    strength=strength,
-                    timestamp=current_time,
-                    entry_price=current_price,
-                    stop_loss=stop_loss,
-                    take_profit=take_profit,
-                    metadata={
-                        'signal_reason': 'golden_cross',
-                        'fast_ma': current_fast_ma,
-                        'slow_ma': current_slow_ma,
-                        'rsi': current_rsi,
-                        'trend_direction': 'up' if current_price > current_trend_ma else 'down'
-                    }
-                )
-                signals.append(signal)
-        
-        elif death_cross:
-            # 死叉卖出信号验证
-            if self._validate_sell_signal(current_price, current_trend_ma, current_rsi, volumes):
-                stop_loss = current_price * (1 + self.stop_loss_pct)
-                take_profit = current_price - (stop_loss - current_price) * self.take_profit_ratio
-                
-                strength = self._calculate_signal_strength(
-                    'sell', current_price, current_fast_ma, current_slow_ma, current_rsi, volumes
-                )
-                
-                signal = Signal(
-                    strategy_id=self.strategy_id,
-                    symbol=symbol,
-                    signal_type='sell',
-                    strength=strength,
-                    timestamp=current_time,
-                    entry_price=current_price,
-                    stop_loss=stop_loss,
-                    take_profit=take_profit,
-                    metadata={
-                        'signal_reason': 'death_cross',
-                        'fast_ma': current_fast_ma,
-                        'slow_ma': current_slow_ma,
-                        'rsi': current_rsi,
-                        'trend_direction': 'up' if current_price > current_trend_ma else 'down'
-                    }
-                )
-                signals.append(signal)
+        signal = Signal(
+            strategy_id=self.strategy_id,
+            symbol=symbol,
+            signal_type='buy' if side == SIDE_BUY else 'sell',
+            strength=strength,
+            timestamp=bar_time,
+            entry_price=current_price,
+            stop_loss=stop_loss,
+            take_profit=take_profit,
+            metadata=MACrossMeta(
+                signal_reason='golden_cross' if side == SIDE_BUY else 'death_cross',
+                fast_ma=current_fast_ma,
+                slow_ma=current_slow_ma,
+                rsi=current_rsi,
+                trend_direction='up' if current_price > current_trend_ma else 'down'
+            )
+        )
+        signals.append(signal)
         
         return signals
     
-    def _validate_buy_signal(self, price: float, trend_ma: float, rsi: float, volumes: np.ndarray) -> bool:
-        """验证买入信号"""
-        # 趋势过滤：价格应该在长期趋势线之上或接近
-        trend_ok = price >= trend_ma * (1 - self.min_trend_strength)
-        
-        # RSI过滤：避免超买区域买入
-        rsi_ok = rsi <= 75  # 不在极度超买区
-        
-        # 成交量确认
-        volume_ok = True
-        if len(volumes) >= 20:
-            avg_volume = np.mean(volumes[-20:])
-            current_volume = volumes[-1]
-            volume_ok = current_volume >= avg_volume * 0.8  # 成交量不能太低
-        
-        return trend_ok and rsi_ok and volume_ok
-    
-    def _validate_sell_signal(self, price: float, trend_ma: float, rsi: float, volumes: np.ndarray) -> bool:
-        """验证卖出信号"""
-        # 趋势过滤：价格应该在长期趋势线之下或接近
-        trend_ok = price <= trend_ma * (1 + self.min_trend_strength)
-        
-        # RSI过滤：避免超卖区域卖出
-        rsi_ok = rsi >= 25  # 不在极度超卖区
-        
-        # 成交量确认
-        volume_ok = True
-        if len(volumes) >= 20:
-            avg_volume = np.mean(volumes[-20:])
-            current_volume = volumes[-1]
-            volume_ok = current_volume >= avg_volume * 0.8  # 成交量不能太低
-        
-        return trend_ok and rsi_ok and volume_ok
-    
-    def _calculate_signal_strength(self, 
-                                 signal_type: str,
-                                 price: float,
-                                 fast_ma: float,
-                                 slow_ma: float, 
-                                 rsi: float,
-                                 volumes: np.ndarray) -> float:
-        """计算信号强度"""
-        strength = 0.5  # 基础强度
-        
-        # 均线距离评分
-        ma_distance = abs(fast_ma - slow_ma) / price
-        if ma_distance > 0.01:  # 1%
-            strength += 0.2
-        elif ma_distance > 0.005:  # 0.5%
-            strength += 0.1
-        
-        # RSI位置评分
-        if signal_type == 'buy':
-            if 30 <= rsi <= 50:  # 理想买入RSI区间
-                strength += 0.2
-            elif 50 < rsi <= 60:
-                strength += 0.1
-        else:  # sell
-            if 50 <= rsi <= 70:  # 理想卖出RSI区间
-                strength += 0.2
-            elif 40 <= rsi < 50:
-                strength += 0.1
-        
-        # 成交量评分
-        if len(volumes) >= 10:
-            recent_avg_volume = np.mean(volumes[-10:])
-            current_volume = volumes[-1]
-            volume_ratio = current_volume / recent_avg_volume
-            
-            if volume_ratio > 1.5:
-                strength += 0.15
-            elif volume_ratio > 1.2:
-                strength += 0.1
-            elif volume_ratio < 0.7:
-                strength -= 0.1
-        
-        return max(0.1, min(1.0, strength))
-    
     def get_risk_level(self) -> float:
         """获取策略风险等级"""
         base_risk = 0.4  # 均线策略基础风险
@@ -292,7 +633,8 @@ class MovingAverageCrossover(BaseStrategy):
             elif win_rate < 0.3:
                 base_risk += 0.2
         
-        return max(0.2, min(0.7, base_risk + position_risk))
+        risk = base_risk + position_risk
+        return 0.2 if risk < 0.2 else (0.7 if risk > 0.7 else risk)
     
     def validate_signal(self, signal: Signal) -> bool:
         """验证信号有效性"""
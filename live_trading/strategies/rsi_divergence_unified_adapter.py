@@ -8,17 +8,31 @@
 
 import sys
 from pathlib import Path
+from types import SimpleNamespace
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 import logging
 
-# 添加统一策略模块路径
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+# 添加统一策略模块路径 (重复导入时不再插入)
+_ROOT = str(Path(__file__).parent.parent.parent)
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
 
 from strategies.base_strategy import BaseStrategy, Signal
-from unified_strategies.rsi_divergence_unified import RSIDivergenceUnified
+
+# 统一策略类延迟导入，未实例化适配器时不加载统一策略模块
+_UNIFIED_CLS = None
+
+
+def _get_unified_cls():
+    """获取RSIDivergenceUnified类 (首次调用时导入)"""
+    global _UNIFIED_CLS
+    if _UNIFIED_CLS is None:
+        from unified_strategies.rsi_divergence_unified import RSIDivergenceUnified
+        _UNIFIED_CLS = RSIDivergenceUnified
+    return _UNIFIED_CLS
 
 class RSIDivergenceUnifiedAdapter(BaseStrategy):
     """统一RSI背离策略的实盘交易适配器"""
@@ -37,7 +51,7 @@ class RSIDivergenceUnifiedAdapter(BaseStrategy):
         unified_config = config.copy()
         unified_config['debug'] = False  # 实盘不需要调试输出
         
-        self.unified_strategy = RSIDivergenceUnified(strategy_id, unified_config)
+        self.unified_strategy = _get_unified_cls()(strategy_id, unified_config)
         
         # 继承配置
         self.rsi_period = unified_config.get('rsi_period', 14)
@@ -63,13 +77,19 @@ class RSIDivergenceUnifiedAdapter(BaseStrategy):
         """获取需要的时间框架"""
         return self.timeframes
     
-    def analyze_market(self, market_data: pd.DataFrame, symbol: str = None) -> List[Signal]:
+    def precompute(self, market_data: pd.DataFrame) -> SimpleNamespace:
+        """预先计算指标数组，同一份数据多次调用analyze_market时传入cache复用"""
+        return self.unified_strategy.precompute(market_data)
+    
+    def analyze_market(self, market_data: pd.DataFrame, symbol: str = None,
+                       cache: Optional[SimpleNamespace] = None) -> List[Signal]:
         """
         分析市场数据并生成信号
         
         Args:
             market_data: 市场数据 (OHLCV格式)
             symbol: 交易对名称
+            cache: precompute(market_data)的结果，为None时内部计算
             
         Returns:
             List[Signal]: 生成的信号列表
@@ -88,25 +108,12 @@ class RSIDivergenceUnifiedAdapter(BaseStrategy):
 
             # 使用统一策略分析市场，筛选最新k线的信号
             unified_signals = [
-                s for s in self.unified_strategy.analyze_market(market_data, symbol)
+                s for s in self.unified_strategy.analyze_market(market_data, symbol, cache)
                 if s.timestamp == latest_ts
             ]
             
             # 转换为实盘交易系统的Signal格式
-            live_signals = []
-            for unified_signal in unified_signals:
-                live_signal = Signal(
-                    strategy_id=unified_signal.strategy_id,
-                    symbol=unified_signal.symbol,
-                    signal_type=unified_signal.signal_type,
-                    strength=unified_signal.strength,
-                    timestamp=unified_signal.timestamp,
-                    entry_price=unified_signal.entry_price,
-                    stop_loss=unified_signal.stop_loss,
-                    take_profit=unified_signal.take_profit,
-                    metadata=unified_signal.metadata or {}
-                )
-                live_signals.append(live_signal)
+            live_signals = [Signal.from_other(s) for s in unified_signals]
             
             if live_signals and self.logger:
                 # 记录此次信号时间，避免后续重复
@@ -5,15 +5,298 @@
 
 import numpy as np
 import pandas as pd
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from datetime import datetime
 from typing import Dict, List, Optional, Any, Tuple
 import logging
+import math
+import os
 
 from .base_strategy import BaseStrategy, Signal
+from ._njit import njit, NUMBA_AVAILABLE
+
+
+@njit(cache=True)
+def _bb_atr_kernel(close: np.ndarray, high: np.ndarray, low: np.ndarray,
+                   bb_period: int, bb_std: float, atr_period: int, atr_wilder: bool = False):
+    """
+    单次遍历同时计算布林带和ATR
+    
+    atr_wilder为True时ATR用Wilder平滑: 前atr_period根TR取均值作为种子，
+    之后 ATR = ((n-1) * 上一ATR + TR) / n；否则为TR的简单滚动均值。
+    
+    Returns:
+        (bb_middle, bb_std, bb_upper, bb_lower, bb_width, atr)，窗口不足处为NaN
+    """
+    n = close.shape[0]
+    bb_middle = np.full(n, np.nan)
+    bb_dev = np.full(n, np.nan)
+    bb_upper = np.full(n, np.nan)
+    bb_lower = np.full(n, np.nan)
+    bb_width = np.full(n, np.nan)
+    atr = np.full(n, np.nan)
+    true_range = np.empty(n)
+    tr_sum = 0.0
+    
+    # 收盘价窗口的滚动和与平方和，减去首个收盘价以降低大数相消的误差
+    shift = close[0] if n > 0 else 0.0
+    s1 = 0.0
+    s2 = 0.0
+    
+    for i in range(n):
+        # 真实波幅: 首根K线没有前收盘价，只取最高-最低
+        tr = high[i] - low[i]
+        if i > 0:
+            tr = max(tr, abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+        true_range[i] = tr
+        
+        # ATR: TR的滚动均值(窗口和随K线增减) 或Wilder递推
+        if atr_wilder and i >= atr_period:
+            atr[i] = ((atr_period - 1) * atr[i - 1] + tr) / atr_period
+        else:
+            tr_sum += tr
+            if i >= atr_period:
+                tr_sum -= true_range[i - atr_period]
+            if i >= atr_period - 1:
+                atr[i] = tr_sum / atr_period
+        
+        # 布林带: 滚动和递推均值和样本方差，每根K线O(1)
+        x = close[i] - shift
+        s1 += x
+        s2 += x * x
+        if i >= bb_period:
+            old = close[i - bb_period] - shift
+            s1 -= old
+            s2 -= old * old
+        if i >= bb_period - 1:
+            mean_x = s1 / bb_period
+            var = (s2 - s1 * mean_x) / (bb_period - 1)
+            std = np.sqrt(var) if var > 0.0 else 0.0  # 浮点相消可能出现极小负数
+            mean = mean_x + shift
+            
+            bb_middle[i] = mean
+            bb_dev[i] = std
+            bb_upper[i] = mean + bb_std * std
+            bb_lower[i] = mean - bb_std * std
+            bb_width[i] = (bb_upper[i] - bb_lower[i]) / mean
+    
+    return bb_middle, bb_dev, bb_upper, bb_lower, bb_width, atr
+
+
+def _bb_atr_pandas(close: np.ndarray, high: np.ndarray, low: np.ndarray,
+                   bb_period: int, bb_std: float, atr_period: int, atr_wilder: bool = False):
+    """未安装numba时的布林带和ATR计算 (pandas滚动窗口)，返回值同_bb_atr_kernel"""
+    close_s = pd.Series(close)
+    bb_middle = close_s.rolling(window=bb_period).mean()
+    bb_dev = close_s.rolling(window=bb_period).std()
+    bb_upper = bb_middle + (bb_std * bb_dev)
+    bb_lower = bb_middle - (bb_std * bb_dev)
+    bb_width = (bb_upper - bb_lower) / bb_middle
+    
+    # 真实波幅直接在数组上取三者最大值，首根K线没有前收盘价只取最高-最低
+    hl = high - low
+    if len(close) > 0:
+        prev_close = np.concatenate(([close[0]], close[:-1]))
+        tr = np.maximum.reduce([hl, np.abs(high - prev_close), np.abs(low - prev_close)])
+        tr[0] = hl[0]
+    else:
+        tr = hl
+    atr = pd.Series(tr).rolling(window=atr_period).mean()
+    if atr_wilder and len(tr) >= atr_period:
+        # 以首个SMA为种子的ewm(alpha=1/n)即Wilder递推
+        seeded = np.where(np.arange(len(tr)) < atr_period - 1, np.nan, tr)
+        seeded[atr_period - 1] = atr.iloc[atr_period - 1]
+        atr = pd.Series(seeded).ewm(alpha=1.0 / atr_period, adjust=False).mean()
+    
+    return tuple(s.to_numpy() for s in (bb_middle, bb_dev, bb_upper, bb_lower, bb_width, atr))
+
+
+# 优先使用AOT编译的内核 (strategies/build_kernels.py生成，要求float64数组)；
+# 纯Python逐根循环远慢于pandas，没有numba时使用pandas实现
+try:
+    from .vb_kernels import bb_atr as _bb_atr
+except ImportError:
+    _bb_atr = _bb_atr_kernel if NUMBA_AVAILABLE else _bb_atr_pandas
+
+# 使用JIT内核时在导入阶段完成编译 (cache=True时后续进程直接读取缓存)，避免首根K线的编译延迟
+if _bb_atr is _bb_atr_kernel and os.environ.get('WARMUP_NUMBA', '1') == '1':
+    _warmup = np.ones(40)
+    _bb_atr_kernel(_warmup, _warmup, _warmup, 20, 2.0, 14, False)
+
+
+
+@njit(cache=True)
+def _rolling_max_kernel(arr: np.ndarray, window: int) -> np.ndarray:
+    """单调队列滑动窗口最大值，O(n)，前window-1个为NaN"""
+    n = arr.size
+    out = np.full(n, np.nan)
+    dq = np.empty(n, dtype=np.int64)  # 下标队列，对应值单调递减
+    head = 0
+    tail = 0
+    for i in range(n):
+        while tail > head and arr[dq[tail - 1]] <= arr[i]:
+            tail -= 1
+        dq[tail] = i
+        tail += 1
+        if dq[head] <= i - window:
+            head += 1
+        if i >= window - 1:
+            out[i] = arr[dq[head]]
+    return out
+
+
+def _rolling_max_pandas(arr: np.ndarray, window: int) -> np.ndarray:
+    """未安装numba时的滑动窗口最大值"""
+    return pd.Series(arr).rolling(window=window).max().to_numpy()
+
+
+_rolling_max = _rolling_max_kernel if NUMBA_AVAILABLE else _rolling_max_pandas
+
+
+def rolling_high(high: np.ndarray, window: int) -> np.ndarray:
+    """最近window根K线的最高价 (唐奇安通道上轨)"""
+    return _rolling_max(np.ascontiguousarray(high, dtype=np.float64), window)
+
+
+def rolling_low(low: np.ndarray, window: int) -> np.ndarray:
+    """最近window根K线的最低价 (唐奇安通道下轨)"""
+    return -_rolling_max(-np.asarray(low, dtype=np.float64), window)
+
+
+@dataclass(slots=True)
+class VBMeta:
+    """波动率突破信号附加信息 (持久化时用dataclasses.asdict转换)"""
+    bb_width: float           # 布林带宽度
+    bb_upper: float           # 布林带上轨
+    bb_lower: float           # 布林带下轨
+    atr: float                # ATR
+    breakout_type: str        # 'upper' 或 'lower'
+    volume_confirmed: bool    # 成交量是否确认
+    timeframe: str            # 时间周期
+
+
+@dataclass(slots=True)
+class IndicatorArrays:
+    """calculate_indicators结果的列数组，按位置取值时不经过iloc构造行Series"""
+    close: np.ndarray
+    bb_width: np.ndarray
+    bb_upper: np.ndarray
+    bb_lower: np.ndarray
+    atr: np.ndarray
+    volume: Optional[np.ndarray] = None
+    volume_sma: Optional[np.ndarray] = None
+    
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'IndicatorArrays':
+        """从带指标列的DataFrame取出各列数组 (逐根调用检查函数前转换一次即可)"""
+        optional = {col: df[col].to_numpy() for col in ('volume', 'volume_sma') if col in df.columns}
+        return cls(*(df[col].to_numpy() for col in ('close', 'bb_width', 'bb_upper', 'bb_lower', 'atr')),
+                   **optional)
+    
+    def __len__(self) -> int:
+        return len(self.close)
+
+
+class BBATRState:
+    """
+    布林带/ATR增量状态
+    
+    只累加已收盘K线 (update)，未收盘的最新K线用peek推算而不修改状态，
+    每根K线O(1)，同时保留最近history根已收盘K线的带宽用于收缩判断。
+    """
+    
+    def __init__(self, bb_period: int, bb_std: float, atr_period: int, history: int = 10,
+                 atr_wilder: bool = False):
+        self.bb_period = bb_period
+        self.bb_std = bb_std
+        self.atr_period = atr_period
+        self.atr_wilder = atr_wilder
+        
+        self.closes = deque(maxlen=bb_period)    # 减去shift后的收盘价
+        self.true_ranges = deque(maxlen=atr_period)
+        self.recent_widths = deque(maxlen=history)
+        self.s1 = 0.0
+        self.s2 = 0.0
+        self.tr_sum = 0.0
+        self.tr_count = 0
+        self.atr = float('nan')                   # 最后一根已收盘K线的ATR
+        self.shift = None                         # 首个收盘价，降低平方和相消误差
+        self.prev_close = None
+        self.bar_time = None                      # 最后一根已收盘K线的时间
+    
+    def _advance(self, high: float, low: float, close: float) -> Tuple[float, ...]:
+        """计算加入一根K线后的滚动量和ATR (不修改状态)"""
+        tr = high - low
+        if self.prev_close is not None:
+            tr = max(tr, abs(high - self.prev_close), abs(low - self.prev_close))
+        
+        x = close - (close if self.shift is None else self.shift)
+        s1 = self.s1 + x
+        s2 = self.s2 + x * x
+        if len(self.closes) == self.bb_period:
+            old = self.closes[0]
+            s1 -= old
+            s2 -= old * old
+        
+        # ATR: Wilder模式在种子之后递推，否则为TR窗口和的均值
+        n = self.atr_period
+        tr_sum = self.tr_sum
+        atr = float('nan')
+        if self.atr_wilder and self.tr_count >= n:
+            atr = ((n - 1) * self.atr + tr) / n
+        else:
+            tr_sum += tr
+            if len(self.true_ranges) == n:
+                tr_sum -= self.true_ranges[0]
+            if self.tr_count + 1 >= n:
+                atr = tr_sum / n
+        
+        return tr, x, s1, s2, tr_sum, atr
+    
+    def _values(self, s1: float, s2: float, atr: float,
+                shift: float) -> Tuple[float, float, float, float]:
+        """由滚动量得到(bb_width, bb_upper, bb_lower, atr)，窗口不足时为NaN"""
+        nan = float('nan')
+        bb_width = bb_upper = bb_lower = nan
+        if len(self.closes) + 1 >= self.bb_period:
+            mean_x = s1 / self.bb_period
+            var = (s2 - s1 * mean_x) / (self.bb_period - 1)
+            std = math.sqrt(var) if var > 0.0 else 0.0
+            mean = mean_x + shift
+            bb_upper = mean + self.bb_std * std
+            bb_lower = mean - self.bb_std * std
+            bb_width = (bb_upper - bb_lower) / mean
+        
+        return bb_width, bb_upper, bb_lower, atr
+    
+    def peek(self, high: float, low: float, close: float) -> Tuple[float, float, float, float]:
+        """推算最新(未收盘)K线的指标，不修改状态"""
+        _, _, s1, s2, _, atr = self._advance(high, low, close)
+        return self._values(s1, s2, atr, close if self.shift is None else self.shift)
+    
+    def update(self, high: float, low: float, close: float) -> Tuple[float, float, float, float]:
+        """加入一根已收盘K线并返回其指标"""
+        if self.shift is None:
+            self.shift = close
+        tr, x, s1, s2, tr_sum, atr = self._advance(high, low, close)
+        values = self._values(s1, s2, atr, self.shift)
+        
+        self.closes.append(x)
+        self.true_ranges.append(tr)
+        self.s1, self.s2, self.tr_sum, self.atr = s1, s2, tr_sum, atr
+        self.tr_count += 1
+        self.prev_close = close
+        self.recent_widths.append(values[0])
+        return values
 
 
 class VolatilityBreakoutStrategy(BaseStrategy):
     """波动率收缩/扩张策略"""
     
+    # 完整序列指标缓存的最大条目数
+    INDICATOR_CACHE_SIZE = 4
+    
     def __init__(self, strategy_id: str = None, config: Dict[str, Any] = None):
         """
         初始化策略
@@ -25,6 +308,9 @@ class VolatilityBreakoutStrategy(BaseStrategy):
                 - bb_std: 布林带标准差倍数 (默认2.0)
                 - bb_threshold: 带宽收缩阈值 (默认0.04, 即4%)
                 - atr_period: ATR周期 (默认14)
+                - atr_mode: ATR平滑方式 'sma' 或 'wilder' (默认'sma')
+                - channel_period: 高低点通道周期，设置后calculate_indicators
+                  额外输出rolling_high/rolling_low列 (默认None，不计算)
                 - stop_loss_mult: 止损倍数 (默认1.5 * ATR)
                 - trailing_mult: 移动止盈倍数 (默认2.0 * ATR)
                 - volume_mult: 成交量放大倍数 (默认1.5)
@@ -49,6 +335,9 @@ class VolatilityBreakoutStrategy(BaseStrategy):
         
         # ATR参数
         self.atr_period = config.get('atr_period', 14)
+        self.atr_mode = config.get('atr_mode', 'sma')
+        self._atr_wilder = self.atr_mode == 'wilder'
+        self.channel_period = config.get('channel_period')
         self.stop_loss_mult = config.get('stop_loss_mult', 1.5)
         self.trailing_mult = config.get('trailing_mult', 2.0)
         
@@ -66,67 +355,246 @@ class VolatilityBreakoutStrategy(BaseStrategy):
         self.last_signal_time = None
         self.position_side = None
         
+        # 实盘增量指标状态 (按(交易对, 周期)缓存)
+        self._live_states: Dict[Tuple[str, str], BBATRState] = {}
+        
+        # 完整序列指标LRU缓存: (id(data), 长度, 最后时间) -> (data, 价格快照, 指标数组)
+        self._ind_cache: 'OrderedDict[Tuple, Tuple[pd.DataFrame, Tuple, Tuple[np.ndarray, ...]]]' = OrderedDict()
+        
         self.logger = logging.getLogger(__name__)
         if self.debug:
             self.logger.setLevel(logging.DEBUG)
     
+    def _debug_enabled(self) -> bool:
+        """调试模式开启且logger会输出DEBUG时才格式化调试日志"""
+        return self.debug and self.logger.isEnabledFor(logging.DEBUG)
+    
+    @staticmethod
+    def _column_array(data: pd.DataFrame, column: str) -> np.ndarray:
+        """取出float64连续数组 (已是float64时不复制)"""
+        return np.ascontiguousarray(data[column].to_numpy(dtype=np.float64, copy=False))
+    
+    def _indicator_arrays(self, data: pd.DataFrame) -> Tuple[np.ndarray, ...]:
+        """
+        完整序列的布林带和ATR数组 (bb_middle, bb_std, bb_upper, bb_lower, bb_width, atr)
+        
+        同一个DataFrame (同一对象且价格未被原地修改) 重复传入时直接复用上次的结果
+        """
+        close, high, low = (self._column_array(data, col) for col in ('close', 'high', 'low'))
+        key = (id(data), len(data), data.index[-1])
+        entry = self._ind_cache.get(key)
+        # 缓存项持有data本身，id不会被其他对象复用；价格快照用于发现原地修改
+        if (entry is not None and entry[0] is data
+                and all(np.array_equal(old, new, equal_nan=True)
+                        for old, new in zip(entry[1], (close, high, low)))):
+            self._ind_cache.move_to_end(key)
+            return entry[2]
+        
+        # 布林带和ATR在一次遍历中算出
+        arrays = _bb_atr(
+            close, high, low, self.bb_period, float(self.bb_std), self.atr_period,
+            self._atr_wilder
+        )
+        self._ind_cache[key] = (data, (close.copy(), high.copy(), low.copy()), arrays)
+        self._ind_cache.move_to_end(key)
+        if len(self._ind_cache) > self.INDICATOR_CACHE_SIZE:
+            self._ind_cache.popitem(last=False)
+        return arrays
+    
     def calculate_indicators(self, data: pd.DataFrame) -> pd.DataFrame:
-        """计算技术指标"""
+        """计算技术指标 (完整序列，回测用)"""
         if len(data) < max(self.bb_period, self.atr_period) + 5:
             return data
         
-        df = data.copy()
-        
-        # 计算布林带
-        df['bb_middle'] = df['close'].rolling(window=self.bb_period).mean()
-        df['bb_std'] = df['close'].rolling(window=self.bb_period).std()
-        df['bb_upper'] = df['bb_middle'] + (self.bb_std * df['bb_std'])
-        df['bb_lower'] = df['bb_middle'] - (self.bb_std * df['bb_std'])
+        # 原有列与新指标列一次性构造DataFrame，避免逐列插入
+        columns = {col: data[col].array for col in data.columns}
+        columns.update(zip(('bb_middle', 'bb_std', 'bb_upper', 'bb_lower', 'bb_width', 'atr'),
+                           self._indicator_arrays(data)))
         
-        # 计算布林带宽度
-        df['bb_width'] = (df['bb_upper'] - df['bb_lower']) / df['bb_middle']
-        
-        # 计算ATR
-        df['hl'] = df['high'] - df['low']
-        df['hc'] = abs(df['high'] - df['close'].shift(1))
-        df['lc'] = abs(df['low'] - df['close'].shift(1))
-        df['true_range'] = df[['hl', 'hc', 'lc']].max(axis=1)
-        df['atr'] = df['true_range'].rolling(window=self.atr_period).mean()
+        # 高低点通道 (可选)
+        if self.channel_period:
+            columns['rolling_high'] = rolling_high(self._column_array(data, 'high'), self.channel_period)
+            columns['rolling_low'] = rolling_low(self._column_array(data, 'low'), self.channel_period)
         
         # 计算成交量均值（用于成交量过滤）
-        if 'volume' in df.columns and self.enable_volume_filter:
-            df['volume_sma'] = df['volume'].rolling(window=20).mean()
+        if 'volume' in data.columns and self.enable_volume_filter:
+            columns['volume_sma'] = data['volume'].rolling(window=20).mean().to_numpy()
         
-        # 清理临时列
-        df.drop(['hl', 'hc', 'lc', 'true_range'], axis=1, inplace=True)
+        # 字典输入默认复制，结果与缓存的指标数组互不影响
+        df = pd.DataFrame(columns, index=data.index)
+        df.attrs = dict(data.attrs)
         
         return df
     
-    def identify_volatility_contraction(self, data: pd.DataFrame, index: int) -> bool:
-        """识别波动率收缩"""
-        if index < self.bb_period:
-            return False
+    def compute_signals_batch(self, data: pd.DataFrame, lookback: int = 10) -> pd.DataFrame:
+        """
+        向量化计算每根K线的突破信号 (回测用)
         
-        current_width = data.iloc[index]['bb_width']
+        逐根判定与analyze相同: 最近lookback+1根内出现过收缩、收盘价突破布林带、
+        强度达标且成交量确认通过。
         
-        # 检查布林带宽度是否低于阈值
-        is_contracted = current_width < self.bb_threshold
+        Returns:
+            pd.DataFrame: 与data同索引，列为
+                side: 1向上突破 / -1向下突破 / 0无突破
+                strength: 突破强度
+                signal: 是否满足全部入场条件
+        """
+        n = len(data)
+        side = np.zeros(n, dtype=np.int8)
+        strength = np.zeros(n)
+        signal = np.zeros(n, dtype=bool)
+        
+        if n >= max(self.bb_period, self.atr_period) + 5:
+            close = self._column_array(data, 'close')
+            _, _, bb_upper, bb_lower, bb_width, _ = self._indicator_arrays(data)
+            
+            buy_mask = close > bb_upper
+            sell_mask = close < bb_lower
+            side[buy_mask] = 1
+            side[sell_mask] = -1
+            strength = np.where(buy_mask, (close - bb_upper) / bb_upper,
+                                np.where(sell_mask, (bb_lower - close) / bb_lower, 0.0))
+            
+            # 最近lookback+1根K线内是否出现过收缩 (前缀和求窗口计数)
+            contracted = self._contraction_mask(bb_width, 0)
+            counts = np.concatenate(([0], np.cumsum(contracted)))
+            positions = np.arange(n)
+            recent_contracted = counts[1:] > counts[np.maximum(positions - lookback, 0)]
+            
+            signal = ((side != 0) & recent_contracted & (strength >= self.min_signal_strength)
+                      & (positions >= max(self.bb_period, self.atr_period) + 4))
+            
+            # 成交量确认 (均量为含当前K线的最近20根均值，前20根不过滤)
+            if self.enable_volume_filter and 'volume' in data.columns:
+                volume = self._column_array(data, 'volume')
+                avg_volume = np.full(n, np.nan)
+                avg_volume[19:] = np.lib.stride_tricks.sliding_window_view(volume, 20).mean(axis=1)
+                avg_volume[:20] = np.nan
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    volume_ok = ~(avg_volume > 0.0) | (volume / avg_volume >= self.volume_mult)
+                signal &= volume_ok
+        
+        return pd.DataFrame({'side': side, 'strength': strength, 'signal': signal},
+                            index=data.index)
+    
+    def _seed_length(self, n: int, lookback: int) -> int:
+        """计算最近lookback+1根K线指标所需的尾部K线数 (不超过n)"""
+        if self._atr_wilder:
+            return n  # Wilder ATR依赖全部历史
+        # 最早一根需要完整的布林带窗口，ATR窗口首根还需要前收盘价
+        return min(n, max(self.bb_period + lookback, self.atr_period + 1))
+    
+    def compute_last_indicators(self, close: np.ndarray, high: np.ndarray, low: np.ndarray,
+                                lookback: int = 10) -> Dict[str, np.ndarray]:
+        """
+        只用尾部切片计算最近lookback+1根K线的布林带和ATR (实盘用)
+        
+        Returns:
+            Dict[str, np.ndarray]: bb_width/bb_upper/bb_lower/atr，最后一个元素对应最新K线
+        """
+        n_tail = self._seed_length(len(close), lookback)
+        _, _, bb_upper, bb_lower, bb_width, atr = _bb_atr(
+            close[-n_tail:], high[-n_tail:], low[-n_tail:],
+            self.bb_period, float(self.bb_std), self.atr_period, self._atr_wilder
+        )
+        keep = slice(-(lookback + 1), None)
+        return {
+            'bb_width': bb_width[keep],
+            'bb_upper': bb_upper[keep],
+            'bb_lower': bb_lower[keep],
+            'atr': atr[keep]
+        }
+    
+    def _update_live_indicators(self, key: Tuple[str, str], index: pd.Index,
+                                close: np.ndarray, high: np.ndarray, low: np.ndarray,
+                                lookback: int) -> Dict[str, np.ndarray]:
+        """
+        用增量状态得到与compute_last_indicators相同的指标
+        
+        状态停在倒数第二根(已收盘)K线: 时间对齐时不动或只推进一根，
+        否则用尾部K线重新初始化 (index不是时间序列时每次都重新初始化)。
+        最新K线由peek推算，盘中价格变化不影响状态。
+        """
+        # 只有时间序列能判断K线是否推进；RangeIndex等位置下标每次都用尾部K线重建
+        timed = self._is_time_axis(index)
+        state = self._live_states.get(key) if timed else None
+        
+        if state is not None and state.bar_time == index[-2]:
+            pass
+        elif state is not None and state.bar_time == index[-3]:
+            state.update(float(high[-2]), float(low[-2]), float(close[-2]))
+        else:
+            state = BBATRState(self.bb_period, float(self.bb_std), self.atr_period, lookback,
+                               self._atr_wilder)
+            n_tail = self._seed_length(len(close) - 1, lookback)
+            for i in range(len(close) - 1 - n_tail, len(close) - 1):
+                state.update(float(high[i]), float(low[i]), float(close[i]))
+            self._live_states[key] = state
+        state.bar_time = index[-2] if timed else None
+        
+        bb_width, bb_upper, bb_lower, atr = state.peek(float(high[-1]), float(low[-1]), float(close[-1]))
+        widths = list(state.recent_widths)[-lookback:] if lookback > 0 else []
+        return {
+            'bb_width': np.array(widths + [bb_width]),
+            'bb_upper': np.array([bb_upper]),
+            'bb_lower': np.array([bb_lower]),
+            'atr': np.array([atr])
+        }
+    
+    @staticmethod
+    def _get_bar_times(data: pd.DataFrame):
+        """获取K线时间序列: DatetimeIndex或timestamp列，都没有时返回原index"""
+        if isinstance(data.index, pd.DatetimeIndex):
+            return data.index
+        if 'timestamp' in data.columns:
+            return data['timestamp'].to_numpy()
+        return data.index
+    
+    @staticmethod
+    def _is_time_axis(bar_times) -> bool:
+        """bar_times是否为时间序列 (位置下标不能用来判断是否有新K线)"""
+        if isinstance(bar_times, pd.DatetimeIndex):
+            return True
+        return getattr(bar_times, 'dtype', None) is not None and bar_times.dtype.kind == 'M'
+    
+    @staticmethod
+    def _as_arrays(data) -> IndicatorArrays:
+        """DataFrame转换为IndicatorArrays，已是IndicatorArrays时原样返回"""
+        return data if isinstance(data, IndicatorArrays) else IndicatorArrays.from_frame(data)
+    
+    def _contraction_mask(self, bb_width: np.ndarray, first_index: int) -> np.ndarray:
+        """
+        逐根判断带宽是否低于阈值
         
-        if self.debug and is_contracted:
-            self.logger.debug(f"波动率收缩: 带宽={current_width:.4f} < 阈值={self.bb_threshold:.4f}")
+        Args:
+            bb_width: 连续若干根K线的带宽
+            first_index: bb_width[0]在完整序列中的位置，前bb_period根不判定为收缩
+        """
+        mask = bb_width < self.bb_threshold
+        mask[:max(0, self.bb_period - first_index)] = False
+        return mask
+    
+    def identify_volatility_contraction(self, data, index: int) -> bool:
+        """识别波动率收缩 (data为calculate_indicators结果或IndicatorArrays)"""
+        bb_width = self._as_arrays(data).bb_width[index:index + 1]
+        is_contracted = bool(self._contraction_mask(bb_width, index)[0])
+        
+        if is_contracted and self._debug_enabled():
+            self.logger.debug("波动率收缩: 带宽=%.4f < 阈值=%.4f", bb_width[0], self.bb_threshold)
         
         return is_contracted
     
-    def check_breakout_conditions(self, data: pd.DataFrame, index: int) -> Tuple[bool, str, float]:
+    def check_breakout_conditions(self, data, index: int) -> Tuple[bool, str, float]:
         """检查突破条件"""
         if index < max(self.bb_period, self.atr_period):
             return False, None, 0.0
         
-        row = data.iloc[index]
-        close_price = row['close']
-        bb_upper = row['bb_upper']
-        bb_lower = row['bb_lower']
-        
+        arrays = self._as_arrays(data)
+        return self._check_breakout(arrays.close[index], arrays.bb_upper[index], arrays.bb_lower[index])
+    
+    def _check_breakout(self, close_price: float, bb_upper: float,
+                        bb_lower: float) -> Tuple[bool, str, float]:
+        """按收盘价与布林带上下轨判断突破方向和强度"""
         # 检查向上突破
         if close_price > bb_upper:
             signal_strength = (close_price - bb_upper) / bb_upper
@@ -139,39 +607,47 @@ class VolatilityBreakoutStrategy(BaseStrategy):
         
         return False, None, 0.0
     
-    def check_volume_confirmation(self, data: pd.DataFrame, index: int) -> bool:
+    def check_volume_confirmation(self, data, index: int) -> bool:
         """检查成交量确认"""
-        if not self.enable_volume_filter or 'volume' not in data.columns:
+        if not self.enable_volume_filter:
             return True
         
-        if index < 20:  # 需要足够的历史数据计算成交量均值
+        arrays = self._as_arrays(data)
+        if arrays.volume is None or arrays.volume_sma is None:
             return True
         
-        row = data.iloc[index]
-        current_volume = row['volume']
-        avg_volume = row['volume_sma']
+        if index < 20:  # 需要足够的历史数据计算成交量均值
+            return True
         
-        if pd.isna(avg_volume) or avg_volume <= 0:
+        return self._check_volume(arrays.volume[index], arrays.volume_sma[index])
+    
+    def _check_volume(self, current_volume: float, avg_volume: float) -> bool:
+        """当前成交量相对均量是否达到放大倍数 (均量无效时视为通过)"""
+        if not (avg_volume > 0.0):
             return True
         
         volume_ratio = current_volume / avg_volume
         is_confirmed = volume_ratio >= self.volume_mult
         
-        if self.debug:
-            self.logger.debug(f"成交量确认: {current_volume:.0f} / {avg_volume:.0f} = {volume_ratio:.2f}, 确认={is_confirmed}")
+        if self._debug_enabled():
+            self.logger.debug("成交量确认: %.0f / %.0f = %.2f, 确认=%s",
+                              current_volume, avg_volume, volume_ratio, is_confirmed)
         
         return is_confirmed
     
-    def calculate_stop_loss_take_profit(self, data: pd.DataFrame, index: int, 
+    def calculate_stop_loss_take_profit(self, data, index: int, 
                                       entry_price: float, signal_type: str) -> Tuple[float, float]:
         """计算止损和止盈价格"""
-        if index >= len(data):
-            index = len(data) - 1
-        
-        row = data.iloc[index]
-        atr = row['atr']
+        arrays = self._as_arrays(data)
+        if index >= len(arrays):
+            index = len(arrays) - 1
         
-        if pd.isna(atr) or atr <= 0:
+        return self._stop_loss_take_profit(arrays.atr[index], entry_price, signal_type)
+    
+    def _stop_loss_take_profit(self, atr: float, entry_price: float,
+                               signal_type: str) -> Tuple[float, float]:
+        """按ATR计算止损止盈，ATR无效时使用固定百分比"""
+        if not (atr > 0.0):  # NaN比较为False，无需pd.isna
             # 如果ATR无效，使用固定百分比
             if signal_type == 'buy':
                 stop_loss = entry_price * 0.97  # -3%
@@ -191,93 +667,138 @@ class VolatilityBreakoutStrategy(BaseStrategy):
         return stop_loss, take_profit
     
     def analyze(self, data: pd.DataFrame, symbol: str, timeframe: str = '1h') -> List[Signal]:
-        """主要分析方法"""
+        """
+        主要分析方法
+        
+        只分析最新K线，指标由按(交易对, 周期)缓存的增量状态推算，
+        不复制整个DataFrame。
+        """
         if len(data) < max(self.bb_period, self.atr_period) + 5:
-            if self.debug:
-                self.logger.debug(f"数据不足，需要至少 {max(self.bb_period, self.atr_period) + 5} 根K线")
+            if self._debug_enabled():
+                self.logger.debug("数据不足，需要至少 %d 根K线", max(self.bb_period, self.atr_period) + 5)
+            return []
+        
+        volume = None
+        if self.enable_volume_filter and 'volume' in data.columns:
+            volume = self._column_array(data, 'volume')
+        
+        return self.analyze_arrays(
+            self._get_bar_times(data), self._column_array(data, 'close'), self._column_array(data, 'high'),
+            self._column_array(data, 'low'), volume, symbol, timeframe
+        )
+    
+    def analyze_arrays(self, bar_times, close: np.ndarray, high: np.ndarray, low: np.ndarray,
+                       volume: Optional[np.ndarray], symbol: str,
+                       timeframe: str = '1h') -> List[Signal]:
+        """
+        基于列数组分析最新K线 (analyze的数组版本)
+        
+        Args:
+            bar_times: K线时间 (pd.Index或数组)，最后一个为当前K线
+            close/high/low: 价格数组
+            volume: 成交量数组，为None时不做成交量确认
+            symbol: 交易对
+            timeframe: 时间周期
+        """
+        if len(close) < max(self.bb_period, self.atr_period) + 5:
             return []
         
-        # 计算技术指标
-        df = self.calculate_indicators(data)
         signals = []
         
         # 分析最新的数据点
-        current_index = len(df) - 1
-        current_time = df.index[current_index]
+        current_index = len(close) - 1
+        current_time = bar_times[current_index]
         
         # 避免在同一时间生成重复信号
         if self.last_signal_time == current_time:
             return []
         
-        # 检查最近是否有过波动率收缩
-        recent_contracted = False
+        # 计算最近lookback+1根K线的技术指标 (增量状态)
         lookback = min(10, current_index)  # 检查最近10根K线
-        for i in range(max(0, current_index - lookback), current_index + 1):
-            if self.identify_volatility_contraction(df, i):
-                recent_contracted = True
-                break
+        indicators = self._update_live_indicators(
+            (symbol, timeframe), bar_times, close, high, low, lookback
+        )
+        bb_width = indicators['bb_width']
+        
+        # 检查最近是否有过波动率收缩 (与identify_volatility_contraction一样跳过前bb_period根)
+        contracted = self._contraction_mask(bb_width, current_index - (len(bb_width) - 1))
+        recent_contracted = bool(contracted.any())
+        
+        if recent_contracted and self._debug_enabled():
+            self.logger.debug("波动率收缩: 带宽=%.4f < 阈值=%.4f",
+                              bb_width[contracted.argmax()], self.bb_threshold)
         
         if not recent_contracted:
-            if self.debug:
-                current_width = df.iloc[current_index]['bb_width']
-                self.logger.debug(f"最近未出现波动率收缩: 当前带宽={current_width:.4f}, 阈值={self.bb_threshold:.4f}")
+            if self._debug_enabled():
+                self.logger.debug("最近未出现波动率收缩: 当前带宽=%.4f, 阈值=%.4f",
+                                  bb_width[-1], self.bb_threshold)
             return []
         
         # 检查突破条件
-        has_breakout, signal_type, signal_strength = self.check_breakout_conditions(df, current_index)
+        entry_price = float(close[-1])
+        has_breakout, signal_type, signal_strength = self._check_breakout(
+            entry_price, indicators['bb_upper'][-1], indicators['bb_lower'][-1]
+        )
         if not has_breakout:
-            if self.debug:
+            if self._debug_enabled():
                 self.logger.debug("未检测到有效突破")
             return []
         
         # 检查信号强度
         if signal_strength < self.min_signal_strength:
-            if self.debug:
-                self.logger.debug(f"信号强度不足: {signal_strength:.4f} < {self.min_signal_strength}")
+            if self._debug_enabled():
+                self.logger.debug("信号强度不足: %.4f < %s", signal_strength, self.min_signal_strength)
             return []
         
-        # 检查成交量确认
-        if not self.check_volume_confirmation(df, current_index):
-            if self.debug:
+        # 检查成交量确认 (均量为最近20根成交量均值)
+        if not self.enable_volume_filter or volume is None or current_index < 20:
+            volume_confirmed = True
+        else:
+            volume_confirmed = self._check_volume(
+                float(volume[-1]), volume[-20:].mean(dtype=np.float64)
+            )
+        if not volume_confirmed:
+            if self._debug_enabled():
                 self.logger.debug("成交量确认失败")
             return []
         
-        # 获取当前价格
-        entry_price = df.iloc[current_index]['close']
-        
         # 计算止损和止盈
-        stop_loss, take_profit = self.calculate_stop_loss_take_profit(
-            df, current_index, entry_price, signal_type
-        )
+        atr = indicators['atr'][-1]
+        stop_loss, take_profit = self._stop_loss_take_profit(atr, entry_price, signal_type)
         
-        # 创建交易信号
+        # 创建交易信号：时间与其他策略一致为datetime (同BaseStrategy._get_bar_time)，
+        # bar_times原值只用于去重和增量状态
+        if self._is_time_axis(bar_times):
+            signal_time = pd.Timestamp(current_time).to_pydatetime()
+        else:
+            signal_time = datetime.now()
         signal = Signal(
             strategy_id=self.config.get('strategy_id', 'volatility_breakout'),
             symbol=symbol,
             signal_type=signal_type,
             strength=signal_strength,  # 使用 strength 字段
-            timestamp=current_time,
+            timestamp=signal_time,
             entry_price=entry_price,
             stop_loss=stop_loss,
             take_profit=take_profit,
-            metadata={
-                'bb_width': df.iloc[current_index]['bb_width'],
-                'bb_upper': df.iloc[current_index]['bb_upper'],
-                'bb_lower': df.iloc[current_index]['bb_lower'],
-                'atr': df.iloc[current_index]['atr'],
-                'breakout_type': 'upper' if signal_type == 'buy' else 'lower',
-                'volume_confirmed': self.check_volume_confirmation(df, current_index),
-                'timeframe': timeframe
-            }
+            metadata=VBMeta(
+                bb_width=bb_width[-1],
+                bb_upper=indicators['bb_upper'][-1],
+                bb_lower=indicators['bb_lower'][-1],
+                atr=atr,
+                breakout_type='upper' if signal_type == 'buy' else 'lower',
+                volume_confirmed=volume_confirmed,
+                timeframe=timeframe
+            )
         )
         
         signals.append(signal)
         self.last_signal_time = current_time
         self.position_side = signal_type
         
-        if self.debug:
-            self.logger.info(f"生成{signal_type}信号: 价格={entry_price:.2f}, 止损={stop_loss:.2f}, "
-                           f"止盈={take_profit:.2f}, 强度={signal_strength:.4f}")
+        if self.debug and self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("生成%s信号: 价格=%.2f, 止损=%.2f, 止盈=%.2f, 强度=%.4f",
+                             signal_type, entry_price, stop_loss, take_profit, signal_strength)
         
         return signals
     
@@ -292,6 +813,8 @@ class VolatilityBreakoutStrategy(BaseStrategy):
                 'bb_std': self.bb_std,
                 'bb_threshold': self.bb_threshold,
                 'atr_period': self.atr_period,
+                'atr_mode': self.atr_mode,
+                'channel_period': self.channel_period,
                 'stop_loss_mult': self.stop_loss_mult,
                 'trailing_mult': self.trailing_mult,
                 'volume_mult': self.volume_mult,
@@ -35,6 +35,16 @@ class VolatilityBreakoutUnifiedAdapter:
         self.logger = logging.getLogger(__name__)
         if self.debug:
             self.logger.setLevel(logging.DEBUG)
+        
+        # 策略参数初始化后不变，缓存以免每次重建完整的策略信息字典
+        self._params_cache = self.strategy.get_strategy_info()['parameters']
+        
+        # 快速模式: 按交易对缓存float32列数组，每次只追加新K线 (结果与DataFrame路径有微小精度差异)
+        self.fast_mode = config.get('fast_mode', False)
+        self._soa: Dict[str, Dict[str, Any]] = {}
+        
+        # 每个(交易对, 周期)上次分析的(最新K线时间, 收盘价)，数据未变化时跳过分析
+        self._last_ts: Dict[tuple, tuple] = {}
     
     def generate_signals(self, symbol: str, timeframe: str, data: pd.DataFrame) -> List[Signal]:
         """
@@ -54,13 +64,68 @@ class VolatilityBreakoutUnifiedAdapter:
         if timeframe not in self.timeframes:
             return []
         
+        # 最新K线的时间和收盘价都没变时结果不会变化 (未收盘K线价格更新时仍重新分析)；
+        # 没有K线时间 (如RangeIndex) 时无法判断，每次都分析
+        bar_times = self.strategy._get_bar_times(data)
+        if len(data) > 0 and self.strategy._is_time_axis(bar_times):
+            key = (symbol, timeframe)
+            latest = (bar_times[-1], data['close'].iat[-1])
+            if self._last_ts.get(key) == latest:
+                return []
+            self._last_ts[key] = latest
+        
         try:
+            if self.fast_mode:
+                soa = self._update_soa(symbol, data)
+                return self.strategy.analyze_arrays(
+                    soa['index'], soa['close'], soa['high'], soa['low'],
+                    soa.get('volume') if self.strategy.enable_volume_filter else None,
+                    symbol, timeframe
+                )
             signals = self.strategy.analyze(data, symbol, timeframe)
             return signals
         except Exception as e:
-            self.logger.error(f"生成信号失败: {e}")
+            self.logger.error("生成信号失败: %s", e)
             return []
     
+    def _update_soa(self, symbol: str, data: pd.DataFrame) -> Dict[str, Any]:
+        """
+        更新交易对的float32列数组缓存并返回
+        
+        缓存最后一根K线可能尚未收盘，因此从它在data中的位置开始重新读取；
+        index不是DatetimeIndex或重叠部分的时间对不上时整体重建。缓存长度与data保持一致。
+        """
+        columns = [col for col in ('close', 'high', 'low', 'volume') if col in data.columns]
+        cache = self._soa.get(symbol)
+        
+        start = None
+        if (cache is not None and list(cache) == ['index'] + columns and len(cache['index']) > 0
+                and isinstance(data.index, pd.DatetimeIndex)
+                and isinstance(cache['index'], pd.DatetimeIndex)):
+            last_ts = cache['index'][-1]
+            pos = data.index.searchsorted(last_ts)
+            keep = len(cache['index']) - 1
+            if (pos < len(data) and data.index[pos] == last_ts and pos <= keep
+                    and cache['index'][keep - pos:keep].equals(data.index[:pos])):
+                start = pos
+        
+        if start is None:
+            cache = {'index': data.index}
+            cache.update({col: data[col].to_numpy(dtype=np.float32) for col in columns})
+        else:
+            # 保留缓存中start之前的部分，拼接data[start:]
+            new_rows = data.iloc[start:]
+            keep = len(cache['index']) - 1
+            cache = {
+                'index': cache['index'][keep - start:keep].append(new_rows.index),
+                **{col: np.concatenate((cache[col][keep - start:keep],
+                                        new_rows[col].to_numpy(dtype=np.float32)))
+                   for col in columns}
+            }
+        
+        self._soa[symbol] = cache
+        return cache
+    
     def analyze(self, data: pd.DataFrame, symbol: str, timeframe: str = '1h') -> List[Signal]:
         """
         分析数据生成信号 - 交易系统接口
@@ -100,22 +165,16 @@ class VolatilityBreakoutUnifiedAdapter:
         if price_risk <= 0:
             return 0.0
         
-        # 计算风险比例
-        risk_ratio = price_risk / signal.entry_price
-        
-        if risk_ratio <= 0:
-            return 0.0
-        
-        # 计算仓位大小
-        risk_amount = balance * risk_per_trade
-        position_value = risk_amount / risk_ratio
-        position_size = position_value / signal.entry_price
-        
-        return position_size
+        # 仓位 = 风险金额 / 单位价格风险 (等价于 风险金额 / 风险比例 / 入场价)
+        return balance * risk_per_trade / price_risk
     
     def get_strategy_params(self) -> Dict[str, Any]:
-        """获取策略参数 - 兼容接口"""
-        return self.strategy.get_strategy_info()['parameters']
+        """获取策略参数 - 兼容接口 (返回缓存，调用方不应修改)"""
+        return self._params_cache
+    
+    def invalidate_params_cache(self):
+        """修改self.strategy的参数后调用，重新生成参数缓存"""
+        self._params_cache = self.strategy.get_strategy_info()['parameters']
     
     def get_supported_symbols(self) -> List[str]:
         """获取支持的交易对"""
@@ -0,0 +1,153 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pandas as pd
+import pytest
+import talib
+from strategies.ma_crossover import MovingAverageCrossover
+
+
+def _make_df(n=300, seed=1):
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.normal(size=n).cumsum()
+    return pd.DataFrame(
+        {
+            "open": close,
+            "high": close + 1.0,
+            "low": close - 1.0,
+            "close": close,
+            "volume": rng.uniform(500, 1500, n),
+        },
+        index=pd.date_range("2024-01-01", periods=n, freq="5min"),
+    )
+
+
+def test_incremental_indicators_match_full_recompute():
+    strategy = MovingAverageCrossover("ma", {})
+    df = _make_df()
+
+    for i in range(120, len(df)):
+        close = df["close"].values[: i + 1]
+        indicators = strategy._update_indicators(
+            ("BTC", "5m"), close, df.index.values[: i + 1]
+        )
+
+        fast = talib.EMA(close, timeperiod=strategy.fast_period)
+        slow = talib.EMA(close, timeperiod=strategy.slow_period)
+        assert np.isclose(indicators["prev_fast_ma"], fast[-2])
+        assert np.isclose(indicators["fast_ma"], fast[-1])
+        assert np.isclose(indicators["slow_ma"], slow[-1])
+        assert np.isclose(indicators["rsi"], talib.RSI(close, timeperiod=strategy.rsi_period)[-1])
+
+
+def test_same_bar_update_does_not_advance_state():
+    strategy = MovingAverageCrossover("ma", {})
+    df = _make_df()
+    close = df["close"].values.copy()
+    times = df.index.values
+
+    strategy._update_indicators(("BTC", "5m"), close, times)
+    state = dict(strategy._indicator_state[("BTC", "5m")])
+
+    close[-1] += 5.0  # 最新K线未收盘，价格变化
+    strategy._update_indicators(("BTC", "5m"), close, times)
+
+    assert strategy._indicator_state[("BTC", "5m")] == state
+
+
+def test_vectorized_matches_bar_by_bar():
+    df = _make_df(n=800, seed=3)
+    strategy = MovingAverageCrossover("ma", {})
+
+    expected = []
+    for i in range(len(df)):
+        for signal in strategy.analyze_market(df.iloc[: i + 1], symbol="BTC"):
+            expected.append((pd.Timestamp(signal.timestamp), signal.signal_type, signal.strength))
+
+    result = MovingAverageCrossover("ma", {}).analyze_market_vectorized(df)
+    actual = list(zip(result.index, result["signal_type"], result["strength"]))
+
+    assert len(expected) > 0
+    assert [e[:2] for e in expected] == [a[:2] for a in actual]
+    assert np.allclose([e[2] for e in expected], [a[2] for a in actual])
+
+
+def test_batch_matches_per_symbol_calls():
+    frames = {f"S{seed}": _make_df(n=400, seed=seed) for seed in range(4)}
+    single = MovingAverageCrossover("ma", {})
+    batch = MovingAverageCrossover("ma", {"batch_workers": 4})
+
+    for i in range(300, 400):
+        window = {symbol: df.iloc[: i + 1] for symbol, df in frames.items()}
+        expected = {symbol: single.analyze_market(df, symbol=symbol) for symbol, df in window.items()}
+        assert batch.analyze_market_batch(window) == expected
+
+
+@pytest.mark.parametrize("calls", [
+    ({}, {}),  # 未指定交易对时不缓存状态
+    ({"symbol": "BTC", "timeframe": "5m"}, {"symbol": "BTC", "timeframe": "1h"}),
+])
+def test_instruments_with_same_bar_times_do_not_share_state(calls):
+    # 两组K线时间相同，交替分析时不能复用对方的EMA/Wilder和成交量状态
+    frames = [_make_df(n=400, seed=seed) for seed in (6, 7)]
+    shared = MovingAverageCrossover("ma", {})
+    separate = [MovingAverageCrossover("ma", {}) for _ in frames]
+
+    signals = 0
+    for i in range(100, len(frames[0])):
+        for df, strategy, kwargs in zip(frames, separate, calls):
+            expected = strategy.analyze_market(df.iloc[: i + 1], **kwargs)
+            assert shared.analyze_market(df.iloc[: i + 1], **kwargs) == expected
+            signals += len(expected)
+
+    assert signals > 0
+    assert len(shared._indicator_state) == len({tuple(kwargs.values()) for kwargs in calls if kwargs})
+
+
+def test_running_volume_averages_match_tail_means():
+    strategy = MovingAverageCrossover("ma", {})
+    df = _make_df()
+    volumes = df["volume"].values.copy()
+    times = df.index.values
+
+    for i in range(9, len(df)):
+        volumes[i] += 50.0  # 最新K线未收盘，成交量继续增加
+        avg_20, avg_10 = strategy._update_volume_averages(("BTC", "5m"), volumes[: i + 1], times[: i + 1])
+        tail = volumes[: i + 1][-20:]
+        assert np.isclose(avg_20, tail.mean()) or (i < 19 and np.isnan(avg_20))
+        assert np.isclose(avg_10, tail[-10:].mean())
+
+
+def test_arrays_entry_point_matches_dataframe():
+    df = _make_df(n=600, seed=5)
+    by_frame = MovingAverageCrossover("ma", {})
+    by_arrays = MovingAverageCrossover("ma", {})
+    close = df["close"].to_numpy()
+    volume = df["volume"].to_numpy()
+    times = df.index.values
+
+    for i in range(100, len(df)):
+        expected = by_frame.analyze_market(df.iloc[: i + 1], symbol="BTC")
+        actual = by_arrays.analyze_market_arrays(close[: i + 1], volume[: i + 1], "BTC", times[: i + 1])
+        assert actual == expected
+
+
+def test_zero_volume_does_not_raise():
+    from strategies.ma_crossover import SIDE_BUY, _calculate_signal_strength
+
+    # 均量为0时成交量不评分 (与numpy的0/0=NaN一致)
+    assert np.isclose(_calculate_signal_strength(SIDE_BUY, 100.0, 101.0, 100.0, 40.0, 0.0, 0.0), 0.8)
+
+    df = _make_df(n=400, seed=3)
+    df["volume"] = 0.0
+    strategy = MovingAverageCrossover("ma", {})
+    close = df["close"].to_numpy()
+    volume = df["volume"].to_numpy()
+    times = df.index.values
+
+    signals = []
+    for i in range(100, len(df)):
+        signals += strategy.analyze_market_arrays(close[: i + 1], volume[: i + 1], "BTC", times[: i + 1])
+    assert signals
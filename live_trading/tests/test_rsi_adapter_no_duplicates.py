@@ -12,7 +12,7 @@ def test_rsi_adapter_avoids_duplicate_signals():
 
     latest_ts = pd.Timestamp("2024-01-01 00:00:00")
 
-    def fake_analyze_market(df, symbol):
+    def fake_analyze_market(df, symbol, cache=None):
         return [UnifiedSignal(
             symbol=symbol,
             signal_type="buy",
@@ -42,3 +42,97 @@ def test_rsi_adapter_avoids_duplicate_signals():
 
     assert len(signals1) == 1
     assert len(signals2) == 0
+
+
+def test_signal_from_other_copies_unified_fields():
+    from strategies.base_strategy import Signal
+
+    unified = UnifiedSignal(
+        symbol="BTC-USDT-SWAP",
+        signal_type="sell",
+        timestamp=pd.Timestamp("2024-01-01"),
+        entry_price=100.0,
+        stop_loss=101.5,
+        take_profit=97.75,
+        strategy_id="rsi",
+        strength=0.7,
+        metadata={"signal_reason": "bearish_divergence"},
+    )
+
+    signal = Signal.from_other(unified)
+
+    assert isinstance(signal, Signal)
+    assert (signal.symbol, signal.signal_type, signal.stop_loss, signal.take_profit) == (
+        "BTC-USDT-SWAP", "sell", 101.5, 97.75
+    )
+    assert signal.position_size is None
+    assert signal.metadata == {"signal_reason": "bearish_divergence"}
+    assert Signal.from_other(signal) is signal
+
+
+def test_unified_signal_is_slotted_and_frozen():
+    import dataclasses
+    import pytest
+
+    unified = UnifiedSignal(
+        symbol="BTC-USDT-SWAP",
+        signal_type="buy",
+        timestamp=pd.Timestamp("2024-01-01"),
+        entry_price=100.0,
+        stop_loss=98.5,
+        take_profit=102.25,
+        strategy_id="rsi",
+    )
+
+    assert not hasattr(unified, "__dict__")
+    assert unified.metadata is None
+    assert unified.to_live_trading_signal()["metadata"] == {}
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        unified.stop_loss = 99.0
+
+
+def test_unified_signal_normalizes_timestamp_to_pandas():
+    from datetime import datetime
+    import numpy as np
+
+    for ts in (datetime(2024, 1, 1, 0, 5), np.datetime64("2024-01-01T00:05", "ns"), "2024-01-01 00:05"):
+        unified = UnifiedSignal(
+            symbol="BTC-USDT-SWAP",
+            signal_type="buy",
+            timestamp=ts,
+            entry_price=100.0,
+            stop_loss=98.5,
+            take_profit=102.25,
+            strategy_id="rsi",
+        )
+        assert type(unified.timestamp) is pd.Timestamp
+        assert unified.timestamp == pd.Timestamp("2024-01-01 00:05")
+
+
+def test_signal_batch_backtest_array_matches_tuples():
+    import numpy as np
+    from unified_strategies.base_unified_strategy import UnifiedSignalBatch
+
+    batch = UnifiedSignalBatch(
+        symbol="BTC-USDT-SWAP",
+        strategy_id="rsi",
+        timestamps=pd.DatetimeIndex(["2024-01-01 00:05", "2024-01-01 00:10"]).as_unit("us"),
+        side=np.array([1, -1], dtype=np.int8),
+        entry_price=np.array([100.0, 101.0]),
+        stop_loss=np.array([98.5, 102.5]),
+        take_profit=np.array([102.25, 98.75]),
+        strength=np.array([0.7, 0.8]),
+        metadata_columns={},
+        metadata_constants={},
+    )
+
+    array = batch.to_backtest_array()
+    rows = batch.to_backtest_format()
+
+    assert array.dtype == UnifiedSignalBatch.BACKTEST_DTYPE
+    assert [pd.Timestamp(ts) for ts in array["timestamp"]] == [row[0] for row in rows]
+    assert array["side"].tolist() == [1, -1]
+    assert array["entry_price"].tolist() == [row[1] for row in rows]
+    assert array["stop_loss"].tolist() == [row[3] for row in rows]
+    assert array["take_profit"].tolist() == [row[4] for row in rows]
+    assert array["strength"].tolist() == [0.7, 0.8]
@@ -0,0 +1,83 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pandas as pd
+from strategies.experimental.rsi_divergence_v2 import RSIDivergenceV2
+
+
+def _make_df(index):
+    n = len(index)
+    close = 100 + np.sin(np.arange(n) / 3.0)
+    return pd.DataFrame(
+        {
+            "open": close,
+            "high": close + 0.5,
+            "low": close - 0.5,
+            "close": close,
+            "volume": np.full(n, 1000.0),
+        },
+        index=index,
+    )
+
+
+def test_bar_time_uses_datetime_index():
+    strategy = RSIDivergenceV2("rsi_v2", {})
+    index = pd.date_range("2024-01-01", periods=60, freq="5min")
+    df = _make_df(index)
+
+    assert strategy._get_bar_time(df) == index[-1].to_pydatetime()
+
+
+def test_bar_time_uses_timestamp_column():
+    strategy = RSIDivergenceV2("rsi_v2", {})
+    stamps = pd.date_range("2024-01-01", periods=60, freq="5min")
+    df = _make_df(range(60))
+    df["timestamp"] = stamps
+
+    assert strategy._get_bar_time(df) == stamps[-1].to_pydatetime()
+
+
+def test_column_check_cached_per_columns_object():
+    strategy = RSIDivergenceV2("rsi_v2", {})
+    df = _make_df(pd.date_range("2024-01-01", periods=60, freq="5min"))
+
+    assert strategy._verify_columns("BTC", df.columns)
+    assert strategy._verified_columns["BTC"] is df.columns
+    assert not strategy._verify_columns("BTC", df.drop(columns=["volume"]).columns)
+
+
+def test_nearest_rsi_extreme_matches_linear_scan():
+    strategy = RSIDivergenceV2("rsi_v2", {})
+    rsi = np.arange(100, dtype=float)
+    rng = np.random.default_rng(0)
+
+    def linear(extremes, target):
+        best, nearest = float("inf"), None
+        for idx in extremes:
+            distance = abs(idx - target)
+            if distance < best and distance <= 3:
+                best, nearest = distance, rsi[idx]
+        return nearest
+
+    for _ in range(200):
+        extremes = sorted(rng.choice(100, size=rng.integers(0, 12), replace=False).tolist())
+        target = int(rng.integers(0, 100))
+        assert strategy._find_nearest_rsi_extreme(extremes, target, rsi) == linear(extremes, target)
+
+
+def test_peak_kernel_matches_vectorized():
+    from strategies.experimental.rsi_divergence_v2 import _peaks_troughs_kernel, _peaks_troughs_numpy
+
+    # 未安装numba时_peaks_troughs_kernel就是纯Python函数，同样可以比较
+    rng = np.random.default_rng(1)
+    for _ in range(100):
+        series = np.round(rng.normal(size=int(rng.integers(0, 60))), 1)  # 取整制造平台
+        series[rng.random(len(series)) < 0.05] = np.nan
+        for window in (1, 2, 3):
+            if len(series) < 2 * window + 1:
+                continue
+            for kernel_result, numpy_result in zip(_peaks_troughs_kernel(series, window),
+                                                   _peaks_troughs_numpy(series, window)):
+                assert kernel_result.tolist() == numpy_result.tolist()
@@ -0,0 +1,49 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+# 根目录优先于backtest，避免backtest/unified_strategies遮蔽根目录的同名包
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import numpy as np
+import pytest
+
+# 未安装numba时divergence_mask/_peaks_troughs直接使用numpy实现，编译内核无需比较
+pytest.importorskip("numba")
+
+from unified_strategies._rsi_div_loops import divergence_mask_kernel, divergence_mask_numpy
+from unified_strategies.base_unified_strategy import _peaks_troughs_kernel, _peaks_troughs_numpy
+
+
+def _random_series(rng, n):
+    series = np.round(rng.normal(size=n).cumsum(), 1)  # 取整制造平台
+    series[rng.random(n) < 0.02] = np.nan
+    return series
+
+
+def test_peak_kernel_matches_numpy():
+    rng = np.random.default_rng(0)
+    for _ in range(100):
+        series = _random_series(rng, int(rng.integers(0, 300)))
+        for window in (1, 2, 3, 5):
+            for kernel_result, numpy_result in zip(_peaks_troughs_kernel(series, window),
+                                                   _peaks_troughs_numpy(series, window)):
+                assert kernel_result.tolist() == numpy_result.tolist()
+
+
+@pytest.mark.parametrize("side", [1, -1])
+def test_divergence_kernel_matches_numpy(side):
+    rng = np.random.default_rng(1 if side > 0 else 2)
+    for _ in range(100):
+        n = int(rng.integers(30, 400))
+        prices = _random_series(rng, n)
+        rsi = _random_series(rng, n)
+        peak_window = int(rng.integers(1, 4))
+        lookback = int(rng.integers(10, 30))
+        min_distance = int(rng.integers(2, 7))
+        price_peaks, price_troughs = _peaks_troughs_numpy(prices, peak_window)
+        rsi_peaks, rsi_troughs = _peaks_troughs_numpy(rsi, peak_window)
+        price_extremes, rsi_extremes = (price_troughs, rsi_troughs) if side > 0 else (price_peaks, rsi_peaks)
+        bars = np.arange(int(rng.integers(0, lookback)), n)
+
+        args = (bars, price_extremes, rsi_extremes, prices, rsi, side, lookback, peak_window, min_distance)
+        assert np.array_equal(divergence_mask_kernel(*args), divergence_mask_numpy(*args))
@@ -0,0 +1,52 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pandas as pd
+from strategies.volatility_breakout_unified_adapter import VolatilityBreakoutUnifiedAdapter
+
+
+def test_volatility_adapter_skips_unchanged_bar():
+    adapter = VolatilityBreakoutUnifiedAdapter({"supported_symbols": ["BTC-USDT-SWAP"], "timeframes": ["1h"]})
+
+    calls = []
+
+    def fake_analyze(df, symbol, timeframe):
+        calls.append(df.index[-1])
+        return []
+
+    adapter.strategy.analyze = fake_analyze
+
+    index = pd.date_range("2024-01-01", periods=2, freq="1h")
+    df = pd.DataFrame(
+        {
+            "open": [100.0, 100.0],
+            "high": [101.0, 101.0],
+            "low": [99.0, 99.0],
+            "close": [100.0, 100.5],
+            "volume": [1000.0, 1000.0],
+        },
+        index=index,
+    )
+
+    adapter.generate_signals("BTC-USDT-SWAP", "1h", df)
+    adapter.generate_signals("BTC-USDT-SWAP", "1h", df)
+    assert len(calls) == 1
+
+    # 未收盘K线价格变化时重新分析
+    updated = df.copy()
+    updated.loc[index[-1], "close"] = 100.8
+    adapter.generate_signals("BTC-USDT-SWAP", "1h", updated)
+    assert len(calls) == 2
+
+    # 其他周期互不影响
+    adapter.timeframes.append("4h")
+    adapter.generate_signals("BTC-USDT-SWAP", "4h", updated)
+    assert len(calls) == 3
+
+    # 没有K线时间的窗口 (RangeIndex) 无法判断是否为同一根K线，每次都分析
+    shifted = pd.DataFrame({"close": [100.5, 100.5], "open": 100.0, "high": 101.0, "low": 99.0,
+                            "volume": 1000.0})
+    adapter.generate_signals("BTC-USDT-SWAP", "1h", shifted)
+    adapter.generate_signals("BTC-USDT-SWAP", "1h", shifted)
+    assert len(calls) == 5
@@ -0,0 +1,279 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pandas as pd
+import pytest
+from strategies.volatility_breakout import _bb_atr_kernel, _bb_atr_pandas
+
+
+def _make_df(n=300, seed=1):
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.normal(scale=0.3, size=n).cumsum()
+    spread = rng.uniform(0.1, 1.0, n)
+    return pd.DataFrame(
+        {
+            "open": close,
+            "high": close + spread,
+            "low": close - spread,
+            "close": close,
+            "volume": rng.uniform(500, 1500, n),
+        },
+        index=pd.date_range("2024-01-01", periods=n, freq="1h"),
+    )
+
+
+@pytest.mark.parametrize("atr_wilder", [False, True])
+def test_fused_kernel_matches_pandas_rolling(atr_wilder):
+    df = _make_df()
+    arrays = [df[col].to_numpy() for col in ("close", "high", "low")]
+
+    expected = _bb_atr_pandas(*arrays, 20, 2.0, 14, atr_wilder)
+    actual = _bb_atr_kernel(*arrays, 20, 2.0, 14, atr_wilder)
+
+    for exp, act in zip(expected, actual):
+        assert np.allclose(exp, act, equal_nan=True)
+
+
+@pytest.mark.parametrize("atr_mode", ["sma", "wilder"])
+def test_last_indicators_match_full_series(atr_mode):
+    from strategies.volatility_breakout import VolatilityBreakoutStrategy
+
+    strategy = VolatilityBreakoutStrategy({"atr_mode": atr_mode})
+    df = _make_df()
+    full = strategy.calculate_indicators(df)
+    last = strategy.compute_last_indicators(
+        df["close"].to_numpy(), df["high"].to_numpy(), df["low"].to_numpy()
+    )
+
+    for column, values in last.items():
+        assert len(values) == 11
+        assert np.allclose(values, full[column].to_numpy()[-11:])
+
+
+@pytest.mark.parametrize("atr_mode", ["sma", "wilder"])
+def test_incremental_state_matches_trailing_slice(atr_mode):
+    from strategies.volatility_breakout import VolatilityBreakoutStrategy
+
+    strategy = VolatilityBreakoutStrategy({"atr_mode": atr_mode})
+    df = _make_df()
+    original = df["close"].to_numpy()
+    close, high, low = (df[col].to_numpy().copy() for col in ("close", "high", "low"))
+
+    for i in range(40, len(df)):
+        # 最新K线未收盘时价格变化，同一根K线会被分析多次
+        for bump in (0.5, 0.0):
+            close[i] = original[i] + bump
+            live = strategy._update_live_indicators(
+                ("BTC", "1h"), df.index[: i + 1], close[: i + 1], high[: i + 1], low[: i + 1], 10
+            )
+            expected = strategy.compute_last_indicators(close[: i + 1], high[: i + 1], low[: i + 1])
+            for column, values in live.items():
+                assert np.allclose(values, expected[column][-len(values):])
+
+        if i == 40:
+            state = strategy._live_states[("BTC", "1h")]
+        assert strategy._live_states[("BTC", "1h")] is state
+
+
+@pytest.mark.parametrize("with_timestamp_column", [False, True])
+def test_incremental_state_with_range_index_windows(with_timestamp_column):
+    from strategies.volatility_breakout import VolatilityBreakoutStrategy
+
+    strategy = VolatilityBreakoutStrategy({})
+    df = _make_df()
+
+    for i in range(100, len(df)):
+        # 引擎传入的固定长度窗口使用默认RangeIndex
+        window = df.iloc[i - 99: i + 1].reset_index(drop=not with_timestamp_column)
+        if with_timestamp_column:
+            window = window.rename(columns={"index": "timestamp"})
+        close, high, low = (window[col].to_numpy() for col in ("close", "high", "low"))
+
+        live = strategy._update_live_indicators(
+            ("BTC", "1h"), strategy._get_bar_times(window), close, high, low, 10
+        )
+        expected = strategy.compute_last_indicators(close, high, low)
+        for column, values in live.items():
+            assert np.allclose(values, expected[column][-len(values):])
+
+
+def test_helpers_accept_frame_or_arrays():
+    from strategies.volatility_breakout import IndicatorArrays, VolatilityBreakoutStrategy
+
+    strategy = VolatilityBreakoutStrategy({"enable_volume_filter": True, "bb_threshold": 0.02})
+    df = strategy.calculate_indicators(_make_df())
+    arrays = IndicatorArrays.from_frame(df)
+
+    for i in range(len(df)):
+        row = df.iloc[i]
+        assert strategy.identify_volatility_contraction(arrays, i) == (i >= 20 and row["bb_width"] < 0.02)
+        assert strategy.identify_volatility_contraction(df, i) == strategy.identify_volatility_contraction(arrays, i)
+        assert strategy.check_breakout_conditions(arrays, i) == strategy.check_breakout_conditions(df, i)
+        assert strategy.check_volume_confirmation(arrays, i) == strategy.check_volume_confirmation(df, i)
+        assert strategy.calculate_stop_loss_take_profit(arrays, i, row["close"], "buy") == \
+            strategy.calculate_stop_loss_take_profit(df, i, row["close"], "buy")
+
+
+def test_analyze_checks_volume_once_per_signal(monkeypatch):
+    from strategies.volatility_breakout import VolatilityBreakoutStrategy
+
+    strategy = VolatilityBreakoutStrategy({
+        "enable_volume_filter": True, "volume_mult": 0.0, "min_signal_strength": 0.0
+    })
+    calls = []
+    check_volume = strategy._check_volume
+    monkeypatch.setattr(strategy, "_check_volume", lambda *args: calls.append(args) or check_volume(*args))
+
+    df = _make_df(n=600, seed=2)
+    signals = []
+    for i in range(40, len(df)):
+        before = len(calls)
+        new_signals = strategy.analyze(df.iloc[: i + 1], "BTC")
+        assert len(calls) - before <= 1
+        signals.extend(new_signals)
+
+    assert signals
+    assert all(signal.metadata.volume_confirmed for signal in signals)
+
+
+def test_signal_timestamp_is_datetime_for_timestamp_column_frames():
+    from datetime import datetime
+    from strategies.volatility_breakout import VolatilityBreakoutStrategy
+
+    # 实盘引擎的K线为timestamp列 + RangeIndex
+    strategy = VolatilityBreakoutStrategy({"min_signal_strength": 0.0})
+    df = _make_df(n=400, seed=2)
+    signals = []
+    for i in range(40, len(df)):
+        window = df.iloc[max(0, i - 99): i + 1].rename_axis("timestamp").reset_index()
+        signals.extend(strategy.analyze(window, "BTC"))
+
+    assert len(signals) > 1
+    assert all(type(signal.timestamp) is datetime for signal in signals)
+    assert [signal.timestamp for signal in signals] == sorted(signal.timestamp for signal in signals)
+    # position_coordinator中的时间间隔和过期计算
+    assert (signals[1].timestamp - signals[0].timestamp).total_seconds() > 0
+    assert (datetime.now() - signals[-1].timestamp).total_seconds() > 0
+
+
+def test_fast_mode_soa_cache_tracks_growing_and_sliding_windows():
+    from strategies.volatility_breakout_unified_adapter import VolatilityBreakoutUnifiedAdapter
+
+    config = {"min_signal_strength": 0.0, "bb_threshold": 0.02}
+    reference = VolatilityBreakoutUnifiedAdapter(dict(config))
+    fast = VolatilityBreakoutUnifiedAdapter(dict(config, fast_mode=True))
+    df = _make_df(n=600, seed=4)
+
+    expected, actual = [], []
+    for i in range(40, len(df)):
+        window = df.iloc[max(0, i - 199): i + 1]  # 前200根之后为固定长度滑动窗口
+        expected += reference.generate_signals("BTC-USDT-SWAP", "1h", window)
+        actual += fast.generate_signals("BTC-USDT-SWAP", "1h", window)
+
+        soa = fast._soa["BTC-USDT-SWAP"]
+        assert soa["index"].equals(window.index)
+        assert np.array_equal(soa["close"], window["close"].to_numpy(dtype=np.float32))
+
+    assert len(expected) > 0
+    assert [(s.timestamp, s.signal_type) for s in actual] == [(s.timestamp, s.signal_type) for s in expected]
+    assert np.allclose([s.stop_loss for s in actual], [s.stop_loss for s in expected], rtol=1e-5)
+
+
+def test_fast_mode_soa_cache_rebuilds_range_index_windows():
+    from strategies.volatility_breakout_unified_adapter import VolatilityBreakoutUnifiedAdapter
+
+    fast = VolatilityBreakoutUnifiedAdapter({"min_signal_strength": 0.0, "fast_mode": True})
+    df = _make_df(n=400, seed=4)
+
+    for i in range(199, len(df)):
+        window = df.iloc[i - 99: i + 1].reset_index(drop=True)
+        fast._update_soa("BTC-USDT-SWAP", window)
+
+        soa = fast._soa["BTC-USDT-SWAP"]
+        for column in ("close", "high", "low", "volume"):
+            assert np.array_equal(soa[column], window[column].to_numpy(dtype=np.float32))
+
+
+def test_calculate_indicators_reuses_cached_arrays(monkeypatch):
+    import strategies.volatility_breakout as vb
+
+    calls = []
+    kernel = vb._bb_atr
+
+    def counting(*args):
+        calls.append(args)
+        return kernel(*args)
+
+    monkeypatch.setattr(vb, "_bb_atr", counting)
+    strategy = vb.VolatilityBreakoutStrategy({})
+    df = _make_df()
+
+    first = strategy.calculate_indicators(df)
+    first.loc[first.index[-1], "atr"] = -1.0
+    second = strategy.calculate_indicators(df)
+    assert len(calls) == 1
+    assert second["atr"].iloc[-1] > 0
+
+    strategy.calculate_indicators(df.iloc[:-1])
+    assert len(calls) == 2
+
+    for i in range(strategy.INDICATOR_CACHE_SIZE + 2):
+        strategy.calculate_indicators(_make_df(seed=i + 2))
+    assert len(strategy._ind_cache) == strategy.INDICATOR_CACHE_SIZE
+
+
+def test_indicator_cache_distinguishes_same_shape_frames():
+    from strategies.volatility_breakout import VolatilityBreakoutStrategy
+
+    strategy = VolatilityBreakoutStrategy({})
+    index = _make_df().index
+    for seed in range(50):
+        # 形状和index相同的不同DataFrame，前一个释放后id可能被复用
+        df = _make_df(seed=seed + 10).set_axis(index)
+        expected = VolatilityBreakoutStrategy({}).calculate_indicators(df)
+        assert np.allclose(strategy.calculate_indicators(df)["bb_upper"], expected["bb_upper"], equal_nan=True)
+
+    df = _make_df(seed=5)
+    strategy.calculate_indicators(df)
+    df["close"] *= 1.01  # 原地修改价格
+    expected = VolatilityBreakoutStrategy({}).calculate_indicators(df)
+    assert np.allclose(strategy.calculate_indicators(df)["bb_upper"], expected["bb_upper"], equal_nan=True)
+
+
+@pytest.mark.parametrize("volume_filter", [False, True])
+def test_signals_batch_matches_per_bar_analyze(volume_filter):
+    from strategies.volatility_breakout import VolatilityBreakoutStrategy
+
+    config = {"min_signal_strength": 0.0005, "enable_volume_filter": volume_filter, "volume_mult": 1.1}
+    df = _make_df(200, seed=3)
+    batch = VolatilityBreakoutStrategy(config).compute_signals_batch(df)
+
+    strategy = VolatilityBreakoutStrategy(config)
+    expected = {}
+    for i in range(len(df)):
+        for signal in strategy.analyze(df.iloc[: i + 1], "BTC-USDT", "1h"):
+            expected[signal.timestamp] = (1 if signal.signal_type == "buy" else -1, signal.strength)
+
+    fired = batch[batch["signal"]]
+    assert expected
+    assert list(fired.index) == list(expected)
+    for ts, (side, strength) in expected.items():
+        assert fired.loc[ts, "side"] == side
+        assert np.isclose(fired.loc[ts, "strength"], strength)
+
+
+@pytest.mark.parametrize("window", [1, 5, 100, 400])
+def test_rolling_high_low_match_pandas(window):
+    from strategies.volatility_breakout import (
+        _rolling_max_kernel, _rolling_max_pandas, rolling_high, rolling_low,
+    )
+
+    df = _make_df()
+    high, low = df["high"].to_numpy(), df["low"].to_numpy()
+
+    assert np.allclose(rolling_high(high, window), df["high"].rolling(window).max(), equal_nan=True)
+    assert np.allclose(rolling_low(low, window), df["low"].rolling(window).min(), equal_nan=True)
+    assert np.allclose(_rolling_max_kernel(high, window), _rolling_max_pandas(high, window),
+                       equal_nan=True)
@@ -0,0 +1,63 @@
+"""
+candle_utils.py - K线原始数据解析工具
+
+获取器和更新器共用的向量化转换函数。
+"""
+
+import numpy as np
+import pandas as pd
+
+# parquet写入参数: zstd比snappy文件更小、解码开销相近；
+# 行组按一天的5分钟K线(288条)切分，按时间过滤时可以跳过整个行组
+PARQUET_ROW_GROUP_SIZE = 288
+PARQUET_WRITE_OPTIONS = {
+    'compression': 'zstd',
+    'compression_level': 3,
+    'use_dictionary': True,
+    'data_page_size': 64 * 1024,
+}
+
+# 原始K线第1~7列: o, h, l, c, vol, volCcy, volCcyQuote
+NUMERIC_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'volume_currency', 'volume_quote']
+
+# 存储类型: 价格用float32 (约7位有效数字，足够画图和指标展示)，体积和内存减半；
+# 成交量数值跨度大，保留float64。指标计算时再转回float64
+STORAGE_DTYPES = {
+    'open': np.float32,
+    'high': np.float32,
+    'low': np.float32,
+    'close': np.float32,
+    'volume': np.float64,
+    'volume_currency': np.float64,
+    'volume_quote': np.float64,
+}
+
+
+def to_float_matrix(values: np.ndarray) -> np.ndarray:
+    """
+    字符串数值矩阵一次转换为float64
+
+    含空串等无法解析的值时逐列coerce为NaN，与pd.to_numeric(errors='coerce')一致
+    """
+    try:
+        return values.astype(np.float64)
+    except (ValueError, TypeError):
+        return np.column_stack([
+            pd.to_numeric(values[:, i], errors='coerce').astype(np.float64)
+            for i in range(values.shape[1])
+        ])
+
+
+def drop_sorted_duplicates(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    去除已排序时间索引中的重复行，保留第一条
+
+    索引有序时重复值必然相邻，比较相邻元素即可，省去duplicated()的哈希表构建
+    """
+    if len(df) < 2:
+        return df
+    ts = df.index.asi8
+    keep = np.empty(len(ts), dtype=bool)
+    keep[0] = True
+    np.not_equal(ts[1:], ts[:-1], out=keep[1:])
+    return df if keep.all() else df.iloc[keep]
@@ -2,6 +2,7 @@
 加密货币数据管理系统 - 配置文件
 """
 import os
+from functools import lru_cache
 from pathlib import Path
 
 # =========================
@@ -53,7 +54,8 @@ OKX_CONFIG = {
 
 # Parquet文件配置
 PARQUET_CONFIG = {
-    'compression': 'snappy',  # 压缩算法
+    'compression': 'zstd',   # 压缩算法
+    'row_group_size': 288,   # 每个行组一天的5分钟K线
     'index': True,           # 保存索引
 }
 
@@ -67,15 +69,14 @@ COLUMN_MAPPING = {
     'vol': 'volume',
     'volCcy': 'volume_currency',
     'volCcyQuote': 'volume_quote',
-    'confirm': 'confirm'
 }
 
 # 数据类型定义
 DTYPE_CONFIG = {
-    'open': 'float64',
-    'high': 'float64',
-    'low': 'float64', 
-    'close': 'float64',
+    'open': 'float32',
+    'high': 'float32',
+    'low': 'float32',
+    'close': 'float32',
     'volume': 'float64',
     'volume_currency': 'float64',
     'volume_quote': 'float64'
@@ -127,11 +128,22 @@ LOG_CONFIG = {
 # 辅助函数
 # =========================
 
+# 路径和交易对校验结果按参数缓存 (运行中修改DATA_DIR/SUPPORTED_PAIRS后需调用cache_clear())
+@lru_cache(maxsize=256)
 def get_data_file_path(symbol, timeframe=BASE_TIMEFRAME):
     """获取数据文件路径"""
     filename = f"{symbol}_{timeframe}.parquet"
     return DATA_DIR / filename
 
+def get_dataset_dir(symbol):
+    """数据更新器写入的分区数据集目录: DATA_DIR/{symbol}/year=YYYY/month=MM/"""
+    return DATA_DIR / symbol
+
+def has_dataset(symbol):
+    """交易对是否已有分区数据集 (有则优先读取，旧版单文件不再更新)"""
+    return any(get_dataset_dir(symbol).glob("year=*/month=*/*.parquet"))
+
+@lru_cache(maxsize=256)
 def validate_symbol(symbol):
     """验证交易对是否支持"""
     return symbol.upper() in SUPPORTED_PAIRS
@@ -1,19 +1,28 @@
 """
 加密货币数据获取器 - 支持下载进度和中断
 """
-import requests
+import os
+import numpy as np
 import pandas as pd
-import time
+import pyarrow as pa
+import pyarrow.parquet as pq
 from datetime import datetime, timedelta
 from pathlib import Path
 import logging
 from logging.handlers import RotatingFileHandler
+from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
 
 from optimized_config import (
     OKX_CONFIG, SUPPORTED_PAIRS, TIMEFRAMES,
     DATA_DIR, LOG_CONFIG, get_legacy_data_path, validate_symbol
 )
+from candle_utils import (
+    NUMERIC_COLUMNS, PARQUET_ROW_GROUP_SIZE, PARQUET_WRITE_OPTIONS, STORAGE_DTYPES,
+    drop_sorted_duplicates, to_float_matrix,
+)
+from http_session import get_session, get_with_backoff, parse_json
+from rate_limiter import RateLimiter
 
 # =========================
 # 日志初始化（轮转 + 控制台）
@@ -57,10 +66,9 @@ class CryptoDataFetcher:
 
     def __init__(self):
         self.base_url = OKX_CONFIG['base_url']
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
-        })
+        self.session = get_session()
+        # 所有交易对共用限速器，并发下载时总请求速率不变
+        self.rate_limiter = RateLimiter(OKX_CONFIG['rate_limit'])
 
     def _make_request(self, symbol: str, limit: int = 300, after: int = None):
         url = self.base_url + OKX_CONFIG['endpoints']['history_candles']
@@ -68,9 +76,10 @@ class CryptoDataFetcher:
         if after:
             params["after"] = after
         try:
-            resp = self.session.get(url, params=params, timeout=OKX_CONFIG['timeout'])
+            resp = get_with_backoff(self.session, self.rate_limiter, url, params,
+                                    OKX_CONFIG['timeout'])
             resp.raise_for_status()
-            data = resp.json()
+            data = parse_json(resp)
             if 'data' not in data:
                 logger.error(f"API返回格式异常: {data}")
                 return None
@@ -82,66 +91,75 @@ class CryptoDataFetcher:
     def _process_raw_data(self, raw_data):
         if not raw_data:
             return pd.DataFrame()
-        df = pd.DataFrame(raw_data, columns=[
-            'ts','o','h','l','c','vol','volCcy','volCcyQuote','confirm'
-        ])
-        df = df.rename(columns={
-            'ts': 'timestamp', 'o':'open','h':'high','l':'low','c':'close',
-            'vol':'volume','volCcy':'volume_currency','volCcyQuote':'volume_quote','confirm':'confirm'
-        })
-        for col in ['open','high','low','close','volume','volume_currency','volume_quote']:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms') + pd.Timedelta(hours=8)
+        # 数值列整体一次转换为float64，不再逐列pd.to_numeric
+        arr = np.asarray(raw_data, dtype=object)
+        df = pd.DataFrame(to_float_matrix(arr[:, 1:8]), columns=NUMERIC_COLUMNS).astype(STORAGE_DTYPES)
+        df.insert(0, 'timestamp', pd.to_datetime(arr[:, 0].astype(np.int64), unit='ms') + pd.Timedelta(hours=8))
+        # 第8列confirm对历史K线恒为"1"，不保存
         df.set_index('timestamp', inplace=True)
-        df.sort_index(inplace=True)
-        df = df[~df.index.duplicated(keep='first')]
-        return df
-
-    def fetch_batch_data(self, symbol: str, months: int = 6):
-        """按批次获取历史数据，显示下载进度并支持中断"""
-        if not validate_symbol(symbol):
-            logger.error(f"不支持的交易对: {symbol}")
-            return None
-
+        # OKX按时间倒序返回，直接反转即为升序；顺序不符时(O(n)检查)再排序
+        df = df.iloc[::-1]
+        if not df.index.is_monotonic_increasing:
+            df = df.sort_index()
+        return drop_sorted_duplicates(df)
+
+    def _iter_batches(self, symbol: str, months: int):
+        """按时间倒序逐批下载，每批解析后立即产出 (批内已按时间升序)"""
         end_time = datetime.now()
         start_time = end_time - timedelta(days=30*months)
+        start_bound = start_time + pd.Timedelta(hours=8)
 
         batch_minutes = 5 * 300  # 每批最大 300 条 5 分钟数据
         total_batches = ((end_time - start_time).total_seconds() / 60) // batch_minutes + 1
 
-        all_data = []
+        downloaded = 0
         current_end_time = end_time
 
+        with tqdm(total=int(total_batches), desc=f"{symbol} 下载进度") as pbar:
+            while current_end_time > start_time:
+                end_ts = int(current_end_time.timestamp() * 1000)
+                batch = self._make_request(symbol, after=end_ts)
+                if not batch:
+                    break
+                last_ts = int(batch[-1][0])
+                current_end_time = datetime.fromtimestamp(last_ts / 1000)
+                downloaded += len(batch)
+
+                pbar.update(1)
+                pbar.set_postfix({'已下载条数': downloaded})
+
+                df = self._process_raw_data(batch)
+                df = df[df.index >= start_bound]
+                if not df.empty:
+                    yield df
+
+    def fetch_batch_data(self, symbol: str, months: int = 6):
+        """按批次获取历史数据，显示下载进度并支持中断"""
+        if not validate_symbol(symbol):
+            logger.error(f"不支持的交易对: {symbol}")
+            return None
+
+        # 只保留解析后的数值批次，不再累积原始字符串列表
+        frames = []
         try:
-            with tqdm(total=int(total_batches), desc=f"{symbol} 下载进度") as pbar:
-                while current_end_time > start_time:
-                    end_ts = int(current_end_time.timestamp() * 1000)
-                    batch = self._make_request(symbol, after=end_ts)
-                    if not batch:
-                        break
-                    all_data.extend(batch)
-                    last_ts = int(batch[-1][0])
-                    current_end_time = datetime.fromtimestamp(last_ts / 1000)
-                    time.sleep(OKX_CONFIG['rate_limit'])
-
-                    pbar.update(1)
-                    pbar.set_postfix({'已下载条数': len(all_data)})
+            for df in self._iter_batches(symbol, months):
+                frames.append(df)
         except KeyboardInterrupt:
             logger.warning("⚠️ 用户中断下载")
             print("\n下载已中断，部分数据已获取。")
 
-        if not all_data:
+        if not frames:
             logger.error("未获取到任何数据")
             return None
 
-        df = self._process_raw_data(all_data)
-        df = df[df.index >= start_time + pd.Timedelta(hours=8)]
-        return df
+        df = pd.concat(frames[::-1])
+        return df[~df.index.duplicated(keep='first')]
 
     def save_data(self, df: pd.DataFrame, symbol: str):
         file_path = get_legacy_data_path(symbol)
         try:
-            df.to_parquet(file_path, index=True)
+            df.to_parquet(file_path, index=True, engine='pyarrow',
+                          row_group_size=PARQUET_ROW_GROUP_SIZE, **PARQUET_WRITE_OPTIONS)
             logger.info(f"数据已保存: {file_path}, 条数: {len(df)}")
             return True
         except Exception as e:
@@ -149,14 +167,69 @@ class CryptoDataFetcher:
             return False
 
     def fetch_and_save(self, symbol: str, months: int = 6):
-        df = self.fetch_batch_data(symbol, months)
-        if df is None or df.empty:
+        """
+        边下载边写入临时parquet，内存中只保留当前一批数据
+
+        下载按时间倒序进行，完成后按行组倒序复制到正式文件，保证文件按时间升序；
+        中断时保存已下载的部分。
+        """
+        if not validate_symbol(symbol):
+            logger.error(f"不支持的交易对: {symbol}")
+            return False
+
+        file_path = Path(get_legacy_data_path(symbol))
+        part_path = file_path.with_name(file_path.name + '.part')
+        tmp_path = file_path.with_name(file_path.name + '.tmp')
+        writer = None
+        rows = 0
+        try:
+            try:
+                for df in self._iter_batches(symbol, months):
+                    table = pa.Table.from_pandas(df, preserve_index=True)
+                    if writer is None:
+                        writer = pq.ParquetWriter(part_path, table.schema, compression='zstd')
+                    writer.write_table(table)
+                    rows += len(df)
+            except KeyboardInterrupt:
+                logger.warning("⚠️ 用户中断下载")
+                print("\n下载已中断，保存已下载部分。")
+            finally:
+                if writer is not None:
+                    writer.close()
+
+            if writer is None:
+                logger.error("未获取到任何数据")
+                return False
+
+            # 临时文件每批一个行组；倒序复制时重新切分为每组PARQUET_ROW_GROUP_SIZE行
+            source = pq.ParquetFile(part_path)
+            with pq.ParquetWriter(tmp_path, source.schema_arrow, **PARQUET_WRITE_OPTIONS) as out:
+                pending = None
+                for i in reversed(range(source.num_row_groups)):
+                    group = source.read_row_group(i)
+                    pending = group if pending is None else pa.concat_tables([pending, group])
+                    full = pending.num_rows - pending.num_rows % PARQUET_ROW_GROUP_SIZE
+                    if full:
+                        out.write_table(pending.slice(0, full), row_group_size=PARQUET_ROW_GROUP_SIZE)
+                        pending = pending.slice(full)
+                if pending is not None and pending.num_rows:
+                    out.write_table(pending)
+            os.replace(tmp_path, file_path)
+            logger.info(f"数据已保存: {file_path}, 条数: {rows}")
+            return True
+        except Exception as e:
+            logger.error(f"保存数据失败: {e}")
             return False
-        return self.save_data(df, symbol)
-
-    def fetch_multiple_symbols(self, symbols: list, months: int = 6):
-        results = {}
-        for sym in symbols:
-            results[sym] = self.fetch_and_save(sym, months)
-            time.sleep(1)
-        return results
+        finally:
+            part_path.unlink(missing_ok=True)
+            tmp_path.unlink(missing_ok=True)
+
+    def fetch_multiple_symbols(self, symbols: list, months: int = 6, max_workers: int = None):
+        """并发下载多个交易对，请求速率由共用的限速器控制"""
+        max_workers = max_workers or OKX_CONFIG.get('max_workers', 4)
+        if max_workers <= 1 or len(symbols) <= 1:
+            return {sym: self.fetch_and_save(sym, months) for sym in symbols}
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(symbols))) as executor:
+            futures = {sym: executor.submit(self.fetch_and_save, sym, months) for sym in symbols}
+            return {sym: future.result() for sym, future in futures.items()}
@@ -2,12 +2,21 @@
 crypto_data_updater.py - 加密货币数据更新器
 """
 
+import numpy as np
 import pandas as pd
-import requests
-import time
+import pyarrow as pa
+import pyarrow.dataset as ds
 from datetime import datetime, timedelta
 from pathlib import Path
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from candle_utils import (
+    NUMERIC_COLUMNS, PARQUET_ROW_GROUP_SIZE, PARQUET_WRITE_OPTIONS, STORAGE_DTYPES,
+    drop_sorted_duplicates, to_float_matrix,
+)
+from http_session import get_session, get_with_backoff, parse_json
+from rate_limiter import RateLimiter
 
 # ---------------- 配置 ----------------
 DATA_DIR = Path(r"D:\VSC\crypto_data")
@@ -18,6 +27,7 @@ OKX_CONFIG = {
     "endpoints": {"candles": "candles"},
     "timeout": 10,
     "rate_limit": 0.2,  # 秒
+    "max_workers": 4,   # 批量更新的并发交易对数
 }
 
 COLUMN_MAPPING = {
@@ -28,18 +38,14 @@ COLUMN_MAPPING = {
     4: "close",
     5: "volume",
     6: "volume_currency",
-    7: "volume_quote"
+    7: "volume_quote",
 }
 
-DTYPE_CONFIG = {
-    "open": float,
-    "high": float,
-    "low": float,
-    "close": float,
-    "volume": float,
-    "volume_currency": float,
-    "volume_quote": float,
-}
+# 早期版本保存过的confirm列 (K线是否收盘)，读取时丢弃
+DROPPED_COLUMNS = ["confirm"]
+
+# 写入前的列类型: 价格float32，成交量float64
+DTYPE_CONFIG = STORAGE_DTYPES
 
 logging.basicConfig(
     level=logging.INFO,
@@ -48,10 +54,22 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# 按年/月分区存储，更新时只重写新数据涉及的月份
+PARTITIONING = ds.partitioning(
+    pa.schema([("year", pa.int32()), ("month", pa.int32())]), flavor="hive"
+)
+
+
 def get_data_file_path(symbol: str) -> Path:
+    """旧版单文件路径 (首次更新时迁移到分区数据集)"""
     return DATA_DIR / f"{symbol}_5m.parquet"
 
 
+def get_dataset_dir(symbol: str) -> Path:
+    """分区数据集目录: DATA_DIR/{symbol}/year=YYYY/month=MM/"""
+    return DATA_DIR / symbol
+
+
 def validate_symbol(symbol: str) -> bool:
     # 这里简单校验
     return "-" in symbol
@@ -62,12 +80,15 @@ class CryptoDataUpdater:
 
     def __init__(self):
         self.base_url = OKX_CONFIG["base_url"]
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0"
-        })
+        self.session = get_session()
+        # 所有交易对共用限速器，并发更新时总请求速率不变
+        self.rate_limiter = RateLimiter(OKX_CONFIG["rate_limit"])
+        # 每个交易对最近一次读取的分区数据: symbol -> (分区, 文件签名, DataFrame)
+        self._cache = {}
 
     def load_existing_data(self, symbol: str) -> pd.DataFrame:
+        if get_dataset_dir(symbol).exists():
+            return self._load_partitions(symbol)
         file_path = get_data_file_path(symbol)
         if not file_path.exists():
             logger.info(f"{symbol} 本地数据不存在: {file_path}")
@@ -77,8 +98,69 @@ class CryptoDataUpdater:
             if "timestamp" not in df.columns:
                 logger.error(f"{symbol} 文件缺少 'timestamp' 列")
                 return pd.DataFrame()
-            # 转为 datetime, UTC
-            df["timestamp"] = pd.to_datetime(pd.to_numeric(df["timestamp"], errors="coerce"), unit="ms", utc=True)
+            # 转为 datetime, UTC (已是时间类型时直接转换时区，否则按毫秒时间戳解析)
+            if pd.api.types.is_datetime64_any_dtype(df["timestamp"]):
+                df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
+            else:
+                df["timestamp"] = pd.to_datetime(df["timestamp"].to_numpy(dtype=np.int64), unit="ms", utc=True)
+            df.drop(columns=DROPPED_COLUMNS, errors="ignore", inplace=True)
+            df.set_index("timestamp", inplace=True)
+            df.sort_index(inplace=True)
+            return df
+        except Exception as e:
+            logger.error(f"{symbol} 读取失败: {e}")
+            return pd.DataFrame()
+
+    def _list_partitions(self, symbol: str) -> list:
+        """已有的(年, 月)分区，按时间排序"""
+        partitions = []
+        for month_dir in get_dataset_dir(symbol).glob("year=*/month=*"):
+            year = int(month_dir.parent.name.split("=", 1)[1])
+            month = int(month_dir.name.split("=", 1)[1])
+            partitions.append((year, month))
+        return sorted(partitions)
+
+    def _partition_signature(self, symbol: str, partitions: list = None) -> tuple:
+        """分区内parquet文件的(路径, 修改时间)，文件被重写后签名随之变化"""
+        dataset_dir = get_dataset_dir(symbol)
+        if partitions is None:
+            files = dataset_dir.glob("year=*/month=*/*.parquet")
+        else:
+            files = (f for year, month in partitions
+                     for f in (dataset_dir / f"year={year}" / f"month={month}").glob("*.parquet"))
+        return tuple(sorted((str(f), f.stat().st_mtime_ns) for f in files))
+
+    def _load_partitions(self, symbol: str, partitions: list = None) -> pd.DataFrame:
+        """
+        读取分区数据集，partitions为(年, 月)列表时只读取这些月份
+
+        同一交易对连续读取相同且未被改写的分区时直接返回缓存
+        (get_latest_timestamp 和 update_data 通常都读最新月份)，调用方不应修改返回值
+        """
+        key = tuple(partitions) if partitions is not None else None
+        signature = self._partition_signature(symbol, partitions)
+        cached = self._cache.get(symbol)
+        if cached is not None and cached[0] == key and cached[1] == signature:
+            return cached[2]
+        df = self._read_partitions(symbol, partitions)
+        self._cache[symbol] = (key, signature, df)
+        return df
+
+    def _read_partitions(self, symbol: str, partitions: list = None) -> pd.DataFrame:
+        dataset_dir = get_dataset_dir(symbol)
+        try:
+            dataset = ds.dataset(dataset_dir, format="parquet", partitioning=PARTITIONING)
+            expr = None
+            for year, month in partitions or []:
+                cond = (ds.field("year") == year) & (ds.field("month") == month)
+                expr = cond if expr is None else expr | cond
+            if partitions is not None and expr is None:
+                return pd.DataFrame()
+            table = dataset.to_table(filter=expr)
+            if table.num_rows == 0:
+                return pd.DataFrame()
+            drop = [c for c in ["year", "month", *DROPPED_COLUMNS] if c in table.column_names]
+            df = table.drop_columns(drop).to_pandas()
             df.set_index("timestamp", inplace=True)
             df.sort_index(inplace=True)
             return df
@@ -86,8 +168,30 @@ class CryptoDataUpdater:
             logger.error(f"{symbol} 读取失败: {e}")
             return pd.DataFrame()
 
+    def _write_partitions(self, symbol: str, df: pd.DataFrame):
+        """按年/月写入分区，只替换df涉及的月份"""
+        table = pa.Table.from_pandas(
+            df.reset_index().assign(year=df.index.year, month=df.index.month),
+            preserve_index=False,
+        )
+        ds.write_dataset(
+            table,
+            get_dataset_dir(symbol),
+            format="parquet",
+            partitioning=PARTITIONING,
+            existing_data_behavior="delete_matching",
+            min_rows_per_group=PARQUET_ROW_GROUP_SIZE,
+            max_rows_per_group=PARQUET_ROW_GROUP_SIZE,
+            file_options=ds.ParquetFileFormat().make_write_options(**PARQUET_WRITE_OPTIONS),
+        )
+
     def get_latest_timestamp(self, symbol: str) -> pd.Timestamp:
-        df = self.load_existing_data(symbol)
+        if get_dataset_dir(symbol).exists():
+            # 只读取最新的月份分区
+            partitions = self._list_partitions(symbol)
+            df = self._load_partitions(symbol, partitions[-1:])
+        else:
+            df = self.load_existing_data(symbol)
         if df.empty:
             return None
         return df.index.max()
@@ -98,9 +202,10 @@ class CryptoDataUpdater:
         if before:
             params["before"] = before
         try:
-            resp = self.session.get(url, params=params, timeout=OKX_CONFIG["timeout"])
+            resp = get_with_backoff(self.session, self.rate_limiter, url, params,
+                                    OKX_CONFIG["timeout"])
             resp.raise_for_status()
-            data = resp.json()
+            data = parse_json(resp)
             return data.get("data", [])
         except Exception as e:
             logger.error(f"{symbol} 请求失败: {e}")
@@ -109,16 +214,17 @@ class CryptoDataUpdater:
     def _process_raw_data(self, raw_data: list) -> pd.DataFrame:
         if not raw_data:
             return pd.DataFrame()
-        df = pd.DataFrame(raw_data)
-        df = df.rename(columns=COLUMN_MAPPING)
-        for col in ["open", "high", "low", "close", "volume", "volume_currency", "volume_quote"]:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors="coerce")
-        df["timestamp"] = pd.to_datetime(pd.to_numeric(df["timestamp"], errors="coerce"), unit="ms", utc=True)
+        # 数值列整体一次转换为float64，不再逐列pd.to_numeric
+        arr = np.asarray(raw_data, dtype=object)
+        df = pd.DataFrame(to_float_matrix(arr[:, 1:8]), columns=NUMERIC_COLUMNS)
+        # ts字段固定为毫秒时间戳字符串，直接转换为int64
+        df.insert(0, "timestamp", pd.to_datetime(arr[:, 0].astype(np.int64), unit="ms", utc=True))
         df.set_index("timestamp", inplace=True)
-        df.sort_index(inplace=True)
-        df = df[~df.index.duplicated(keep="first")]
-        return df
+        # OKX按时间倒序返回，直接反转即为升序；顺序不符时(O(n)检查)再排序
+        df = df.iloc[::-1]
+        if not df.index.is_monotonic_increasing:
+            df = df.sort_index()
+        return drop_sorted_duplicates(df)
 
     def fetch_missing_data(self, symbol: str, from_time: pd.Timestamp) -> pd.DataFrame:
         logger.info(f"开始获取 {symbol} 从 {from_time} 到现在的新数据...")
@@ -135,7 +241,6 @@ class CryptoDataUpdater:
                 break
             all_data.append(df_batch)
             before_ts = int(df_batch.index.min().timestamp() * 1000)
-            time.sleep(OKX_CONFIG["rate_limit"])
         if all_data:
             df_all = pd.concat(all_data)
             df_all = df_all[~df_all.index.duplicated(keep="last")]
@@ -147,8 +252,7 @@ class CryptoDataUpdater:
         if not validate_symbol(symbol):
             logger.error(f"{symbol} 非法交易对")
             return False
-        df_existing = self.load_existing_data(symbol)
-        latest_time = df_existing.index.max() if not df_existing.empty else None
+        latest_time = self.get_latest_timestamp(symbol)
         if latest_time is None:
             logger.info(f"{symbol} 无本地数据，将全量拉取")
             latest_time = pd.Timestamp(datetime(2020, 1, 1), tz="UTC")
@@ -156,32 +260,58 @@ class CryptoDataUpdater:
         if new_data.empty:
             logger.info(f"{symbol} 无新数据需要更新")
             return True
+        # 只读取新数据涉及的月份；还没有分区数据集时整体迁移旧版单文件
+        if get_dataset_dir(symbol).exists():
+            touched = sorted(set(zip(new_data.index.year, new_data.index.month)))
+            df_existing = self._load_partitions(symbol, touched)
+        else:
+            df_existing = self.load_existing_data(symbol)
         df_combined = pd.concat([df_existing, new_data])
         df_combined = df_combined[~df_combined.index.duplicated(keep="last")]
         df_combined.sort_index(inplace=True)
         # 保存
-        file_path = get_data_file_path(symbol)
         for col, dtype in DTYPE_CONFIG.items():
             if col in df_combined.columns:
                 df_combined[col] = df_combined[col].astype(dtype)
-        df_combined.to_parquet(file_path)
-        logger.info(f"{symbol} 数据已保存: {file_path}, 共 {len(df_combined)} 行")
+        self._write_partitions(symbol, df_combined)
+        logger.info(f"{symbol} 数据已保存: {get_dataset_dir(symbol)}, 写入 {len(df_combined)} 行")
         return True
 
-    def update_multiple_symbols(self, symbols: list) -> dict:
-        results = {}
-        for i, symbol in enumerate(symbols, 1):
+    def update_multiple_symbols(self, symbols: list, max_workers: int = None) -> dict:
+        """并发更新多个交易对，请求速率由共用的限速器控制"""
+        max_workers = max_workers or OKX_CONFIG["max_workers"]
+
+        def update_one(i: int, symbol: str) -> bool:
             logger.info(f"[{i}/{len(symbols)}] 更新 {symbol}")
-            success = self.update_data(symbol)
-            results[symbol] = success
+            return self.update_data(symbol)
+
+        if max_workers <= 1 or len(symbols) <= 1:
+            results = {symbol: update_one(i, symbol) for i, symbol in enumerate(symbols, 1)}
+        else:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(symbols))) as executor:
+                futures = {symbol: executor.submit(update_one, i, symbol)
+                           for i, symbol in enumerate(symbols, 1)}
+                results = {symbol: future.result() for symbol, future in futures.items()}
         logger.info(f"批量更新完成: {sum(results.values())}/{len(symbols)} 成功")
         return results
 
-    def get_data_status(self, symbol: str) -> dict:
-        df = self.load_existing_data(symbol)
-        if df.empty:
-            return {"symbol": symbol, "status": "无数据"}
-        latest_time = df.index.max()
+    def get_data_status(self, symbol: str, df: pd.DataFrame = None) -> dict:
+        """
+        数据状态；已传入df时直接使用，分区数据集只读取最新月份和文件元数据统计行数
+        """
+        if df is None and get_dataset_dir(symbol).exists():
+            latest_time = self.get_latest_timestamp(symbol)
+            if latest_time is None:
+                return {"symbol": symbol, "status": "无数据"}
+            total_rows = ds.dataset(get_dataset_dir(symbol), format="parquet",
+                                    partitioning=PARTITIONING).count_rows()
+        else:
+            if df is None:
+                df = self.load_existing_data(symbol)
+            if df.empty:
+                return {"symbol": symbol, "status": "无数据"}
+            latest_time = df.index.max()
+            total_rows = len(df)
         time_diff = datetime.utcnow().replace(tzinfo=None) - latest_time.to_pydatetime().replace(tzinfo=None)
         needs_update = time_diff > timedelta(minutes=5)
         return {
@@ -190,5 +320,5 @@ class CryptoDataUpdater:
             "latest_time": str(latest_time),
             "time_diff": str(time_diff),
             "needs_update": needs_update,
-            "total_rows": len(df)
+            "total_rows": total_rows
         }
@@ -2,7 +2,14 @@
 CryptoDataVisualizer - 加密货币数据可视化器 (英文 K 线, MA/RSI/ATR 支持)
 """
 
+import os
 import pandas as pd
+import matplotlib
+
+# 批量出图/脚本调用时设置 CRYPTO_HEADLESS=1，使用无界面的Agg后端
+if os.environ.get('CRYPTO_HEADLESS') == '1':
+    matplotlib.use('Agg')
+
 import matplotlib.pyplot as plt
 import mplfinance as mpf
 from datetime import datetime, timedelta
@@ -12,9 +19,107 @@ from pathlib import Path
 from typing import Optional
 
 from crypto_config import (
-    get_data_file_path, validate_symbol, validate_timeframe,
+    get_data_file_path, get_dataset_dir, has_dataset, validate_symbol, validate_timeframe,
     get_resample_rule, CHART_CONFIG, LOG_CONFIG
 )
+# numba可选：安装后RSI/ATR在一次遍历中算出，未安装时使用pandas
+from _njit import njit, NUMBA_AVAILABLE
+
+# polars可选：安装后读取和重采样走polars，未安装时使用pandas
+try:
+    import polars as pl
+    POLARS_AVAILABLE = True
+except ImportError:
+    pl = None
+    POLARS_AVAILABLE = False
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+# 分区数据集目录名中的分区列 (year=YYYY/month=MM)
+PARTITION_COLUMNS = ['year', 'month']
+SAVEFIG_DPI = 120
+
+
+@njit(cache=True)
+def _rsi_atr_kernel(close: np.ndarray, high: np.ndarray, low: np.ndarray, period: int):
+    """
+    一次遍历计算RSI和ATR (均为period窗口简单均值，与pandas rolling一致)
+
+    窗口和用滑动累加维护，移出窗口的值直接从数组中重新计算，不需要环形缓冲区。
+    """
+    n = close.size
+    rsi = np.full(n, np.nan)
+    atr = np.full(n, np.nan)
+    gain_sum = 0.0
+    loss_sum = 0.0
+    tr_sum = 0.0
+    for i in range(n):
+        # 真实波幅，首根K线没有前收盘价只取最高-最低
+        tr = high[i] - low[i]
+        if i > 0:
+            tr = max(tr, abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+            delta = close[i] - close[i - 1]
+            if delta > 0.0:
+                gain_sum += delta
+            else:
+                loss_sum -= delta
+        tr_sum += tr
+        if i >= period:
+            old = i - period
+            tr_sum -= max(high[old] - low[old], abs(high[old] - close[old - 1]),
+                          abs(low[old] - close[old - 1])) if old > 0 else high[old] - low[old]
+            if old > 0:
+                old_delta = close[old] - close[old - 1]
+                if old_delta > 0.0:
+                    gain_sum -= old_delta
+                else:
+                    loss_sum += old_delta
+            # 第一个完整的涨跌窗口从第2根K线开始，i == period时才满period个差值
+            avg_gain = gain_sum / period
+            avg_loss = loss_sum / period
+            if avg_loss > 0.0:
+                rsi[i] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+            elif avg_gain > 0.0:
+                rsi[i] = 100.0
+        if i >= period - 1:
+            atr[i] = tr_sum / period
+    return rsi, atr
+
+
+def _rsi_atr_pandas(close: np.ndarray, high: np.ndarray, low: np.ndarray, period: int):
+    """未安装numba时的RSI和ATR计算，返回值同_rsi_atr_kernel"""
+    close_s = pd.Series(close)
+    delta = close_s.diff()
+    avg_gain = delta.clip(lower=0).rolling(window=period).mean()
+    avg_loss = (-delta.clip(upper=0)).rolling(window=period).mean()
+    rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+
+    prev_close = close_s.shift().to_numpy()
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    atr = pd.Series(tr).rolling(window=period).mean()
+    return rsi.to_numpy(), atr.to_numpy()
+
+
+_rsi_atr = _rsi_atr_kernel if NUMBA_AVAILABLE else _rsi_atr_pandas
+
+
+def _rolling_means(values: np.ndarray, periods: list) -> dict:
+    """
+    共用一次累加和计算多个窗口的简单均线，O(n)与窗口数无关
+
+    窗口内含NaN时结果为NaN，与pandas rolling(window).mean()一致
+    """
+    nan_mask = np.isnan(values)
+    csum = np.concatenate(([0.0], np.cumsum(np.where(nan_mask, 0.0, values))))
+    cnan = np.concatenate(([0], np.cumsum(nan_mask)))
+    result = {}
+    for p in periods:
+        ma = np.full(len(values), np.nan)
+        if len(values) >= p:
+            window = (csum[p:] - csum[:-p]) / p
+            window[(cnan[p:] - cnan[:-p]) > 0] = np.nan
+            ma[p - 1:] = window
+        result[p] = ma
+    return result
 
 # 配置日志
 logging.basicConfig(**LOG_CONFIG)
@@ -31,17 +136,22 @@ class CryptoDataVisualizer:
         if not validate_symbol(symbol):
             logger.error(f"Unsupported pair: {symbol}")
             return None
-        file_path = get_data_file_path(symbol, '5m')  # always load 5m base data
-        if not Path(file_path).exists():
-            logger.error(f"Data file not found: {file_path}")
-            return None
+        # always load 5m base data; 分区数据集存在时优先读取 (数据更新器只写分区)
+        if has_dataset(symbol):
+            file_path = get_dataset_dir(symbol)
+        else:
+            file_path = get_data_file_path(symbol, '5m')
+            if not Path(file_path).exists():
+                logger.error(f"Data file not found: {file_path}")
+                return None
         try:
             df = pd.read_parquet(file_path)
+            df = df.drop(columns=PARTITION_COLUMNS, errors='ignore')
             if 'timestamp' in df.columns:
-                df.index = pd.to_datetime(df['timestamp'])
+                df.index = pd.to_datetime(df.pop('timestamp'))
             else:
                 df.index = pd.to_datetime(df.index)
-            return df
+            return df.sort_index()
         except Exception as e:
             logger.error(f"Failed to read data: {e}")
             return None
@@ -66,52 +176,101 @@ class CryptoDataVisualizer:
             logger.error(f"Resample failed: {e}")
             return df
 
+    def _load_and_resample_polars(self, symbol: str, timeframe: str,
+                                  start: Optional[str], end: Optional[str]) -> Optional[pd.DataFrame]:
+        """
+        polars版load_and_resample：惰性扫描parquet，日期过滤和列选择下推到读取阶段，
+        只读取窗口内的行组，重采样后再转换为pandas
+        """
+        if not validate_symbol(symbol):
+            logger.error(f"Unsupported pair: {symbol}")
+            return None
+        if timeframe != '5m' and not validate_timeframe(timeframe):
+            logger.error(f"Unsupported timeframe: {timeframe}")
+            timeframe = '5m'
+        try:
+            # 分区数据集存在时扫描整个目录 (year/month分区列不选出)，否则扫描旧版单文件
+            if has_dataset(symbol):
+                lf = pl.scan_parquet(get_dataset_dir(symbol) / '**/*.parquet', hive_partitioning=True)
+            else:
+                file_path = get_data_file_path(symbol, '5m')
+                if not Path(file_path).exists():
+                    logger.error(f"Data file not found: {file_path}")
+                    return None
+                lf = pl.scan_parquet(file_path)
+            schema = lf.collect_schema()
+            lf = lf.select(['timestamp'] + [col for col in OHLCV_COLUMNS if col in schema])
+
+            # 日期边界与时间列的时区保持一致
+            time_zone = getattr(schema['timestamp'], 'time_zone', None)
+            if start:
+                lf = lf.filter(pl.col('timestamp') >= self._time_bound(start, time_zone))
+            if end:
+                lf = lf.filter(pl.col('timestamp') <= self._time_bound(end, time_zone))
+            lf = lf.sort('timestamp')
+
+            if timeframe != '5m':
+                lf = lf.group_by_dynamic('timestamp', every=timeframe.lower()).agg(
+                    pl.col('open').first(),
+                    pl.col('high').max(),
+                    pl.col('low').min(),
+                    pl.col('close').last(),
+                    pl.col('volume').sum(),
+                ).drop_nulls()
+
+            return lf.collect().to_pandas().set_index('timestamp')
+        except Exception as e:
+            logger.error(f"Failed to read data: {e}")
+            return None
+
+    @staticmethod
+    def _time_bound(value: str, time_zone: Optional[str]) -> datetime:
+        """日期字符串转换为可与时间列比较的datetime (time_zone为时区名或tzinfo)"""
+        bound = pd.Timestamp(value)
+        if time_zone and bound.tzinfo is None:
+            bound = bound.tz_localize(time_zone)
+        return bound.to_pydatetime()
+
     def load_and_resample(self, symbol: str, timeframe: str = '5m', 
                          start: Optional[str] = None, end: Optional[str] = None) -> Optional[pd.DataFrame]:
+        if POLARS_AVAILABLE:
+            return self._load_and_resample_polars(symbol, timeframe, start, end)
         df = self.load_data(symbol)
         if df is None:
             return None
+        # 分区数据集的时间带UTC时区，日期边界与索引时区保持一致
         if start:
-            start_time = pd.to_datetime(start)
-            df = df[df.index >= start_time]
+            df = df[df.index >= self._time_bound(start, df.index.tz)]
         if end:
-            end_time = pd.to_datetime(end)
-            df = df[df.index <= end_time]
+            df = df[df.index <= self._time_bound(end, df.index.tz)]
         df = self.resample_data(df, timeframe)
         return df
 
     def calculate_ma(self, df: pd.DataFrame, periods: list) -> pd.DataFrame:
-        df_ma = df.copy()
-        for period in periods:
-            if len(df) >= period:
-                df_ma[f'ma{period}'] = df['close'].rolling(window=period).mean()
-        return df_ma
+        periods = [p for p in periods if len(df) >= p]
+        means = _rolling_means(df['close'].to_numpy(dtype=np.float64), periods)
+        return df.assign(**{f'ma{p}': means[p] for p in periods})
 
-    def calculate_rsi(self, df: pd.DataFrame, period: int = 14) -> Optional[pd.Series]:
+    def calculate_rsi_atr(self, df: pd.DataFrame, period: int = 14):
+        """RSI和ATR在一次遍历中算出，数据不足时返回(None, None)"""
         if len(df) < period:
-            return None
-        delta = df['close'].diff()
-        gain = delta.clip(lower=0)
-        loss = -delta.clip(upper=0)
-        avg_gain = gain.rolling(window=period).mean()
-        avg_loss = loss.rolling(window=period).mean()
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
+            return None, None
+        close, high, low = (np.ascontiguousarray(df[col].to_numpy(dtype=np.float64))
+                            for col in ('close', 'high', 'low'))
+        rsi, atr = _rsi_atr(close, high, low, period)
+        return pd.Series(rsi, index=df.index), pd.Series(atr, index=df.index)
+
+    def calculate_rsi(self, df: pd.DataFrame, period: int = 14) -> Optional[pd.Series]:
+        return self.calculate_rsi_atr(df, period)[0]
 
     def calculate_atr(self, df: pd.DataFrame, period: int = 14) -> Optional[pd.Series]:
-        if len(df) < period:
-            return None
-        high_low = df['high'] - df['low']
-        high_close = np.abs(df['high'] - df['close'].shift())
-        low_close = np.abs(df['low'] - df['close'].shift())
-        tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-        atr = tr.rolling(period).mean()
-        return atr
+        return self.calculate_rsi_atr(df, period)[1]
 
     def plot_candlestick(self, symbol: str, timeframe: str = '5m', 
                          start: Optional[str] = None, end: Optional[str] = None,
-                         show_ma: bool = True, show_rsi: bool = False, show_atr: bool = False) -> bool:
+                         show_ma: bool = True, show_rsi: bool = False, show_atr: bool = False,
+                         save_path: Optional[str] = None) -> bool:
+        """绘制K线图；指定save_path时保存为图片文件而不弹出窗口"""
         df = self.load_and_resample(symbol, timeframe, start, end)
         if df is None or df.empty:
             return False
@@ -133,9 +292,10 @@ class CryptoDataVisualizer:
                         mpf.make_addplot(df_ma[col_name], color=colors[i], width=1.2)
                     )
 
+        rsi, atr = self.calculate_rsi_atr(df) if (show_rsi or show_atr) else (None, None)
+
         # RSI panel
         if show_rsi:
-            rsi = self.calculate_rsi(df)
             if rsi is not None:
                 addplot_list.append(
                     mpf.make_addplot(rsi, panel=1, color='blue', ylabel='RSI', ylim=(0,100))
@@ -143,7 +303,6 @@ class CryptoDataVisualizer:
 
         # ATR panel
         if show_atr:
-            atr = self.calculate_atr(df)
             if atr is not None:
                 panel_index = 2 if show_rsi else 1
                 addplot_list.append(
@@ -161,6 +320,9 @@ class CryptoDataVisualizer:
             panel_ratios.append(1)
 
         title = f"{symbol} {timeframe.upper()} Candlestick Chart | {len(plot_data)} bars"
+        plot_kwargs = {}
+        if save_path:
+            plot_kwargs['savefig'] = dict(fname=save_path, dpi=SAVEFIG_DPI)
         mpf.plot(plot_data,
                  type='candle',
                  style=s,
@@ -170,12 +332,16 @@ class CryptoDataVisualizer:
                  figsize=CHART_CONFIG['figsize'],
                  ylabel='Price (USDT)',
                  tight_layout=True,
-                 panel_ratios=panel_ratios)
-        plt.show()
+                 panel_ratios=panel_ratios,
+                 **plot_kwargs)
+        if not save_path:
+            plt.show()
         return True
 
-    def plot_price_comparison(self, symbols: list, timeframe: str = '1d', days: int = 30, normalize: bool = True) -> bool:
-        plt.figure(figsize=CHART_CONFIG['figsize'])
+    def plot_price_comparison(self, symbols: list, timeframe: str = '1d', days: int = 30, normalize: bool = True,
+                              save_path: Optional[str] = None) -> bool:
+        """多币种价格对比图；指定save_path时保存为图片文件而不弹出窗口"""
+        fig = plt.figure(figsize=CHART_CONFIG['figsize'])
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         start_str = start_date.strftime('%Y-%m-%d')
@@ -197,16 +363,28 @@ class CryptoDataVisualizer:
         plt.grid(True, alpha=0.3)
         plt.xticks(rotation=45)
         plt.tight_layout()
-        plt.show()
+        if save_path:
+            fig.savefig(save_path, dpi=SAVEFIG_DPI)
+            plt.close(fig)
+        else:
+            plt.show()
         return True
 
     def get_data_summary(self, symbol: str, timeframe: str = '5m') -> Optional[dict]:
         df = self.load_and_resample(symbol, timeframe)
         if df is None:
             return None
-        latest_price = df['close'].iloc[-1]
-        price_change_24h = ((latest_price - df['close'].iloc[-288]) / df['close'].iloc[-288] * 100
-                            if len(df) >= 288 else 0)
+        # 最近24小时(288根5分钟K线)的切片只取一次，直接在数组上统计 (nan*与pandas一样跳过缺失值)
+        # 价格以float32存储，统计前转为float64
+        close = df['close'].to_numpy(dtype=np.float64)
+        k = min(288, len(close))
+        tail_close = close[-k:]
+        tail_high = df['high'].to_numpy(dtype=np.float64)[-k:]
+        tail_low = df['low'].to_numpy(dtype=np.float64)[-k:]
+        volume = df['volume'].to_numpy()
+        latest_price = close[-1]
+        price_change_24h = ((latest_price - tail_close[0]) / tail_close[0] * 100
+                            if k == 288 else 0)
         summary = {
             'symbol': symbol,
             'timeframe': timeframe,
@@ -215,13 +393,13 @@ class CryptoDataVisualizer:
                            'end': df.index.max().strftime('%Y-%m-%d %H:%M:%S')},
             'latest_price': latest_price,
             'price_stats': {
-                'high_24h': df['high'].tail(288).max() if len(df) >= 288 else df['high'].max(),
-                'low_24h': df['low'].tail(288).min() if len(df) >= 288 else df['low'].min(),
+                'high_24h': np.nanmax(tail_high),
+                'low_24h': np.nanmin(tail_low),
                 'change_24h_pct': price_change_24h
             },
             'volume_stats': {
-                'avg_volume': df['volume'].mean(),
-                'total_volume_24h': df['volume'].tail(288).sum() if len(df) >= 288 else df['volume'].sum()
+                'avg_volume': np.nanmean(volume),
+                'total_volume_24h': np.nansum(volume[-k:])
             }
         }
         return summary
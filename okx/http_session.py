@@ -0,0 +1,112 @@
+"""
+http_session.py - 共享HTTP会话
+
+获取器和更新器共用一个带连接池的会话，多次请求复用TCP/TLS连接。
+安装了httpx和h2时使用HTTP/2客户端，多个请求在同一连接上多路复用
+（设置环境变量 OKX_HTTP2=0 可关闭）；否则使用requests.Session，
+临时错误由urllib3按指数退避自动重试。两种会话都提供 get(url, params=, timeout=) 接口。
+get_with_backoff 在共用限速器上处理429限流，按Retry-After或指数退避后重试。
+响应体用 parse_json 解析，安装了orjson时使用orjson。
+"""
+
+import json
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import httpx
+    import h2  # noqa: F401  httpx的HTTP/2支持依赖h2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    httpx = None
+    HTTP2_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
+
+_SESSION = None
+
+
+def _create_requests_session() -> requests.Session:
+    session = requests.Session()
+    session.headers.update({'User-Agent': USER_AGENT})
+    retry = Retry(
+        total=8,
+        backoff_factor=0.25,
+        # 429由get_with_backoff在共用限速器上处理，这里只重试服务端临时错误
+        status_forcelist=[500, 502, 503, 504],
+        allowed_methods=['GET'],
+        respect_retry_after_header=True,
+        raise_on_status=False,  # 重试耗尽后返回最后的响应，由调用方处理状态码
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def _create_http2_client():
+    limits = httpx.Limits(max_connections=8, max_keepalive_connections=8)
+    # retries只重试连接错误，HTTP状态码错误由调用方处理
+    transport = httpx.HTTPTransport(http2=True, retries=3, limits=limits)
+    return httpx.Client(transport=transport, headers={'User-Agent': USER_AGENT}, timeout=10)
+
+
+def get_session():
+    """获取模块级共享会话 (首次调用时创建)"""
+    global _SESSION
+    if _SESSION is None:
+        if HTTP2_AVAILABLE and os.environ.get('OKX_HTTP2', '1') == '1':
+            _SESSION = _create_http2_client()
+        else:
+            _SESSION = _create_requests_session()
+    return _SESSION
+
+
+def parse_json(resp):
+    """解析响应体JSON，直接处理原始字节 (orjson比标准库json快数倍)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(resp.content)
+    return json.loads(resp.content)
+
+
+def _retry_after(resp):
+    """解析Retry-After响应头（秒），没有或无法解析时返回None"""
+    value = resp.headers.get('Retry-After')
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def get_with_backoff(session, rate_limiter, url: str, params: dict, timeout: float,
+                     max_retries: int = 5):
+    """
+    经限速器发出GET请求，遇到429时退避后重试
+
+    限速器由所有线程共用，一个线程被限流后其他线程也会一起暂停。
+    返回最后一次的响应，状态码检查由调用方负责。
+    """
+    for _ in range(max_retries):
+        rate_limiter.acquire()
+        resp = session.get(url, params=params, timeout=timeout)
+        if resp.status_code != 429:
+            rate_limiter.reset()
+            return resp
+        rate_limiter.backoff(_retry_after(resp))
+    return resp
+
+
+def set_session(session):
+    """替换共享会话 (测试或自定义代理时使用)"""
+    global _SESSION
+    _SESSION = session
@@ -0,0 +1,54 @@
+"""
+rate_limiter.py - 请求限速器
+
+多个线程共用同一个限速器时，请求按固定间隔依次放行，
+总请求速率不超过交易所公共接口的限制。
+遇到限流(429)时调用 backoff() 按指数退避暂停所有线程，请求成功后 reset() 恢复。
+"""
+
+import threading
+import time
+
+
+class RateLimiter:
+    """线程安全的固定间隔限速器"""
+
+    def __init__(self, interval: float, max_backoff: float = 30.0):
+        """
+        Args:
+            interval: 相邻两次请求的最小间隔（秒）
+            max_backoff: 单次退避的最长等待时间（秒）
+        """
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self._next_time = 0.0
+        self._failures = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """等待直到允许发出下一次请求"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_time)
+            self._next_time = start + self.interval
+        # 在锁外等待，其他线程可以同时预约后续时间片
+        if start > now:
+            time.sleep(start - now)
+
+    def backoff(self, retry_after: float = None) -> float:
+        """
+        被限流后推迟所有后续请求，返回本次退避时间（秒）
+
+        有Retry-After时按其等待，否则按 interval * 2^连续失败次数 指数增长
+        """
+        with self._lock:
+            self._failures += 1
+            if retry_after is None:
+                retry_after = self.interval * (2 ** self._failures)
+            delay = min(retry_after, self.max_backoff)
+            self._next_time = max(self._next_time, time.monotonic() + delay)
+        return delay
+
+    def reset(self):
+        """请求成功后清零连续失败次数"""
+        self._failures = 0
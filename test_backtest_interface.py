@@ -3,14 +3,7 @@
 """
 Test the flexible backtest interface
 """
-import sys
-import os
-from pathlib import Path
 
-# Add paths
-current_dir = Path(__file__).parent
-sys.path.insert(0, str(current_dir))
-sys.path.insert(0, str(current_dir / "backtest"))
 
 def test_backtest_manager():
     """Test BacktestManager functionality"""
@@ -70,7 +63,6 @@ def test_menu_options():
     
     try:
         # Import main module functions
-        sys.path.insert(0, str(current_dir / "backtest"))
         from main import show_available_resources
         
         print("\n4. Testing show_available_resources...")
@@ -107,4 +99,5 @@ def main():
     print("="*60)
 
 if __name__ == "__main__":
+    import conftest  # noqa: F401  脚本方式运行时设置导入路径
     main()
\ No newline at end of file
@@ -5,13 +5,6 @@
 测试动态分析功能（走向前和参数敏感性）
 """
 
-import sys
-from pathlib import Path
-
-# 添加路径
-current_dir = Path(__file__).parent
-sys.path.insert(0, str(current_dir))
-sys.path.insert(0, str(current_dir / "backtest"))
 
 def test_walk_forward_dynamic():
     """测试动态走向前分析"""
@@ -105,4 +98,5 @@ def main():
     print("="*80)
 
 if __name__ == "__main__":
+    import conftest  # noqa: F401  脚本方式运行时设置导入路径
     main()
\ No newline at end of file
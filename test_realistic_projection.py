@@ -5,13 +5,6 @@
 测试改进后的现实收益预估功能
 """
 
-import sys
-from pathlib import Path
-
-# 添加路径
-current_dir = Path(__file__).parent
-sys.path.insert(0, str(current_dir))
-sys.path.insert(0, str(current_dir / "backtest"))
 
 def test_realistic_projection():
     """测试现实收益预估"""
@@ -67,6 +60,7 @@ def test_realistic_projection():
         return False
 
 if __name__ == "__main__":
+    import conftest  # noqa: F401  脚本方式运行时设置导入路径
     success = test_realistic_projection()
     if success:
         print("\n✅ 现实收益预估功能测试通过")
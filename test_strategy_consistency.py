@@ -5,10 +5,11 @@
 测试回测系统和实盘交易系统中策略的一致性
 """
 
+import io
+import logging
 import sys
-import os
-from pathlib import Path
-import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
 import numpy as np
 import pytest
 
@@ -16,221 +17,214 @@ import pytest
 sys.stdout.reconfigure(encoding='utf-8', errors='ignore')
 sys.stderr.reconfigure(encoding='utf-8', errors='ignore')
 
-# 添加路径
-current_dir = Path(__file__).parent
-sys.path.insert(0, str(current_dir))
-sys.path.insert(0, str(current_dir / "backtest"))
-sys.path.insert(0, str(current_dir / "live_trading"))
+# 诊断输出走logging: 默认只输出汇总，-v 时输出逐信号明细
+logger = logging.getLogger(__name__)
+
+RISK_METHODS = ['fixed_percentage', 'recent_extreme']
+# 入场/止损/止盈价格允许的差异百分比
+PRICE_DIFF_THRESHOLDS = np.array([0.001, 0.1, 0.1])
+# generate_signals在5m时间框架下使用的RSI周期
+BACKTEST_RSI_PERIOD = 12
+
+
+def _backtest_cache(df):
+    """回测接口所用指标只与RSI周期有关，在主进程中计算一次供各风险方法共用"""
+    from unified_strategies.rsi_divergence_unified import RSIDivergenceUnified
+    return RSIDivergenceUnified("precompute", {'rsi_period': BACKTEST_RSI_PERIOD}).precompute(df)
+
+
+def _backtest_signals(df, risk_method, cache=None):
+    """回测系统接口生成信号 (在子进程中执行)"""
+    from unified_strategies.rsi_divergence_unified import generate_signals
+    return generate_signals(
+        df=df,
+        stop_loss_pct=0.015,
+        take_profit_ratio=1.5,
+        lookback=20,
+        risk_method=risk_method,
+        cache=cache
+    )
 
-def load_test_data():
-    """加载测试数据"""
-    data_path = current_dir / "crypto_data" / "BTC-USDT_5m.parquet"
-    
-    if not data_path.exists():
-        print(f"测试数据不存在: {data_path}")
-        return None
-    
-    df = pd.read_parquet(data_path)
-    
-    # 确保索引是时间格式
-    if not isinstance(df.index, pd.DatetimeIndex):
-        df.index = pd.to_datetime(df.index)
-    
-    # 取最近1000个数据点进行测试
-    df = df.tail(1000).copy()
-    df.sort_index(inplace=True)
-    
-    print(f"测试数据加载完成: {len(df)} 条记录")
-    print(f"数据时间范围: {df.index[0]} 至 {df.index[-1]}")
-    
-    return df
 
+def _live_strategy(risk_method):
+    """创建实盘系统适配器"""
+    from live_trading.strategies.rsi_divergence_unified_adapter import RSIDivergenceUnifiedAdapter
+    config = {
+        'rsi_period': 14,
+        'lookback_period': 20,
+        'stop_loss_pct': 0.015,
+        'take_profit_ratio': 1.5,
+        'risk_method': risk_method,
+        'min_signal_strength': 0.0,  # 设为0以便对比
+        'supported_symbols': ['BTC-USDT-SWAP'],
+        'timeframes': ['5m']
+    }
+    return RSIDivergenceUnifiedAdapter(f"rsi_unified_{risk_method}", config)
+
+
+def _live_cache(df):
+    """实盘适配器的指标缓存 (RSI周期与风险方法无关)"""
+    return _live_strategy(RISK_METHODS[0]).precompute(df)
+
+
+def _live_signals(df, risk_method, cache=None):
+    """实盘系统适配器生成信号 (在子进程中执行)"""
+    return _live_strategy(risk_method).analyze_market(df, "BTC-USDT-SWAP", cache=cache)
+
+
+def _run_risk_methods(func, df, risk_methods, cache=None):
+    """各风险方法互不依赖，用进程池并行生成信号，按risk_methods顺序返回
+
+    用spawn启动工作进程：fork会继承numba并行内核已启动的线程池，子进程调用内核时死锁
+    """
+    n = len(risk_methods)
+    with ProcessPoolExecutor(max_workers=n, mp_context=get_context('spawn')) as executor:
+        return list(executor.map(func, [df] * n, risk_methods, [cache] * n))
+
+
+@pytest.fixture
+def df(test_data):
+    """用于测试的一小段行情数据 (conftest中会话级读取一次)"""
+    return test_data
+
+def _format_signal_details(lines, signal_type, entry_price, stop_loss, take_profit):
+    """把单个信号的价格与风险收益写入缓冲区"""
+    lines.write(f"\n  {signal_type} @ {entry_price:.2f}, 止损: {stop_loss:.2f}, 止盈: {take_profit:.2f}")
+    if signal_type == 'buy':
+        risk_pct = (entry_price - stop_loss) / entry_price * 100
+        reward_pct = (take_profit - entry_price) / entry_price * 100
+    else:
+        risk_pct = (stop_loss - entry_price) / entry_price * 100
+        reward_pct = (entry_price - take_profit) / entry_price * 100
+    lines.write(f"\n  风险: {risk_pct:.2f}%, 收益: {reward_pct:.2f}%, R:R = 1:{reward_pct/risk_pct:.1f}")
 
-@pytest.fixture(scope="module")
-def df():
-    """加载用于测试的一小段行情数据"""
-    data = load_test_data()
-    assert data is not None, "测试数据加载失败"
-    return data
 
 def test_unified_strategy_backtest(df):
     """测试统一策略在回测系统中的表现"""
-    print("\n" + "="*60)
-    print("测试统一策略 - 回测系统")
-    print("="*60)
+    logger.info("%s\n测试统一策略 - 回测系统\n%s", "=" * 60, "=" * 60)
     
     try:
-        from unified_strategies.rsi_divergence_unified import generate_signals
-        
         # 测试两种风险管理方法
-        risk_methods = ['fixed_percentage', 'recent_extreme']
+        risk_methods = RISK_METHODS
         results = {}
         
-        for risk_method in risk_methods:
-            print(f"\n--- 风险方法: {risk_method} ---")
-            
-            signals = generate_signals(
-                df=df,
-                stop_loss_pct=0.015,
-                take_profit_ratio=1.5,
-                lookback=20,
-                risk_method=risk_method
-            )
-            
+        # 指标只计算一次，各风险方法共用
+        all_signals = _run_risk_methods(_backtest_signals, df, risk_methods, _backtest_cache(df))
+        for risk_method, signals in zip(risk_methods, all_signals):
             results[risk_method] = {
                 'signal_count': len(signals),
                 'signals': signals[:3]  # 保存前3个信号用于对比
             }
             
-            print(f"生成信号数量: {len(signals)}")
+            logger.info("--- 风险方法: %s --- 生成信号数量: %d", risk_method, len(signals))
             
-            # 显示前3个信号的详细信息
-            for i, signal in enumerate(signals[:3], 1):
-                timestamp, entry_price, signal_type, stop_loss, take_profit, _ = signal
-                print(f"信号 {i}: {signal_type} @ {entry_price:.2f}")
-                print(f"  止损: {stop_loss:.2f}, 止盈: {take_profit:.2f}")
-                if signal_type == 'buy':
-                    risk_pct = (entry_price - stop_loss) / entry_price * 100
-                    reward_pct = (take_profit - entry_price) / entry_price * 100
-                else:
-                    risk_pct = (stop_loss - entry_price) / entry_price * 100
-                    reward_pct = (entry_price - take_profit) / entry_price * 100
-                print(f"  风险: {risk_pct:.2f}%, 收益: {reward_pct:.2f}%, R:R = 1:{reward_pct/risk_pct:.1f}")
+            # 前3个信号的详细信息，汇总后一次输出
+            if logger.isEnabledFor(logging.DEBUG):
+                lines = io.StringIO()
+                for i, (timestamp, entry_price, signal_type, stop_loss, take_profit, _) in enumerate(signals[:3], 1):
+                    lines.write(f"\n信号 {i}:")
+                    _format_signal_details(lines, signal_type, entry_price, stop_loss, take_profit)
+                logger.debug(lines.getvalue())
         
         return results
         
     except Exception as e:
-        print(f"回测系统测试失败: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"回测系统测试失败: {e}")
         return None
 
 def test_unified_strategy_live_trading(df):
     """测试统一策略在实盘交易系统中的表现"""
-    print("\n" + "="*60)
-    print("测试统一策略 - 实盘交易系统")
-    print("="*60)
+    logger.info("%s\n测试统一策略 - 实盘交易系统\n%s", "=" * 60, "=" * 60)
     
     try:
-        from live_trading.strategies.rsi_divergence_unified_adapter import RSIDivergenceUnifiedAdapter
-        
         # 测试两种风险管理方法
-        risk_methods = ['fixed_percentage', 'recent_extreme']
+        risk_methods = RISK_METHODS
         results = {}
         
-        for risk_method in risk_methods:
-            print(f"\n--- 风险方法: {risk_method} ---")
-            
-            config = {
-                'rsi_period': 14,
-                'lookback_period': 20,
-                'stop_loss_pct': 0.015,
-                'take_profit_ratio': 1.5,
-                'risk_method': risk_method,
-                'min_signal_strength': 0.0,  # 设为0以便对比
-                'supported_symbols': ['BTC-USDT-SWAP'],
-                'timeframes': ['5m']
-            }
-            
-            strategy = RSIDivergenceUnifiedAdapter(f"rsi_unified_{risk_method}", config)
-            signals = strategy.analyze_market(df, "BTC-USDT-SWAP")
-            
+        # 指标只计算一次，各风险方法共用
+        all_signals = _run_risk_methods(_live_signals, df, risk_methods, _live_cache(df))
+        for risk_method, signals in zip(risk_methods, all_signals):
             results[risk_method] = {
                 'signal_count': len(signals),
                 'signals': signals[:3]  # 保存前3个信号用于对比
             }
             
-            print(f"生成信号数量: {len(signals)}")
+            logger.info("--- 风险方法: %s --- 生成信号数量: %d", risk_method, len(signals))
             
-            # 显示前3个信号的详细信息
-            for i, signal in enumerate(signals[:3], 1):
-                print(f"信号 {i}: {signal.signal_type} @ {signal.entry_price:.2f}")
-                print(f"  止损: {signal.stop_loss:.2f}, 止盈: {signal.take_profit:.2f}")
-                if signal.signal_type == 'buy':
-                    risk_pct = (signal.entry_price - signal.stop_loss) / signal.entry_price * 100
-                    reward_pct = (signal.take_profit - signal.entry_price) / signal.entry_price * 100
-                else:
-                    risk_pct = (signal.stop_loss - signal.entry_price) / signal.entry_price * 100
-                    reward_pct = (signal.entry_price - signal.take_profit) / signal.entry_price * 100
-                print(f"  风险: {risk_pct:.2f}%, 收益: {reward_pct:.2f}%, R:R = 1:{reward_pct/risk_pct:.1f}")
-                print(f"  强度: {signal.strength:.2f}, 原因: {signal.metadata.get('signal_reason', 'unknown')}")
+            # 前3个信号的详细信息，汇总后一次输出
+            if logger.isEnabledFor(logging.DEBUG):
+                lines = io.StringIO()
+                for i, signal in enumerate(signals[:3], 1):
+                    lines.write(f"\n信号 {i}:")
+                    _format_signal_details(lines, signal.signal_type, signal.entry_price,
+                                           signal.stop_loss, signal.take_profit)
+                    lines.write(f"\n  强度: {signal.strength:.2f}, 原因: {signal.metadata.get('signal_reason', 'unknown')}")
+                logger.debug(lines.getvalue())
         
         return results
         
     except Exception as e:
-        print(f"实盘系统测试失败: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"实盘系统测试失败: {e}")
         return None
 
 def compare_results(backtest_results, live_results):
     """对比两个系统的结果"""
-    print("\n" + "="*60)
-    print("系统一致性对比分析")
-    print("="*60)
+    logger.info("%s\n系统一致性对比分析\n%s", "=" * 60, "=" * 60)
     
     if not backtest_results or not live_results:
-        print("❌ 无法进行对比 - 某个系统测试失败")
+        logger.error("❌ 无法进行对比 - 某个系统测试失败")
         return
     
-    for risk_method in ['fixed_percentage', 'recent_extreme']:
-        print(f"\n--- 风险方法: {risk_method} ---")
-        
+    for risk_method in RISK_METHODS:
         bt_result = backtest_results.get(risk_method, {})
         live_result = live_results.get(risk_method, {})
         
         bt_count = bt_result.get('signal_count', 0)
         live_count = live_result.get('signal_count', 0)
         
-        print(f"信号数量对比:")
-        print(f"  回测系统: {bt_count}")
-        print(f"  实盘系统: {live_count}")
-        
-        if bt_count == live_count:
-            print("  ✅ 信号数量一致")
-        else:
-            print("  ❌ 信号数量不一致")
+        logger.info("--- 风险方法: %s --- 信号数量: 回测系统 %d, 实盘系统 %d %s",
+                    risk_method, bt_count, live_count,
+                    "✅ 一致" if bt_count == live_count else "❌ 不一致")
         
         # 对比前3个信号的价格
         bt_signals = bt_result.get('signals', [])
         live_signals = live_result.get('signals', [])
         
         min_signals = min(len(bt_signals), len(live_signals), 3)
-        price_match = True
         
-        for i in range(min_signals):
-            bt_signal = bt_signals[i]
-            live_signal = live_signals[i]
-            
-            # 回测信号格式: (timestamp, entry_price, signal_type, stop_loss, take_profit, _)
-            # 实盘信号格式: Signal对象
-            bt_entry = bt_signal[1]
-            bt_stop = bt_signal[3]
-            bt_take = bt_signal[4]
-            
-            live_entry = live_signal.entry_price
-            live_stop = live_signal.stop_loss
-            live_take = live_signal.take_profit
-            
-            entry_diff = abs(bt_entry - live_entry) / bt_entry * 100
-            stop_diff = abs(bt_stop - live_stop) / bt_stop * 100
-            take_diff = abs(bt_take - live_take) / bt_take * 100
-            
-            print(f"\n信号 {i+1} 价格对比:")
-            print(f"  入场价格: BT={bt_entry:.2f}, Live={live_entry:.2f}, 差异={entry_diff:.3f}%")
-            print(f"  止损价格: BT={bt_stop:.2f}, Live={live_stop:.2f}, 差异={stop_diff:.3f}%")
-            print(f"  止盈价格: BT={bt_take:.2f}, Live={live_take:.2f}, 差异={take_diff:.3f}%")
-            
-            if entry_diff > 0.001 or stop_diff > 0.1 or take_diff > 0.1:
-                price_match = False
-                print("  ❌ 价格存在差异")
-            else:
-                print("  ✅ 价格基本一致")
+        # 回测信号格式: (timestamp, entry_price, signal_type, stop_loss, take_profit, _)
+        # 实盘信号格式: Signal对象
+        # 两边的(入场, 止损, 止盈)各组成 (min_signals, 3) 数组，一次算出全部差异百分比
+        bt_prices = np.array([(sig[1], sig[3], sig[4]) for sig in bt_signals[:min_signals]],
+                             dtype=np.float64).reshape(-1, 3)
+        live_prices = np.array([(sig.entry_price, sig.stop_loss, sig.take_profit)
+                                for sig in live_signals[:min_signals]],
+                               dtype=np.float64).reshape(-1, 3)
+        # 差异百分比在同一缓冲区内原地计算，不产生中间数组
+        diffs = np.subtract(bt_prices, live_prices)
+        np.abs(diffs, out=diffs)
+        np.divide(diffs, bt_prices, out=diffs)
+        np.multiply(diffs, 100, out=diffs)
+        mismatched = np.logical_or.reduce(diffs > PRICE_DIFF_THRESHOLDS, axis=1)
+        price_match = not np.logical_or.reduce(mismatched)
+        
+        # 逐信号价格对比只在DEBUG级别输出，关闭时连格式化也跳过
+        if logger.isEnabledFor(logging.DEBUG):
+            lines = io.StringIO()
+            for i in range(min_signals):
+                (bt_entry, bt_stop, bt_take), (live_entry, live_stop, live_take) = bt_prices[i], live_prices[i]
+                entry_diff, stop_diff, take_diff = diffs[i]
+                lines.write(f"\n信号 {i+1} 价格对比:")
+                lines.write(f"\n  入场价格: BT={bt_entry:.2f}, Live={live_entry:.2f}, 差异={entry_diff:.3f}%")
+                lines.write(f"\n  止损价格: BT={bt_stop:.2f}, Live={live_stop:.2f}, 差异={stop_diff:.3f}%")
+                lines.write(f"\n  止盈价格: BT={bt_take:.2f}, Live={live_take:.2f}, 差异={take_diff:.3f}%")
+                lines.write("\n  ❌ 价格存在差异" if mismatched[i] else "\n  ✅ 价格基本一致")
+            logger.debug(lines.getvalue())
         
         if price_match and bt_count == live_count:
-            print(f"\n✅ {risk_method} 方法：两系统完全一致")
+            logger.info(f"✅ {risk_method} 方法：两系统完全一致")
         else:
-            print(f"\n❌ {risk_method} 方法：两系统存在差异")
+            logger.info(f"❌ {risk_method} 方法：两系统存在差异")
 
 def main():
     """主函数"""
@@ -239,6 +233,7 @@ def main():
     print("测试统一RSI背离策略在回测和实盘系统中的一致性")
     
     # 加载测试数据
+    from conftest import load_test_data
     df = load_test_data()
     if df is None:
         return
@@ -257,4 +252,9 @@ def main():
     print("="*60)
 
 if __name__ == "__main__":
+    import conftest  # 脚本方式运行时设置导入路径
+    # 实盘适配器依赖live_trading下的strategies包，本脚本需要它优先于backtest
+    sys.path.insert(0, str(conftest.ROOT_DIR / "live_trading"))
+    verbose = '-v' in sys.argv[1:] or '--verbose' in sys.argv[1:]
+    logging.basicConfig(level=logging.DEBUG if verbose else logging.INFO, format='%(message)s')
     main()
\ No newline at end of file
@@ -5,13 +5,6 @@
 简单测试走向前分析功能
 """
 
-import sys
-from pathlib import Path
-
-# 添加路径
-current_dir = Path(__file__).parent
-sys.path.insert(0, str(current_dir))
-sys.path.insert(0, str(current_dir / "backtest"))
 
 def test_walk_forward():
     """测试走向前分析"""
@@ -43,6 +36,7 @@ def test_walk_forward():
         return False
 
 if __name__ == "__main__":
+    import conftest  # noqa: F401  脚本方式运行时设置导入路径
     success = test_walk_forward()
     if success:
         print("\n走向前分析功能已准备就绪，可以在主菜单中使用")
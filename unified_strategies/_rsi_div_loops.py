@@ -0,0 +1,144 @@
+# _rsi_div_loops.py - RSI背离判断内核
+"""
+逐K线背离判断的计算内核
+
+回看窗口[i-lookback, i]内的峰谷恰好是整段序列峰谷中下标落在
+[窗口起点+peak_window, i-peak_window] 的部分，因此两种实现都只接收
+整段序列上的峰谷下标 (升序)，对每根K线在其中二分查找:
+
+- divergence_mask_kernel: numba逐K线标量循环 (各K线互不依赖，prange多线程)，
+  不满足条件即可提前跳过
+- divergence_mask_numpy: 未安装numba时的向量化实现，所有K线一次判断
+
+side=1 为底背离 (price_values传low，价格低点创新低而RSI低点抬高)，
+side=-1 为顶背离 (price_values传high，价格高点创新高而RSI高点降低)。
+"""
+
+import numpy as np
+
+from ._njit import njit, prange, NUMBA_AVAILABLE
+
+
+@njit(cache=True, nogil=True)
+def _nearest_extreme_kernel(extremes, target, lowest, highest, peak_window):
+    """[lowest, highest]内距离target不超过peak_window的最近极值，距离相同取前一个；没有时返回-1"""
+    best = -1
+    after = np.searchsorted(extremes, target, side='right')
+    if after > 0:
+        pred = extremes[after - 1]
+        if pred >= max(target - peak_window, lowest):
+            best = pred
+    at = np.searchsorted(extremes, target, side='left')
+    if at < len(extremes):
+        succ = extremes[at]
+        if succ <= min(target + peak_window, highest) and (best < 0 or succ - target < target - best):
+            best = succ
+    return best
+
+
+@njit(cache=True, nogil=True, parallel=True)
+def divergence_mask_kernel(bars, price_extremes, rsi_extremes, price_values, rsi_values,
+                           side, lookback, peak_window, min_distance):
+    """逐K线判断背离，返回与bars等长的布尔数组 (每根K线只写自己的mask[k]，可并行)"""
+    n = len(bars)
+    mask = np.zeros(n, dtype=np.bool_)
+    if len(price_extremes) < 2 or len(rsi_extremes) == 0:
+        return mask
+    for k in prange(n):
+        i = bars[k]
+        window_start = max(i - lookback, 0)
+        if i - window_start + 1 < min_distance + peak_window:
+            continue
+        lowest = window_start + peak_window
+        highest = i - peak_window
+
+        # 最近的两个价格极值 (须早于 当前-peak_window 且在窗口内)
+        end = np.searchsorted(price_extremes, highest, side='left')
+        if end < 2:
+            continue
+        idx1 = price_extremes[end - 2]
+        idx2 = price_extremes[end - 1]
+        if idx1 < lowest or idx2 - idx1 < min_distance:
+            continue
+
+        # 价格创新低/新高
+        if side > 0:
+            if price_values[idx2] >= price_values[idx1]:
+                continue
+        elif price_values[idx2] <= price_values[idx1]:
+            continue
+
+        # 对应的RSI极值
+        rsi1 = _nearest_extreme_kernel(rsi_extremes, idx1, lowest, highest, peak_window)
+        if rsi1 < 0:
+            continue
+        rsi2 = _nearest_extreme_kernel(rsi_extremes, idx2, lowest, highest, peak_window)
+        if rsi2 < 0:
+            continue
+
+        # RSI未创新低/新高 (背离)
+        if side > 0:
+            mask[k] = rsi_values[rsi2] > rsi_values[rsi1]
+        else:
+            mask[k] = rsi_values[rsi2] < rsi_values[rsi1]
+    return mask
+
+
+def _nearest_extremes_numpy(extremes, targets, lowest, highest, peak_window):
+    """_nearest_extreme_kernel的向量化版本，返回(极值下标, 是否找到)"""
+    last = len(extremes) - 1
+
+    after = np.searchsorted(extremes, targets, 'right')
+    pred = extremes[np.maximum(after - 1, 0)]
+    pred_ok = (after > 0) & (pred >= np.maximum(targets - peak_window, lowest))
+
+    at = np.searchsorted(extremes, targets, 'left')
+    succ = extremes[np.minimum(at, last)]
+    succ_ok = (at <= last) & (succ <= np.minimum(targets + peak_window, highest))
+
+    use_pred = pred_ok & ~(succ_ok & (succ - targets < targets - pred))
+    return np.where(use_pred, pred, succ), pred_ok | succ_ok
+
+
+def divergence_mask_numpy(bars, price_extremes, rsi_extremes, price_values, rsi_values,
+                          side, lookback, peak_window, min_distance):
+    """未安装numba时的向量化实现，返回值同divergence_mask_kernel"""
+    if len(price_extremes) < 2 or len(rsi_extremes) == 0:
+        return np.zeros(len(bars), dtype=bool)
+
+    window_start = np.maximum(bars - lookback, 0)
+    lowest = window_start + peak_window
+    highest = bars - peak_window
+    mask = bars - window_start + 1 >= min_distance + peak_window
+
+    first = np.searchsorted(price_extremes, lowest, 'left')
+    end = np.searchsorted(price_extremes, highest, 'left')
+    mask &= end - first >= 2
+    idx1 = price_extremes[np.maximum(end - 2, 0)]
+    idx2 = price_extremes[np.maximum(end - 1, 0)]
+    mask &= idx2 - idx1 >= min_distance
+
+    # 多数K线的窗口内没有两个间隔足够的极值，后续判断只对剩下的候选K线做
+    cand = np.flatnonzero(mask)
+    idx1, idx2 = idx1[cand], idx2[cand]
+    lowest, highest = lowest[cand], highest[cand]
+
+    # 写成"不满足反向条件"，与标量比较对NaN的处理一致
+    if side > 0:
+        ok = ~(price_values[idx2] >= price_values[idx1])
+    else:
+        ok = ~(price_values[idx2] <= price_values[idx1])
+
+    rsi1, found1 = _nearest_extremes_numpy(rsi_extremes, idx1, lowest, highest, peak_window)
+    rsi2, found2 = _nearest_extremes_numpy(rsi_extremes, idx2, lowest, highest, peak_window)
+    ok &= found1 & found2
+
+    if side > 0:
+        ok &= rsi_values[rsi2] > rsi_values[rsi1]
+    else:
+        ok &= rsi_values[rsi2] < rsi_values[rsi1]
+    mask[cand] = ok
+    return mask
+
+
+divergence_mask = divergence_mask_kernel if NUMBA_AVAILABLE else divergence_mask_numpy
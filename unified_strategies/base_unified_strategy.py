@@ -6,20 +6,109 @@
 支持回测系统和实盘交易系统的通用策略接口
 """
 
+import hashlib
+from collections import OrderedDict
+from types import SimpleNamespace
+
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Any, Optional, Tuple, Union
-from datetime import datetime
+from typing import List, Dict, Any, Mapping, Optional, Tuple
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
 
-@dataclass
+from ._njit import njit, NUMBA_AVAILABLE
+
+
+@njit(cache=True, nogil=True)
+def _peaks_troughs_kernel(series, window):
+    """
+    局部高点/低点内核: 严格大于(小于)前后window个邻居的点
+
+    两个条件都不满足时提前结束内层循环；返回截断到实际数量的intp下标数组
+    """
+    n = len(series)
+    peaks = np.empty(max(n - 2 * window, 0), np.intp)
+    troughs = np.empty(max(n - 2 * window, 0), np.intp)
+    n_peaks = 0
+    n_troughs = 0
+    for i in range(window, n - window):
+        value = series[i]
+        is_peak = True
+        is_trough = True
+        for j in range(i - window, i + window + 1):
+            if j == i:
+                continue
+            if value <= series[j]:
+                is_peak = False
+            if value >= series[j]:
+                is_trough = False
+            if not is_peak and not is_trough:
+                break
+        if is_peak:
+            peaks[n_peaks] = i
+            n_peaks += 1
+        if is_trough:
+            troughs[n_troughs] = i
+            n_troughs += 1
+    return peaks[:n_peaks], troughs[:n_troughs]
+
+
+def _peaks_troughs_numpy(series, window):
+    """
+    未安装numba时的向量化实现，返回值同_peaks_troughs_kernel
+
+    对每个偏移量k，把中心段与平移k后的连续切片整体比较一次 (共2*window次)；
+    以"不存在<=/>=的邻居"判断，与逐点循环对NaN的处理一致
+    """
+    n = len(series)
+    if n < 2 * window + 1:
+        empty = np.empty(0, np.intp)
+        return empty, empty
+    center = series[window:n - window]
+    not_peak = np.zeros(len(center), dtype=bool)
+    not_trough = np.zeros(len(center), dtype=bool)
+    for k in range(-window, window + 1):
+        if k == 0:
+            continue
+        neighbor = series[window + k:n - window + k]
+        not_peak |= center <= neighbor
+        not_trough |= center >= neighbor
+    return np.flatnonzero(~not_peak) + window, np.flatnonzero(~not_trough) + window
+
+
+_peaks_troughs = _peaks_troughs_kernel if NUMBA_AVAILABLE else _peaks_troughs_numpy
+
+# 峰谷结果按(数据内容摘要, 长度, 窗口)缓存: 策略对整段序列只查找一次峰谷，
+# 参数扫描(不同风险方法/止损参数)时同一段价格/RSI序列会被反复查找。
+# 每项是整段序列的下标数组，条目数不宜过多
+PEAK_CACHE_SIZE = 128
+_peak_cache: 'OrderedDict[Tuple, Tuple[np.ndarray, np.ndarray]]' = OrderedDict()
+
+
+def _cached_peaks_troughs(series: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """带LRU缓存的峰谷查找，series须为连续的float64数组"""
+    key = (hashlib.blake2b(series.view(np.uint8), digest_size=8).digest(), len(series), window)
+    result = _peak_cache.get(key)
+    if result is None:
+        result = _peaks_troughs(series, window)
+        # 结果在调用方之间共享，设为只读防止被原地修改
+        for arr in result:
+            arr.flags.writeable = False
+        _peak_cache[key] = result
+        if len(_peak_cache) > PEAK_CACHE_SIZE:
+            _peak_cache.popitem(last=False)
+    else:
+        _peak_cache.move_to_end(key)
+    return result
+
+
+@dataclass(slots=True, frozen=True)
 class UnifiedSignal:
-    """统一信号类 - 兼容回测和实盘系统"""
+    """统一信号类 - 兼容回测和实盘系统 (不可变，slots实例不带__dict__)"""
     # 基础信息
     symbol: str
     signal_type: str  # 'buy' or 'sell'
-    timestamp: Union[datetime, pd.Timestamp]
+    timestamp: pd.Timestamp  # datetime/np.datetime64等传入时统一转换为pd.Timestamp
     entry_price: float
     
     # 风险管理
@@ -31,12 +120,13 @@ class UnifiedSignal:
     strength: float = 1.0
     confidence: float = 1.0
     
-    # 额外信息
-    metadata: Dict[str, Any] = None
+    # 额外信息 (无额外信息时为None，不再为每个信号分配空字典)
+    metadata: Optional[Mapping[str, Any]] = None
     
     def __post_init__(self):
-        if self.metadata is None:
-            self.metadata = {}
+        # 时间戳只保留一种类型，下游可直接组成datetime64[ns]数组而不退化为object
+        if type(self.timestamp) is not pd.Timestamp:
+            object.__setattr__(self, 'timestamp', pd.Timestamp(self.timestamp))
     
     def to_backtest_format(self) -> Tuple:
         """转换为回测系统格式"""
@@ -61,12 +151,89 @@ class UnifiedSignal:
             'entry_price': self.entry_price,
             'stop_loss': self.stop_loss,
             'take_profit': self.take_profit,
-            'metadata': self.metadata
+            'metadata': {} if self.metadata is None else self.metadata
         }
 
+@dataclass(slots=True)
+class UnifiedSignalBatch:
+    """
+    列式信号批 - 各字段为等长数组，只在需要时生成逐个信号对象
+
+    side: 1为buy，-1为sell；metadata_columns 为逐信号的元数据列，
+    metadata_constants 为所有信号共用的元数据
+    """
+    symbol: str
+    strategy_id: str
+    timestamps: pd.DatetimeIndex
+    side: np.ndarray
+    entry_price: np.ndarray
+    stop_loss: np.ndarray
+    take_profit: np.ndarray
+    strength: np.ndarray
+    metadata_columns: Dict[str, np.ndarray]
+    metadata_constants: Dict[str, Any]
+
+    # to_backtest_array的结构化数组字段
+    BACKTEST_DTYPE = np.dtype([
+        ('timestamp', 'M8[ns]'),
+        ('side', 'i1'),
+        ('entry_price', 'f8'),
+        ('stop_loss', 'f8'),
+        ('take_profit', 'f8'),
+        ('strength', 'f8'),
+    ])
+
+    def __len__(self) -> int:
+        return len(self.side)
+
+    @property
+    def signal_types(self) -> np.ndarray:
+        """'buy'/'sell'字符串数组"""
+        return np.where(self.side > 0, 'buy', 'sell').astype(object)
+
+    def to_backtest_format(self) -> List[Tuple]:
+        """转换为回测系统格式，与逐个调用UnifiedSignal.to_backtest_format()相同"""
+        return list(zip(self.timestamps, self.entry_price.tolist(), self.signal_types,
+                        self.stop_loss.tolist(), self.take_profit.tolist(), [0] * len(self)))
+
+    def to_backtest_array(self) -> np.ndarray:
+        """转换为预分配的结构化数组 (按列填充，不逐信号创建元组)，供大批量信号向量化处理"""
+        out = np.empty(len(self), dtype=self.BACKTEST_DTYPE)
+        out['timestamp'] = self.timestamps.as_unit('ns').asi8.view('M8[ns]')
+        out['side'] = self.side
+        out['entry_price'] = self.entry_price
+        out['stop_loss'] = self.stop_loss
+        out['take_profit'] = self.take_profit
+        out['strength'] = self.strength
+        return out
+
+    def iter_signals(self):
+        """逐个生成UnifiedSignal (实盘接口等需要对象时使用)"""
+        columns = {key: values.tolist() for key, values in self.metadata_columns.items()}
+        for i, (timestamp, signal_type, entry, stop, take, strength) in enumerate(zip(
+                self.timestamps, self.signal_types, self.entry_price.tolist(),
+                self.stop_loss.tolist(), self.take_profit.tolist(), self.strength.tolist())):
+            metadata = {key: values[i] for key, values in columns.items()}
+            metadata.update(self.metadata_constants)
+            yield UnifiedSignal(
+                symbol=self.symbol,
+                signal_type=signal_type,
+                timestamp=timestamp,
+                entry_price=entry,
+                stop_loss=stop,
+                take_profit=take,
+                strategy_id=self.strategy_id,
+                strength=strength,
+                metadata=metadata
+            )
+
+
 class UnifiedStrategy(ABC):
     """统一策略基类"""
     
+    # validate_data要求的列 (类级常量，避免每次调用重建列表)
+    _REQUIRED_COLS = frozenset({'open', 'high', 'low', 'close', 'volume'})
+    
     def __init__(self, strategy_id: str, config: Dict[str, Any]):
         self.strategy_id = strategy_id
         self.config = config
@@ -76,13 +243,15 @@ class UnifiedStrategy(ABC):
         self.min_data_points = config.get('min_data_points', 50)
         
     @abstractmethod
-    def analyze_market(self, df: pd.DataFrame, symbol: str = "BTC-USDT") -> List[UnifiedSignal]:
+    def analyze_market(self, df: pd.DataFrame, symbol: str = "BTC-USDT",
+                       cache: Optional[SimpleNamespace] = None) -> List[UnifiedSignal]:
         """
         分析市场数据并生成信号
         
         Args:
             df: 市场数据 (OHLCV格式)
             symbol: 交易对名称
+            cache: precompute(df)的结果，为None时内部计算
             
         Returns:
             List[UnifiedSignal]: 生成的信号列表
@@ -94,37 +263,28 @@ class UnifiedStrategy(ABC):
         """返回策略名称"""
         pass
     
+    def precompute(self, df: pd.DataFrame) -> SimpleNamespace:
+        """
+        提取分析所需的numpy数组，供同一份数据的多次analyze_market调用共用
+
+        子类可在此基础上追加指标 (如RSI)
+        """
+        return SimpleNamespace(
+            close=df['close'].to_numpy(),
+            high=df['high'].to_numpy(),
+            low=df['low'].to_numpy(),
+            volume=df['volume'].to_numpy() if 'volume' in df.columns else np.ones(len(df)),
+        )
+    
     def validate_data(self, df: pd.DataFrame) -> bool:
         """验证数据质量"""
-        if df is None or len(df) < self.min_data_points:
-            return False
-        
-        required_columns = ['open', 'high', 'low', 'close', 'volume']
-        if not all(col in df.columns for col in required_columns):
-            return False
-        
-        return True
+        return (df is not None and len(df) >= self.min_data_points
+                and self._REQUIRED_COLS.issubset(df.columns))
     
-    def _find_peaks_and_troughs(self, series: np.ndarray, window: int = 3) -> Tuple[List[int], List[int]]:
-        """寻找局部高点和低点 - 统一实现"""
-        peaks = []
-        troughs = []
-        
-        for i in range(window, len(series) - window):
-            is_peak = True
-            is_trough = True
-            
-            for j in range(-window, window + 1):
-                if j == 0:
-                    continue
-                if series[i] <= series[i + j]:
-                    is_peak = False
-                if series[i] >= series[i + j]:
-                    is_trough = False
-            
-            if is_peak:
-                peaks.append(i)
-            if is_trough:
-                troughs.append(i)
-        
-        return peaks, troughs
\ No newline at end of file
+    def _find_peaks_and_troughs(self, series: np.ndarray, window: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        寻找局部高点和低点 - 统一实现 (安装numba时JIT编译，否则NumPy向量化)
+
+        返回升序的只读np.intp下标数组 (不再转换为list)
+        """
+        return _cached_peaks_troughs(np.ascontiguousarray(series, dtype=np.float64), window)
\ No newline at end of file
@@ -8,7 +8,9 @@
 
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Any, Tuple
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import logging
 
@@ -17,7 +19,7 @@ try:
 except ModuleNotFoundError:
     def _rsi(series, timeperiod=14):
         """Lightweight RSI implementation used if TA-Lib is unavailable."""
-        delta = series.diff()
+        delta = pd.Series(series).diff()
         gain = delta.where(delta > 0, 0.0)
         loss = -delta.where(delta < 0, 0.0)
         avg_gain = gain.rolling(window=timeperiod, min_periods=timeperiod).mean()
@@ -29,7 +31,10 @@ except ModuleNotFoundError:
     class talib:  # type: ignore
         RSI = staticmethod(_rsi)
 
-from .base_unified_strategy import UnifiedStrategy, UnifiedSignal
+from .base_unified_strategy import UnifiedStrategy, UnifiedSignal, UnifiedSignalBatch
+from ._rsi_div_loops import divergence_mask
+
+logger = logging.getLogger(__name__)
 
 class RSIDivergenceUnified(UnifiedStrategy):
     """统一RSI背离策略"""
@@ -62,42 +67,84 @@ class RSIDivergenceUnified(UnifiedStrategy):
     def get_strategy_name(self) -> str:
         return "RSI Divergence Unified"
     
-    def analyze_market(self, df: pd.DataFrame, symbol: str = "BTC-USDT") -> List[UnifiedSignal]:
+    def analyze_market(self, df: pd.DataFrame, symbol: str = "BTC-USDT",
+                       cache: Optional[SimpleNamespace] = None) -> List[UnifiedSignal]:
         """分析市场数据并生成统一信号"""
-        
+        return list(self.analyze_market_batch(df, symbol, cache).iter_signals())
+    
+    def analyze_market_batch(self, df: pd.DataFrame, symbol: str = "BTC-USDT",
+                             cache: Optional[SimpleNamespace] = None) -> UnifiedSignalBatch:
+        """分析市场数据，以列式信号批返回 (不为每个信号创建对象)"""
+        rows = self._analyze_rows(df, symbol, cache)
+        return self._build_batch(df, symbol, rows)
+    
+    def precompute(self, df: pd.DataFrame) -> SimpleNamespace:
+        """在价格数组之外计算RSI；只与rsi_period有关，不同风险方法可共用"""
+        cache = super().precompute(df)
+        # 直接传入连续的float64数组，TA-Lib不再经pandas包装输入输出
+        close = np.ascontiguousarray(cache.close, dtype=np.float64)
+        cache.rsi = np.asarray(talib.RSI(close, timeperiod=self.rsi_period), dtype=np.float64)
+        cache.rsi_period = self.rsi_period
+        return cache
+    
+    def _build_batch(self, df: pd.DataFrame, symbol: str, rows: List[Tuple]) -> UnifiedSignalBatch:
+        """把(下标, 方向, 入场, 止损, 止盈, 强度, 原因, RSI)行组装为信号批"""
+        idx, side, entry, stop, take, strength, reason, rsi = (
+            zip(*rows) if rows else ([] for _ in range(8))
+        )
+        return UnifiedSignalBatch(
+            symbol=symbol,
+            strategy_id=self.strategy_id,
+            timestamps=df.index[np.asarray(idx, dtype=np.intp)] if rows else pd.DatetimeIndex([]),
+            side=np.asarray(side, dtype=np.int8),
+            entry_price=np.asarray(entry, dtype=np.float64),
+            stop_loss=np.asarray(stop, dtype=np.float64),
+            take_profit=np.asarray(take, dtype=np.float64),
+            strength=np.asarray(strength, dtype=np.float64),
+            metadata_columns={
+                'signal_reason': np.asarray(reason, dtype=object),
+                'rsi_value': np.asarray(rsi, dtype=np.float64),
+            },
+            metadata_constants={'risk_method': self.risk_method}
+        )
+    
+    def _analyze_rows(self, df: pd.DataFrame, symbol: str,
+                      cache: Optional[SimpleNamespace] = None) -> List[Tuple]:
+        """识别全部背离，返回信号行"""
         if not self.validate_data(df):
             if self.debug:
                 print(f"数据验证失败 - 长度: {len(df) if df is not None else 0}")
             return []
         
         try:
-            # 计算技术指标
-            df = df.copy()
-            df['rsi'] = talib.RSI(df['close'], timeperiod=self.rsi_period)
-            
             # 等待足够的数据
             valid_data_start = self.rsi_period + self.lookback_period
             if len(df) < valid_data_start:
                 return []
             
-            # 提取数据数组
-            close_prices = df['close'].values
-            high_prices = df['high'].values
-            low_prices = df['low'].values
-            rsi_values = df['rsi'].values
-            volumes = df['volume'].values if 'volume' in df.columns else np.ones(len(df))
+            # 计算技术指标并提取数据数组 (传入的缓存RSI周期不符时重新计算)
+            if cache is None or getattr(cache, 'rsi_period', None) != self.rsi_period:
+                cache = self.precompute(df)
+            close_prices = cache.close
+            high_prices = cache.high
+            low_prices = cache.low
+            rsi_values = cache.rsi
+            volumes = cache.volume
             
-            # 去除NaN值
-            valid_mask = ~np.isnan(rsi_values)
-            start_idx = np.where(valid_mask)[0][0] + self.lookback_period
+            # 去除NaN值: TA-Lib的RSI前rsi_period个为NaN，直接检查该位置；
+            # 收盘价开头有NaN或使用简化RSI时才扫描第一个有效值
+            first_valid = self.rsi_period
+            if not (first_valid < len(rsi_values) and not np.isnan(rsi_values[first_valid])
+                    and np.isnan(rsi_values[first_valid - 1])):
+                first_valid = np.flatnonzero(~np.isnan(rsi_values))[0]
+            start_idx = first_valid + self.lookback_period
             
             if start_idx >= len(df) - 1:
                 return []
             
             # 识别背离信号
             signals = self._identify_all_divergences(
-                df, symbol, close_prices, high_prices, low_prices, 
-                rsi_values, volumes, start_idx
+                close_prices, high_prices, low_prices, rsi_values, volumes, start_idx
             )
             
             if self.debug:
@@ -111,373 +158,188 @@ class RSIDivergenceUnified(UnifiedStrategy):
             return []
     
     def _identify_all_divergences(self, 
-                                df: pd.DataFrame,
-                                symbol: str,
                                 close_prices: np.ndarray,
                                 high_prices: np.ndarray,
                                 low_prices: np.ndarray,
                                 rsi_values: np.ndarray,
                                 volumes: np.ndarray,
-                                start_idx: int) -> List[UnifiedSignal]:
-        """识别所有背离信号"""
-        
-        signals = []
-        
-        # 使用滑动窗口识别背离
-        for i in range(start_idx, len(close_prices)):
-            current_signals = self._check_divergence_at_point(
-                df, symbol, close_prices, high_prices, low_prices,
-                rsi_values, volumes, i
-            )
-            signals.extend(current_signals)
-        
-        return signals
-    
-    def _check_divergence_at_point(self,
-                                 df: pd.DataFrame,
-                                 symbol: str,
-                                 close_prices: np.ndarray,
-                                 high_prices: np.ndarray,
-                                 low_prices: np.ndarray,
-                                 rsi_values: np.ndarray,
-                                 volumes: np.ndarray,
-                                 current_idx: int) -> List[UnifiedSignal]:
-        """在指定点检查背离"""
-        
-        signals = []
-        
-        # 获取用于分析的数据窗口
-        window_start = max(0, current_idx - self.lookback_period)
-        window_close = close_prices[window_start:current_idx + 1]
-        window_high = high_prices[window_start:current_idx + 1]
-        window_low = low_prices[window_start:current_idx + 1]
-        window_rsi = rsi_values[window_start:current_idx + 1]
-        
-        if len(window_close) < self.min_divergence_distance + self.peak_window:
-            return signals
-        
-        # 寻找峰谷
-        price_peaks, price_troughs = self._find_peaks_and_troughs(window_close, self.peak_window)
-        rsi_peaks, rsi_troughs = self._find_peaks_and_troughs(window_rsi, self.peak_window)
-        
-        current_price = close_prices[current_idx]
-        current_rsi = rsi_values[current_idx]
-        timestamp = df.index[current_idx] if hasattr(df.index[current_idx], 'to_pydatetime') else df.index[current_idx]
-        
-        # 检查底背离 (看涨)
-        bull_signal = self._check_bullish_divergence(
-            window_close, window_low, window_rsi,
-            price_troughs, rsi_troughs, len(window_close) - 1
+                                start_idx: int) -> List[Tuple]:
+        """
+        识别所有背离信号 (只接收数组，时间戳在_build_batch中按信号下标取)
+        
+        峰谷只在整段序列上计算一次 (窗口内的峰谷是其中落在窗口范围内的部分)，
+        各K线的背离条件见 _rsi_div_loops
+        """
+        price_peaks, price_troughs = self._find_peaks_and_troughs(close_prices, self.peak_window)
+        rsi_peaks, rsi_troughs = self._find_peaks_and_troughs(rsi_values, self.peak_window)
+        
+        bars = np.arange(start_idx, len(close_prices))
+        # 底背离: 价格低点创新低，RSI低点未创新低；顶背离相反
+        bull = self._divergence_mask(bars, price_troughs, rsi_troughs, low_prices, rsi_values, 1)
+        bear = self._divergence_mask(bars, price_peaks, rsi_peaks, high_prices, rsi_values, -1)
+        
+        # 按K线排序，同一根K线先底背离后顶背离 (与逐K线检查的输出顺序一致)
+        idx = np.concatenate([bars[bull], bars[bear]])
+        side = np.concatenate([np.ones(np.count_nonzero(bull), dtype=np.int8),
+                               np.full(np.count_nonzero(bear), -1, dtype=np.int8)])
+        order = np.lexsort((-side, idx))
+        idx, side = idx[order], side[order]
+        
+        # 风险级别整批计算
+        entry_prices = close_prices[idx]
+        stop_losses, take_profits = self._calculate_risk_levels(
+            entry_prices, side, idx, low_prices, high_prices
         )
         
-        if bull_signal:
-            stop_loss, take_profit = self._calculate_risk_levels(
-                current_price, 'buy', current_idx, low_prices, high_prices
-            )
-            
-            strength = self._calculate_signal_strength('buy', current_rsi, volumes[current_idx])
-            
-            if strength >= self.min_signal_strength:
-                signal = UnifiedSignal(
-                    symbol=symbol,
-                    signal_type='buy',
-                    timestamp=timestamp,
-                    entry_price=current_price,
-                    stop_loss=stop_loss,
-                    take_profit=take_profit,
-                    strategy_id=self.strategy_id,
-                    strength=strength,
-                    metadata={
-                        'signal_reason': 'bullish_divergence',
-                        'rsi_value': current_rsi,
-                        'risk_method': self.risk_method
-                    }
-                )
-                signals.append(signal)
-        
-        # 检查顶背离 (看跌)
-        bear_signal = self._check_bearish_divergence(
-            window_close, window_high, window_rsi,
-            price_peaks, rsi_peaks, len(window_close) - 1
-        )
+        # 信号强度整批计算并过滤
+        signal_rsi = rsi_values[idx]
+        strengths = self._calculate_signal_strength(side, signal_rsi, volumes[idx])
+        keep = np.flatnonzero(strengths >= self.min_signal_strength)
+        side = side[keep]
+        reasons = np.where(side > 0, 'bullish_divergence', 'bearish_divergence').tolist()
         
-        if bear_signal:
-            stop_loss, take_profit = self._calculate_risk_levels(
-                current_price, 'sell', current_idx, low_prices, high_prices
-            )
-            
-            strength = self._calculate_signal_strength('sell', current_rsi, volumes[current_idx])
-            
-            if strength >= self.min_signal_strength:
-                signal = UnifiedSignal(
-                    symbol=symbol,
-                    signal_type='sell',
-                    timestamp=timestamp,
-                    entry_price=current_price,
-                    stop_loss=stop_loss,
-                    take_profit=take_profit,
-                    strategy_id=self.strategy_id,
-                    strength=strength,
-                    metadata={
-                        'signal_reason': 'bearish_divergence',
-                        'rsi_value': current_rsi,
-                        'risk_method': self.risk_method
-                    }
-                )
-                signals.append(signal)
+        signals = list(zip(idx[keep].tolist(), side.tolist(), entry_prices[keep], stop_losses[keep],
+                           take_profits[keep], strengths[keep], reasons, signal_rsi[keep]))
         
         return signals
     
-    def _check_bullish_divergence(self,
-                                price_series: np.ndarray,
-                                low_series: np.ndarray,
-                                rsi_series: np.ndarray,
-                                price_troughs: List[int],
-                                rsi_troughs: List[int],
-                                current_idx: int) -> bool:
-        """检查底背离"""
-        
-        if len(price_troughs) < 2:
-            return False
-        
-        # 获取最近的两个价格低点
-        recent_troughs = [t for t in price_troughs if t < current_idx - self.peak_window]
-        if len(recent_troughs) < 2:
-            return False
-        
-        trough1_idx = recent_troughs[-2]
-        trough2_idx = recent_troughs[-1]
-        
-        # 检查距离是否合适
-        if trough2_idx - trough1_idx < self.min_divergence_distance:
-            return False
-        
-        # 价格创新低
-        price1_low = low_series[trough1_idx]
-        price2_low = low_series[trough2_idx]
-        
-        if price2_low >= price1_low:
-            return False
-        
-        # 找到对应的RSI低点
-        rsi1_idx = self._find_nearest_trough(rsi_troughs, trough1_idx)
-        rsi2_idx = self._find_nearest_trough(rsi_troughs, trough2_idx)
-        
-        if rsi1_idx is None or rsi2_idx is None:
-            return False
-        
-        # RSI未创新低 (背离)
-        rsi1_low = rsi_series[rsi1_idx]
-        rsi2_low = rsi_series[rsi2_idx]
-        
-        # 底背离：价格新低，RSI不创新低
-        return rsi2_low > rsi1_low
-    
-    def _check_bearish_divergence(self,
-                                price_series: np.ndarray,
-                                high_series: np.ndarray,
-                                rsi_series: np.ndarray,
-                                price_peaks: List[int],
-                                rsi_peaks: List[int],
-                                current_idx: int) -> bool:
-        """检查顶背离"""
-        
-        if len(price_peaks) < 2:
-            return False
-        
-        # 获取最近的两个价格高点
-        recent_peaks = [p for p in price_peaks if p < current_idx - self.peak_window]
-        if len(recent_peaks) < 2:
-            return False
-        
-        peak1_idx = recent_peaks[-2]
-        peak2_idx = recent_peaks[-1]
-        
-        # 检查距离是否合适
-        if peak2_idx - peak1_idx < self.min_divergence_distance:
-            return False
-        
-        # 价格创新高
-        price1_high = high_series[peak1_idx]
-        price2_high = high_series[peak2_idx]
-        
-        if price2_high <= price1_high:
-            return False
-        
-        # 找到对应的RSI高点
-        rsi1_idx = self._find_nearest_peak(rsi_peaks, peak1_idx)
-        rsi2_idx = self._find_nearest_peak(rsi_peaks, peak2_idx)
-        
-        if rsi1_idx is None or rsi2_idx is None:
-            return False
-        
-        # RSI未创新高 (背离)
-        rsi1_high = rsi_series[rsi1_idx]
-        rsi2_high = rsi_series[rsi2_idx]
-        
-        # 顶背离：价格新高，RSI不创新高
-        return rsi2_high < rsi1_high
-    
-    def _find_nearest_trough(self, rsi_troughs: List[int], price_trough_idx: int) -> int:
-        """找到最接近价格低点的RSI低点"""
-        if not rsi_troughs:
-            return None
-        
-        min_distance = float('inf')
-        nearest_idx = None
-        
-        for rsi_idx in rsi_troughs:
-            distance = abs(rsi_idx - price_trough_idx)
-            if distance < min_distance and distance <= self.peak_window:
-                min_distance = distance
-                nearest_idx = rsi_idx
-        
-        return nearest_idx
-    
-    def _find_nearest_peak(self, rsi_peaks: List[int], price_peak_idx: int) -> int:
-        """找到最接近价格高点的RSI高点"""
-        if not rsi_peaks:
-            return None
-        
-        min_distance = float('inf')
-        nearest_idx = None
-        
-        for rsi_idx in rsi_peaks:
-            distance = abs(rsi_idx - price_peak_idx)
-            if distance < min_distance and distance <= self.peak_window:
-                min_distance = distance
-                nearest_idx = rsi_idx
-        
-        return nearest_idx
+    def _divergence_mask(self,
+                         bars: np.ndarray,
+                         price_extremes: np.ndarray,
+                         rsi_extremes: np.ndarray,
+                         price_values: np.ndarray,
+                         rsi_values: np.ndarray,
+                         side: int) -> np.ndarray:
+        """逐K线判断背离 (安装numba时JIT内核，否则NumPy向量化)，side=1为底背离，-1为顶背离"""
+        return divergence_mask(bars, price_extremes, rsi_extremes, price_values, rsi_values,
+                               side, self.lookback_period, self.peak_window,
+                               self.min_divergence_distance)
     
     def _calculate_risk_levels(self,
-                             entry_price: float,
-                             signal_type: str,
-                             current_idx: int,
+                             entry_prices: np.ndarray,
+                             side: np.ndarray,
+                             current_idx: np.ndarray,
                              low_prices: np.ndarray,
-                             high_prices: np.ndarray) -> Tuple[float, float]:
-        """统一的风险级别计算"""
+                             high_prices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """统一的风险级别计算 (整批信号一次计算，side: 1为buy，-1为sell)"""
         
         if self.risk_method == 'recent_extreme':
             # 使用历史极值方法 (回测系统原方法)
             return self._calculate_extreme_based_risk(
-                entry_price, signal_type, current_idx, low_prices, high_prices
+                entry_prices, side, current_idx, low_prices, high_prices
             )
         else:
             # 使用固定百分比方法 (实盘系统方法)
-            return self._calculate_percentage_based_risk(entry_price, signal_type)
+            return self._calculate_percentage_based_risk(entry_prices, side)
     
-    def _calculate_percentage_based_risk(self, entry_price: float, signal_type: str) -> Tuple[float, float]:
+    def _calculate_percentage_based_risk(self, entry_prices: np.ndarray,
+                                         side: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         """基于百分比的风险计算"""
-        if signal_type == 'buy':
-            stop_loss = entry_price * (1 - self.stop_loss_pct)
-            take_profit = entry_price + (entry_price - stop_loss) * self.take_profit_ratio
-        else:  # sell
-            stop_loss = entry_price * (1 + self.stop_loss_pct)
-            take_profit = entry_price - (stop_loss - entry_price) * self.take_profit_ratio
-        
+        buy = side > 0
+        stop_loss = np.where(buy, entry_prices * (1 - self.stop_loss_pct),
+                             entry_prices * (1 + self.stop_loss_pct))
+        take_profit = np.where(buy, entry_prices + (entry_prices - stop_loss) * self.take_profit_ratio,
+                               entry_prices - (stop_loss - entry_prices) * self.take_profit_ratio)
         return stop_loss, take_profit
     
+    def _recent_extremes(self, values: np.ndarray, current_idx: np.ndarray,
+                         pad: float, reducer) -> np.ndarray:
+        """各信号回看窗口[i-lookback, i]内的极值 (只归约信号所在K线的窗口)"""
+        lookback = self.lookback_period
+        if len(current_idx) == 0:
+            return np.empty(0)
+        if current_idx.min() < lookback:
+            # 窗口不足lookback+1根时前端用pad补齐，结果不变
+            values = np.concatenate([np.full(lookback, pad), values])
+            current_idx = current_idx + lookback
+        windows = np.lib.stride_tricks.sliding_window_view(values, lookback + 1)
+        return reducer(windows[current_idx - lookback], axis=1)
+    
     def _calculate_extreme_based_risk(self,
-                                    entry_price: float,
-                                    signal_type: str,
-                                    current_idx: int,
+                                    entry_prices: np.ndarray,
+                                    side: np.ndarray,
+                                    current_idx: np.ndarray,
                                     low_prices: np.ndarray,
-                                    high_prices: np.ndarray) -> Tuple[float, float]:
+                                    high_prices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         """基于历史极值的风险计算"""
-        lookback_start = max(0, current_idx - self.lookback_period)
-        
-        if signal_type == 'buy':
-            recent_low = np.min(low_prices[lookback_start:current_idx + 1])
-            stop_loss = recent_low * 0.998  # 0.2%缓冲
-            stop_loss_distance = entry_price - stop_loss
-            if stop_loss_distance <= 0:
-                stop_loss = entry_price * (1 - self.stop_loss_pct)
-                stop_loss_distance = entry_price - stop_loss
-            take_profit = entry_price + stop_loss_distance * self.take_profit_ratio
-        else:  # sell
-            recent_high = np.max(high_prices[lookback_start:current_idx + 1])
-            stop_loss = recent_high * 1.002  # 0.2%缓冲
-            stop_loss_distance = stop_loss - entry_price
-            if stop_loss_distance <= 0:
-                stop_loss = entry_price * (1 + self.stop_loss_pct)
-                stop_loss_distance = stop_loss - entry_price
-            take_profit = entry_price - stop_loss_distance * self.take_profit_ratio
-        
+        buy = side > 0
+        
+        # 止损放在近期极值外0.2%，买入只取低点、卖出只取高点
+        stop_loss = np.empty(len(current_idx))
+        stop_loss[buy] = self._recent_extremes(low_prices, current_idx[buy], np.inf, np.min) * 0.998
+        stop_loss[~buy] = self._recent_extremes(high_prices, current_idx[~buy], -np.inf, np.max) * 1.002
+        stop_loss_distance = np.where(buy, entry_prices - stop_loss, stop_loss - entry_prices)
+        
+        # 极值在入场价另一侧时退回固定百分比止损
+        fallback = stop_loss_distance <= 0
+        stop_loss = np.where(fallback, np.where(buy, entry_prices * (1 - self.stop_loss_pct),
+                                                entry_prices * (1 + self.stop_loss_pct)), stop_loss)
+        stop_loss_distance = np.where(fallback, np.where(buy, entry_prices - stop_loss,
+                                                         stop_loss - entry_prices), stop_loss_distance)
+        
+        take_profit = np.where(buy, entry_prices + stop_loss_distance * self.take_profit_ratio,
+                               entry_prices - stop_loss_distance * self.take_profit_ratio)
         return stop_loss, take_profit
     
-    def _calculate_signal_strength(self, signal_type: str, rsi_value: float, volume: float) -> float:
-        """计算信号强度"""
-        strength = 0.5  # 基础强度
-        
-        # RSI强度贡献
-        if signal_type == 'buy':
-            if rsi_value <= self.rsi_oversold:
-                strength += 0.3
-            elif rsi_value <= 40:
-                strength += 0.2
-        else:  # sell
-            if rsi_value >= self.rsi_overbought:
-                strength += 0.3
-            elif rsi_value >= 60:
-                strength += 0.2
+    def _calculate_signal_strength(self, side: np.ndarray, rsi_values: np.ndarray,
+                                   volumes: np.ndarray) -> np.ndarray:
+        """计算信号强度 (整批，side: 1为buy，-1为sell)"""
+        # 基础强度 + RSI强度贡献
+        buy_score = np.select([rsi_values <= self.rsi_oversold, rsi_values <= 40], [0.3, 0.2], 0.0)
+        sell_score = np.select([rsi_values >= self.rsi_overbought, rsi_values >= 60], [0.3, 0.2], 0.0)
+        strength = 0.5 + np.where(side > 0, buy_score, sell_score)
         
         # 成交量确认
-        if self.volume_confirmation and volume > 0:
+        if self.volume_confirmation:
             # 这里可以加入更复杂的成交量分析
-            strength += 0.1
+            strength = strength + np.where(volumes > 0, 0.1, 0.0)
         
-        return min(strength, 1.0)
+        return np.minimum(strength, 1.0)
 
-# 兼容性函数 - 供回测系统调用
-def generate_signals(df: pd.DataFrame, 
-                    stop_loss_pct: float = 0.015,
-                    take_profit_ratio: float = 1.5,
-                    lookback: int = 20,
-                    risk_method: str = 'recent_extreme',
-                    timeframe: str = '5m',
-                    **kwargs) -> List[Tuple]:
-    """
-    兼容回测系统的信号生成函数
-    使用统一策略实现
-    """
-    
-    # 根据时间框架调整RSI参数
-    timeframe_configs = {
-        '5m': {
-            'rsi_period': 12,           # 与实盘一致
-            'lookback_period': 20,      # 100分钟回看
-            'min_divergence_distance': 5,
-            'peak_window': 3,
-        },
-        '15m': {
-            'rsi_period': 12,           # 与实盘一致
-            'lookback_period': 16,      # 4小时回看
-            'min_divergence_distance': 4,
-            'peak_window': 2,
-        },
-        '1h': {
-            'rsi_period': 12,           # 与实盘一致
-            'lookback_period': 24,      # 24小时回看
-            'min_divergence_distance': 6,
-            'peak_window': 3,
-        },
-        '4h': {
-            'rsi_period': 14,           # 标准周期
-            'lookback_period': 20,      # 80小时=3.3天回看
-            'min_divergence_distance': 5,
-            'peak_window': 2,
-        },
-        '1d': {
-            'rsi_period': 16,           # 稍长周期更稳定
-            'lookback_period': 30,      # 30天回看
-            'min_divergence_distance': 7,
-            'peak_window': 3,
-        }
+
+# 回测兼容接口按时间框架调整的RSI参数
+TIMEFRAME_CONFIGS = {
+    '5m': {
+        'rsi_period': 12,           # 与实盘一致
+        'lookback_period': 20,      # 100分钟回看
+        'min_divergence_distance': 5,
+        'peak_window': 3,
+    },
+    '15m': {
+        'rsi_period': 12,           # 与实盘一致
+        'lookback_period': 16,      # 4小时回看
+        'min_divergence_distance': 4,
+        'peak_window': 2,
+    },
+    '1h': {
+        'rsi_period': 12,           # 与实盘一致
+        'lookback_period': 24,      # 24小时回看
+        'min_divergence_distance': 6,
+        'peak_window': 3,
+    },
+    '4h': {
+        'rsi_period': 14,           # 标准周期
+        'lookback_period': 20,      # 80小时=3.3天回看
+        'min_divergence_distance': 5,
+        'peak_window': 2,
+    },
+    '1d': {
+        'rsi_period': 16,           # 稍长周期更稳定
+        'lookback_period': 30,      # 30天回看
+        'min_divergence_distance': 7,
+        'peak_window': 3,
     }
+}
+
+
+@lru_cache(maxsize=32)
+def _build_strategy(timeframe: str, stop_loss_pct: float, take_profit_ratio: float,
+                    lookback: int, risk_method: str, overrides) -> RSIDivergenceUnified:
+    """按参数构建策略实例；参数扫描中相同组合复用同一实例 (分析过程不修改实例状态)"""
+    kwargs = dict(overrides)
     
     # 获取时间框架特定配置，如果没有则使用传入参数或5m配置
-    tf_config = timeframe_configs.get(timeframe, timeframe_configs['5m'])
+    tf_config = TIMEFRAME_CONFIGS.get(timeframe, TIMEFRAME_CONFIGS['5m'])
     
     config = {
         'rsi_period': kwargs.get('rsi_period', tf_config['rsi_period']),
@@ -488,26 +350,53 @@ def generate_signals(df: pd.DataFrame,
         'take_profit_ratio': take_profit_ratio,
         'risk_method': risk_method,
         'min_signal_strength': 0.6,  # 与实盘一致的信号强度过滤
-        'debug': True
+        'debug': kwargs.get('debug', False)
     }
+    return RSIDivergenceUnified("rsi_divergence_backtest", config)
+
+
+# 兼容性函数 - 供回测系统调用
+def generate_signals(df: pd.DataFrame, 
+                    stop_loss_pct: float = 0.015,
+                    take_profit_ratio: float = 1.5,
+                    lookback: int = 20,
+                    risk_method: str = 'recent_extreme',
+                    timeframe: str = '5m',
+                    cache: Optional[SimpleNamespace] = None,
+                    **kwargs) -> List[Tuple]:
+    """
+    兼容回测系统的信号生成函数
+    使用统一策略实现
+
+    cache为RSIDivergenceUnified.precompute(df)的结果，同一份数据扫描多组参数时可复用
+    """
     
-    print(f"使用时间框架 {timeframe} 的RSI策略优化参数:")
-    print(f"  RSI周期: {config['rsi_period']}, 回看周期: {config['lookback_period']}")
-    print(f"  背离距离: {config['min_divergence_distance']}, 峰值窗口: {config['peak_window']}")
+    try:
+        strategy = _build_strategy(timeframe, stop_loss_pct, take_profit_ratio, lookback,
+                                   risk_method, frozenset(kwargs.items()))
+    except TypeError:
+        # 参数不可哈希时不走缓存
+        strategy = _build_strategy.__wrapped__(timeframe, stop_loss_pct, take_profit_ratio,
+                                               lookback, risk_method, kwargs.items())
+    config = strategy.config
     
-    strategy = RSIDivergenceUnified("rsi_divergence_backtest", config)
-    unified_signals = strategy.analyze_market(df, "BTC-USDT")
+    # 诊断信息只在DEBUG级别输出，参数扫描时不逐次打印
+    logger.debug("使用时间框架 %s 的RSI策略优化参数: RSI周期: %s, 回看周期: %s, 背离距离: %s, 峰值窗口: %s",
+                 timeframe, config['rsi_period'], config['lookback_period'],
+                 config['min_divergence_distance'], config['peak_window'])
     
-    # 转换为回测系统格式
-    backtest_signals = [signal.to_backtest_format() for signal in unified_signals]
+    batch = strategy.analyze_market_batch(df, "BTC-USDT", cache)
     
-    print(f"=== 统一RSI背离策略 ===")
-    print(f"参数: 回看期={lookback}, 止损={stop_loss_pct:.1%}, 止盈比例={take_profit_ratio}, 风险方法={risk_method}")
-    print(f"生成信号总数: {len(backtest_signals)}")
+    # 转换为回测系统格式 (直接由列数组生成，不创建信号对象)
+    backtest_signals = batch.to_backtest_format()
     
-    # 显示前5个信号
-    for i, signal in enumerate(unified_signals[:5], 1):
-        print(f"{signal.metadata.get('signal_reason', '未知')}信号 {i}: {signal.timestamp}")
-        print(f"  入场: {signal.entry_price:.4f}, 止损: {signal.stop_loss:.4f}, 止盈: {signal.take_profit:.4f}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("统一RSI背离策略 参数: 回看期=%s, 止损=%.1f%%, 止盈比例=%s, 风险方法=%s, 生成信号总数: %d",
+                     lookback, stop_loss_pct * 100, take_profit_ratio, risk_method, len(backtest_signals))
+        # 显示前5个信号
+        for i, signal in zip(range(1, 6), batch.iter_signals()):
+            logger.debug("%s信号 %d: %s 入场: %.4f, 止损: %.4f, 止盈: %.4f",
+                         signal.metadata.get('signal_reason', '未知'), i, signal.timestamp,
+                         signal.entry_price, signal.stop_loss, signal.take_profit)
     
     return backtest_signals
\ No newline at end of file